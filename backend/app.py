@@ -1,58 +1,191 @@
 # backend/app.py
 from flask import Flask, jsonify
 from flask_cors import CORS
-from flask import request
-from utils.data_loader import load_change_points
-import pandas as pd
+from flask import Response, request
+import os
+import queue
+from utils.data_store import store
+from utils.jobs import JobManager
+from utils.live_feed import LiveFeed
+from utils.metrics import init_app as init_metrics, request_stage
+from utils.responses import NotAcceptable, dataset_response
 app = Flask(__name__)
 CORS(app)  # Allow cross-origin requests from React frontend
+init_metrics(app)  # Per-route timings, served at /api/metrics
+jobs = JobManager(os.path.join('data', 'jobs'))
+feed = LiveFeed(store)
+
+# Seconds between keep-alive messages on idle streams
+STREAM_KEEPALIVE = 15
+
+
+@app.errorhandler(NotAcceptable)
+def handle_not_acceptable(e):
+    return jsonify({'error': str(e)}), 406
+
+
+def _load(name):
+    """Current snapshot of a dataset, timed as the request's ``load`` stage."""
+    with request_stage('load'):
+        return store.get(name)
+
+
+@request_stage('filter')
+def _date_range(dataset):
+    """Row selector for the optional ``start``/``end`` query parameters (e.g. '2020-01-01')."""
+    start = request.args.get('start') or None
+    end = request.args.get('end') or None
+    if start is None and end is None:
+        return slice(None)
+    return dataset.date_range(start, end)
+
+
+@request_stage('filter')
+def _downsampled(dataset, rows, columns):
+    """
+    Apply the optional ``max_points`` (and ``downsample=lttb|minmax``) query
+    parameters, so charts can ask for roughly one point per pixel.
+    """
+    max_points = request.args.get('max_points')
+    if not max_points:
+        return rows
+    try:
+        max_points = int(max_points)
+    except ValueError:
+        raise ValueError(f"max_points must be an integer, got {max_points!r}")
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    method = request.args.get('downsample', 'lttb')
+    return dataset.downsample(columns, rows, max_points, method)
+
 
 @app.route('/api/change-points', methods=['GET'])
 def get_change_points():
     try:
-        data = load_change_points()
-        return jsonify(data)
+        return dataset_response(_load('change_points'))
+    except NotAcceptable:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/oil-prices', methods=['GET'])
 def get_oil_prices():
-    df = pd.read_csv('data/brent_clean.csv', parse_dates=['Date'])
-    df = df[['Date', 'Price']]
-    df['Date'] = df['Date'].astype(str)
-    return jsonify(df.to_dict(orient='records'))
+    prices = _load('prices')
+    try:
+        rows = _downsampled(prices, slice(None), ['Price'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return dataset_response(prices, ['Date', 'Price'], rows)
 
 
 @app.route('/api/oil-prices/filter', methods=['GET'])
 def get_filtered_oil_prices():
-    start = request.args.get('start')  # e.g. '2020-01-01'
-    end = request.args.get('end')      # e.g. '2021-01-01'
-    df = pd.read_csv('data/brent_clean.csv', parse_dates=['Date'])
-    df = df[['Date', 'Price']]
-    if start:
-        df = df[df['Date'] >= start]
-    if end:
-        df = df[df['Date'] <= end]
-    df['Date'] = df['Date'].astype(str)
-    return jsonify(df.to_dict(orient='records'))
+    prices = _load('prices')
+    try:
+        rows = _downsampled(prices, _date_range(prices), ['Price'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return dataset_response(prices, ['Date', 'Price'], rows)
 
 @app.route('/api/oil-metrics', methods=['GET'])
 def get_oil_metrics():
-    df = pd.read_csv('data/brent_clean.csv', parse_dates=['Date'])
-    df = df[['Date', 'daily_return', 'volatility']]
-    df['Date'] = df['Date'].astype(str)
-    return jsonify(df.to_dict(orient='records'))
+    prices = _load('prices')
+    try:
+        rows = _downsampled(prices, _date_range(prices), ['daily_return', 'volatility'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return dataset_response(prices, ['Date', 'daily_return', 'volatility'], rows)
 
 @app.route('/api/events', methods=['GET'])
 def get_events():
     """Serve historical geopolitical/economic events."""
     try:
-        events = pd.read_csv('data/event_data.csv', parse_dates=['Date'])
-        events['Date'] = events['Date'].astype(str)
-        return jsonify(events.to_dict(orient='records'))
+        events = _load('events')
+        rows = _date_range(events)
+        return dataset_response(events, rows=rows)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except NotAcceptable:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/change-point-jobs', methods=['POST'])
+def submit_change_point_job():
+    """
+    Queue a change point analysis. The JSON body may set column, start, end,
+    engine ('exact' or 'pymc3'), mode, draws, tune, chains,
+    time_budget_seconds and random_seed. Identical submissions on the same
+    data return the existing job. The job runs on the source the price
+    dataset was loaded from, and fails if that source changes before it starts.
+    """
+    prices = store.get('prices')
+    try:
+        status = jobs.submit(request.get_json(silent=True) or {}, prices.path, prices.version)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(status), 200 if status['state'] == 'done' else 202
+
+
+@app.route('/api/change-point-jobs/<job_id>', methods=['GET'])
+def get_change_point_job(job_id):
+    """State ('queued', 'running', 'done' or 'failed'), progress and message of a job."""
+    try:
+        status = jobs.status(job_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if status is None:
+        return jsonify({'error': f"Unknown job '{job_id}'"}), 404
+    return jsonify(status)
+
+
+@app.route('/api/change-point-jobs/<job_id>/result', methods=['GET'])
+def get_change_point_job_result(job_id):
+    """Most probable change dates and posterior means of a finished job."""
+    try:
+        status = jobs.status(job_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if status is None:
+        return jsonify({'error': f"Unknown job '{job_id}'"}), 404
+    if status['state'] != 'done':
+        return jsonify(status), 409
+    return jsonify(jobs.result(job_id))
+
+
+@app.route('/api/stream', methods=['GET'])
+def stream_updates():
+    """
+    Live feed of newly ingested prices with their daily return, rolling
+    volatility and recent change point probability, as Server-Sent Events
+    (default) or NDJSON (``?format=ndjson``). The latest update is sent on
+    connect; a ``reset`` event means the client fell behind and should refetch.
+    """
+    fmt = request.args.get('format', 'sse')
+    if fmt not in ('sse', 'ndjson'):
+        return jsonify({'error': "format must be 'sse' or 'ndjson'"}), 400
+    client = feed.subscribe()
+
+    def generate():
+        try:
+            while True:
+                try:
+                    event, data = client.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keepalive\n\n' if fmt == 'sse' else '\n'
+                    continue
+                if fmt == 'sse':
+                    yield f"event: {event}\ndata: {data}\n\n"
+                else:
+                    yield f'{{"event": "{event}", "data": {data}}}\n'
+        finally:
+            feed.unsubscribe(client)
+
+    mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+    return Response(generate(), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -1,8 +1,5 @@
 # backend/utils/data_loader.py
-import pandas as pd
-import os
+from utils.data_store import store
 
 def load_change_points():
-    csv_path = os.path.join('data', 'change_points.csv')
-    df = pd.read_csv(csv_path)
-    return df.to_dict(orient='records')
+    return store.get('change_points').records()
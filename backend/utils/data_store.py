@@ -0,0 +1,248 @@
+# backend/utils/data_store.py
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.downsample import downsample
+
+# Downsampled views memoized per dataset snapshot
+_DOWNSAMPLE_CACHE_SIZE = 64
+
+
+class Dataset:
+    """
+    Immutable in-memory snapshot of a CSV file, held as typed NumPy columns.
+    Date columns are datetime64[ns]; their string form is computed once at load,
+    together with a sorted date index for range queries. ``path`` is the file
+    or columnar store it was loaded from and ``version`` its content version.
+    """
+
+    def __init__(self, name, columns, date_column, version, path=None):
+        self.name = name
+        self.columns = columns
+        self.date_column = date_column
+        self.version = version
+        self.path = path
+        self.date_strings = None
+        self._sorted_dates = None
+        self._order = None
+        self._downsampled = OrderedDict()
+        self._downsampled_lock = threading.Lock()
+        if date_column is not None:
+            dates = columns[date_column]
+            self.date_strings = pd.Series(dates).astype(str).to_numpy(dtype=object)
+            # NaT sorts last, so it never falls inside a finite range
+            if len(dates) > 1 and not np.all(dates[1:] >= dates[:-1]):
+                self._order = np.argsort(dates, kind='stable')
+                self._sorted_dates = dates[self._order]
+            else:
+                self._sorted_dates = dates
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def date_range(self, start=None, end=None):
+        """
+        Rows whose date lies in ``[start, end]`` (both inclusive, either optional),
+        found by binary search on the sorted date index.
+
+        For a date-sorted file the result is a ``slice``, so selecting columns
+        with it makes views rather than copies; otherwise it is the array of
+        matching row positions in date order. Either way the cost grows with
+        the number of matching rows, not with the size of the dataset.
+
+        Args:
+            start, end (str or datetime-like, optional): Range bounds.
+
+        Returns:
+            slice or np.ndarray: Row selector for ``frame``/``records``.
+
+        Raises:
+            ValueError: If a bound is not a valid date.
+        """
+        if self._sorted_dates is None:
+            raise ValueError(f"Dataset '{self.name}' has no date column")
+        dates = self._sorted_dates
+        lo = 0 if start is None else int(np.searchsorted(dates, _to_datetime64(start), side='left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _to_datetime64(end), side='right'))
+        hi = max(lo, hi)
+        if self._order is None:
+            return slice(lo, hi)
+        return self._order[lo:hi]
+
+    def downsample(self, columns, rows=slice(None), max_points=1000, method='lttb'):
+        """
+        Row positions of a shape-preserving downsample of ``columns`` over the
+        selected rows, with at most ``max_points`` rows.
+
+        Results are memoized on this snapshot (keyed by the range, the columns,
+        the point budget and the method), so repeated zoomed-out views of the
+        same data are served without recomputation; a reload creates a new
+        snapshot and so drops them. The memo is shared by request threads and
+        guarded by a lock; the downsampling itself runs outside it.
+
+        Args:
+            columns (list of str): Numeric columns whose shape must be preserved.
+            rows (slice or np.ndarray): Row selector, e.g. from ``date_range``.
+            max_points (int): Point budget.
+            method (str): ``'lttb'`` or ``'minmax'``.
+
+        Returns:
+            np.ndarray: Row positions usable with ``frame``/``records``.
+        """
+        positions = np.arange(len(self))[rows]
+        if max_points >= len(positions):
+            return positions
+        key = None
+        if isinstance(rows, slice):
+            key = (tuple(columns), rows.indices(len(self)), int(max_points), method)
+            with self._downsampled_lock:
+                cached = self._downsampled.get(key)
+                if cached is not None:
+                    self._downsampled.move_to_end(key)
+                    return cached
+        if self.date_column is not None:
+            x = self.columns[self.date_column][positions].view(np.int64)
+        else:
+            x = positions
+        kept = positions[downsample(x, [self.columns[c][positions] for c in columns],
+                                    max_points, method)]
+        if key is not None:
+            with self._downsampled_lock:
+                self._downsampled[key] = kept
+                while len(self._downsampled) > _DOWNSAMPLE_CACHE_SIZE:
+                    self._downsampled.popitem(last=False)
+        return kept
+
+    def frame(self, columns=None, rows=slice(None)):
+        """
+        DataFrame view of the requested columns and rows, with dates as strings
+        (the format the API has always returned).
+        """
+        columns = list(self.columns) if columns is None else columns
+        data = {}
+        for column in columns:
+            if column == self.date_column:
+                data[column] = self.date_strings[rows]
+            else:
+                data[column] = self.columns[column][rows]
+        return pd.DataFrame(data, copy=False)
+
+    def records(self, columns=None, rows=slice(None)):
+        """List of row dicts, as produced by ``df.to_dict(orient='records')``."""
+        return self.frame(columns, rows).to_dict(orient='records')
+
+
+class DataStore:
+    """
+    Process-wide cache of datasets loaded from CSV files or from binary
+    columnar stores (directories written by ``src/columnar_store.py``, which
+    are memory-mapped rather than parsed).
+
+    Each dataset is loaded once and kept in memory. On every access the file's
+    mtime and size are checked (one ``stat`` call); when they change the file
+    is re-read, and if its content hash differs a new ``Dataset`` replaces the
+    old one in a single reference swap, so concurrent requests always see
+    either the old or the new snapshot, never a half-loaded one.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path, date_column=None):
+        """
+        Declare a dataset; it is loaded lazily on first access.
+
+        Args:
+            name (str): Dataset name.
+            path (str or list of str): CSV file or columnar store directory, or
+                several candidates of which the first existing one is used.
+            date_column (str, optional): Column parsed as dates.
+        """
+        self._sources[name] = ([path] if isinstance(path, str) else list(path), date_column)
+
+    def get(self, name):
+        """
+        Current snapshot of a registered dataset, reloading it if the file changed.
+
+        Raises:
+            KeyError: If ``name`` was never registered.
+            FileNotFoundError: If the file does not exist.
+        """
+        paths, date_column = self._sources[name]
+        path = next((p for p in paths if os.path.exists(p)), paths[-1])
+        columnar = os.path.isdir(path)
+        stat = os.stat(os.path.join(path, 'meta.json') if columnar else path)
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+            if columnar:
+                dataset = _load_columnar(name, path, date_column)
+                self._entries[name] = (signature, dataset)
+                return dataset
+            with open(path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha1(content).hexdigest()
+            if entry is not None and entry[1].version == digest:
+                dataset = entry[1]
+            else:
+                dataset = _parse_csv(name, path, date_column, digest)
+            self._entries[name] = (signature, dataset)
+            return dataset
+
+
+def _to_datetime64(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp is pd.NaT:
+        raise ValueError(f"Invalid date: {value!r}")
+    return np.datetime64(timestamp, 'ns')
+
+
+def _load_columnar(name, path, date_column):
+    """Memory-map a columnar store; its content version comes from its metadata."""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from src.columnar_store import load_columnar_arrays
+
+    arrays, meta = load_columnar_arrays(path)
+    if date_column is not None and date_column != meta['index']:
+        raise ValueError(f"Columnar store {path} is indexed by '{meta['index']}', not '{date_column}'")
+    return Dataset(name, arrays, meta['index'], meta['version'], path)
+
+
+def _parse_csv(name, path, date_column, version):
+    """Parse a CSV into typed columns: datetime64[ns] dates, numeric arrays, objects otherwise."""
+    df = pd.read_csv(path, parse_dates=[date_column] if date_column else False)
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column == date_column:
+            columns[column] = np.asarray(values, dtype='datetime64[ns]')
+        elif pd.api.types.is_float_dtype(values):
+            columns[column] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        elif pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+            columns[column] = values.to_numpy()
+        else:
+            columns[column] = values.to_numpy(dtype=object)
+    return Dataset(name, columns, date_column, version, path)
+
+
+store = DataStore()
+store.register('prices', [os.path.join('data', 'brent_clean'), os.path.join('data', 'brent_clean.csv')],
+               date_column='Date')
+store.register('events', os.path.join('data', 'event_data.csv'), date_column='Date')
+store.register('change_points', os.path.join('data', 'change_points.csv'))
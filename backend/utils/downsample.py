@@ -0,0 +1,106 @@
+# backend/utils/downsample.py
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013).
+
+    Keeps the first and last points and, from each of ``n_out - 2`` equal
+    buckets in between, the point forming the largest triangle with the point
+    kept from the previous bucket and the mean of the next bucket. Each bucket
+    is evaluated with vectorized NumPy; only the walk over buckets, which
+    depends on the previous choice, is a Python loop.
+
+    Args:
+        x (np.ndarray): Monotonic x coordinates (e.g. dates as int64 ns).
+        y (np.ndarray): Values; NaNs are never preferred over finite points.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted positions of the kept points.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_out = max(n_out, 3)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    # Means of every bucket, for the "next bucket" vertex of each triangle
+    valid = ~np.isnan(y)
+    counts = np.add.reduceat(valid[:-1], edges[:-1])
+    sums = np.add.reduceat(np.where(valid, y, 0.0)[:-1], edges[:-1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_y = np.append(sums / counts, y[-1])
+    mean_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / np.diff(edges), x[-1])
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (mean_y[i + 1] - y[a]))
+        area = np.where(np.isnan(area), -1.0, area)
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def min_max(y, n_out):
+    """
+    Per-bucket extremes: split the series into ``n_out // 2`` equal buckets and
+    keep the minimum and maximum of each, so spikes survive at any zoom level.
+
+    Args:
+        y (np.ndarray): Values; all-NaN buckets keep their first point.
+        n_out (int): Upper bound on the number of points kept.
+
+    Returns:
+        np.ndarray: Sorted, unique positions of the kept points.
+    """
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    kept = np.unique(np.concatenate((lows, highs)))
+    return kept[kept < n]
+
+
+def downsample(x, columns, max_points, method='lttb'):
+    """
+    Positions of at most ``max_points`` rows that preserve the shape of every
+    series in ``columns``: each column gets an equal share of the budget and
+    the positions selected for all of them are merged.
+
+    Args:
+        x (np.ndarray): Shared x coordinates.
+        columns (list of np.ndarray): Series to preserve.
+        max_points (int): Maximum number of rows returned.
+        method (str): ``'lttb'`` or ``'minmax'``.
+
+    Returns:
+        np.ndarray: Sorted row positions.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}', expected one of {METHODS}")
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    share = max(max_points // max(len(columns), 1), 2)
+    if method == 'lttb':
+        picks = [lttb(x, y, share) for y in columns]
+    else:
+        picks = [min_max(y, share) for y in columns]
+    return np.unique(np.concatenate(picks)) if picks else np.arange(n)
@@ -0,0 +1,319 @@
+# backend/utils/jobs.py
+import hashlib
+import io
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENGINES = ('exact', 'pymc3')
+# Sampling modes of the pymc3 engine, as in src/change_point_model.py
+MODES = ('nuts', 'advi', 'smc')
+
+# Settings a job may override, with their defaults and types
+JOB_DEFAULTS = {
+    'column': 'daily_return',
+    'start': None,
+    'end': None,
+    'engine': 'exact',
+    'mode': 'nuts',
+    'draws': 2000,
+    'tune': 2000,
+    'chains': 4,
+    'time_budget_seconds': None,
+    'random_seed': None,
+}
+_INT_SETTINGS = ('draws', 'tune', 'chains', 'random_seed')
+
+# Number of most probable change dates kept in a job result
+TOP_CHANGE_DATES = 20
+
+
+class JobManager:
+    """
+    Runs change point analyses submitted through the API on a bounded
+    process pool, outside the Flask request threads.
+
+    A job is identified by a hash of its settings and the version of the
+    dataset it runs on, so identical submissions share one job. Each job
+    has a small status file (state, progress, message) that the worker
+    updates as it goes, and a result file once it finishes; both are
+    written atomically under ``directory``, so finished results survive
+    restarts and are served without recomputation.
+
+    Args:
+        directory (str): Where status and result files are kept.
+        max_workers (int, optional): Pool size. Defaults to the
+            ``CHANGE_POINT_JOB_WORKERS`` environment variable, or 2.
+    """
+
+    def __init__(self, directory, max_workers=None):
+        self.directory = directory
+        self.max_workers = int(max_workers or os.environ.get('CHANGE_POINT_JOB_WORKERS', 2))
+        self._pool = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, settings, data_path, data_version):
+        """
+        Queue a job, or return the existing one for identical settings and data.
+
+        Args:
+            settings (dict): Overrides of ``JOB_DEFAULTS``.
+            data_path (str): Processed data the job runs on: a CSV with a
+                ``Date`` column or a columnar store directory.
+            data_version (str): Version of that data (as ``Dataset.version``);
+                the job fails if the data no longer has it when it starts.
+
+        Returns:
+            dict: The job's status.
+
+        Raises:
+            ValueError: For unknown or invalid settings.
+        """
+        params = _validate(settings)
+        job_id = _job_id(params, data_version)
+        with self._lock:
+            status = self.status(job_id)
+            if status is not None and (status['state'] == 'done' or job_id in self._futures):
+                return status
+            status = {'job_id': job_id, 'state': 'queued', 'progress': 0.0,
+                      'message': 'Waiting for a worker', 'params': params,
+                      'data_version': data_version, 'submitted_at': time.time()}
+            os.makedirs(self.directory, exist_ok=True)
+            _write_json(self._status_path(job_id), status)
+            args = (_run_job, job_id, data_path, data_version, params, self.directory)
+            try:
+                future = self._executor().submit(*args)
+            except BrokenProcessPool:
+                # A worker died abruptly (e.g. killed for using too much memory); its jobs
+                # have failed, but later ones get a fresh pool
+                self._pool.shutdown(wait=False)
+                self._pool = None
+                future = self._executor().submit(*args)
+            self._futures[job_id] = future
+        # Outside the lock: a future that is already done runs the callback inline
+        future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, f))
+        return status
+
+    def status(self, job_id):
+        """Status dict of a job, or None if it is unknown (or was interrupted by a restart)."""
+        status = _read_json(self._status_path(job_id))
+        if status is None:
+            return None
+        if status['state'] in ('queued', 'running') and job_id not in self._futures:
+            return None
+        return status
+
+    def result(self, job_id):
+        """Result dict of a finished job, or None."""
+        return _read_json(self._result_path(job_id))
+
+    def _finished(self, job_id, future):
+        error = future.exception()
+        if error is not None:
+            status = _read_json(self._status_path(job_id)) or {'job_id': job_id}
+            status.update({'state': 'failed', 'message': f"{type(error).__name__}: {error}"})
+            _write_json(self._status_path(job_id), status)
+        else:
+            # Stage timings and draw rates recorded in the worker
+            from src.instrumentation import REGISTRY
+            REGISTRY.merge(future.result())
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=mp.get_context('spawn'))
+        return self._pool
+
+    def _status_path(self, job_id):
+        return os.path.join(self.directory, f"{_safe_id(job_id)}.status.json")
+
+    def _result_path(self, job_id):
+        return os.path.join(self.directory, f"{_safe_id(job_id)}.result.json")
+
+
+def _validate(settings):
+    if not isinstance(settings, dict):
+        raise ValueError("Job settings must be a JSON object")
+    unknown = set(settings) - set(JOB_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown job settings: {sorted(unknown)}")
+    params = dict(JOB_DEFAULTS, **settings)
+    if not isinstance(params['column'], str):
+        raise ValueError("column must be a string")
+    if params['engine'] not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}")
+    if params['mode'] not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    bounds = {}
+    for name in ('start', 'end'):
+        if params[name] is not None:
+            bounds[name] = _parse_date(name, params[name])
+    if len(bounds) == 2 and bounds['start'] > bounds['end']:
+        raise ValueError("start must not be after end")
+    for name in _INT_SETTINGS:
+        if params[name] is not None:
+            try:
+                params[name] = int(params[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be an integer")
+    if params['time_budget_seconds'] is not None:
+        try:
+            budget = float(params['time_budget_seconds'])
+        except (TypeError, ValueError):
+            budget = math.nan
+        if not math.isfinite(budget) or budget <= 0:
+            raise ValueError("time_budget_seconds must be a positive number")
+        params['time_budget_seconds'] = budget
+    return params
+
+
+def _parse_date(name, value):
+    import pandas as pd
+
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        timestamp = pd.NaT
+    if timestamp is pd.NaT:
+        raise ValueError(f"{name} must be a date, got {value!r}")
+    return timestamp
+
+
+def _job_id(params, data_version):
+    payload = json.dumps({'params': params, 'data_version': data_version}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _safe_id(job_id):
+    if not all(c in '0123456789abcdef' for c in job_id):
+        raise ValueError(f"Invalid job id: {job_id!r}")
+    return job_id
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_data(data_path, data_version):
+    """
+    Load the processed data a job was submitted for, from a CSV or a columnar
+    store, checking its content version in the same read.
+
+    Raises:
+        ValueError: If the data changed since the job was submitted.
+    """
+    import pandas as pd
+
+    if os.path.isdir(data_path):
+        from src.columnar_store import load_columnar_arrays
+        arrays, meta = load_columnar_arrays(data_path)
+        version = meta['version']
+        index = pd.DatetimeIndex(arrays.pop(meta['index']), name=meta['index'])
+        df = pd.DataFrame(arrays, index=index, copy=False)
+    else:
+        with open(data_path, 'rb') as f:
+            content = f.read()
+        # Same content hash as the backend's data store
+        version = hashlib.sha1(content).hexdigest()
+        df = pd.read_csv(io.BytesIO(content), parse_dates=['Date']).set_index('Date')
+    if version != data_version:
+        raise ValueError(f"{data_path} changed since the job was submitted "
+                         f"(version {data_version}, now {version}); submit it again")
+    return df.sort_index()
+
+
+def _run_job(job_id, data_path, data_version, params, directory):
+    """
+    Worker side: load the window, run the analysis and persist a JSON summary.
+    Returns the metrics the job recorded, for the parent's registry.
+    """
+    import numpy as np
+
+    status_path = os.path.join(directory, f"{job_id}.status.json")
+    status = _read_json(status_path) or {'job_id': job_id, 'params': params}
+
+    def report(state, progress, message):
+        status.update({'state': state, 'progress': progress, 'message': message})
+        _write_json(status_path, status)
+
+    report('running', 0.05, 'Loading data')
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from src.change_point_model import run_change_point_analysis
+    from src.instrumentation import REGISTRY
+
+    started = time.perf_counter()
+    try:
+        df = _load_data(data_path, data_version)
+        df = df.loc[params['start']:params['end']]
+        series = df[params['column']].dropna()
+        report('running', 0.2, f"Running {params['engine']} analysis on {len(series)} observations")
+        trace, model = run_change_point_analysis(
+            df, params['column'], engine=params['engine'], mode=params['mode'],
+            draws=params['draws'], tune=params['tune'], chains=params['chains'],
+            time_budget_seconds=params['time_budget_seconds'],
+            random_seed=params['random_seed'], cores=1)
+
+        report('running', 0.9, 'Summarizing posterior')
+        posterior = trace.posterior
+        if isinstance(model, dict) and 'tau_probs' in model:
+            # Exact engine: the posterior itself rather than frequencies of its draws
+            probability = np.asarray(model['tau_probs'])
+            means = model['moments']['mean']
+        else:
+            tau = posterior['tau'].values.ravel().astype(np.int64)
+            probability = np.bincount(tau, minlength=len(series)) / len(tau)
+            means = {name: posterior[name].mean() for name in ('mu1', 'mu2', 'sigma')}
+        top = np.argsort(probability)[::-1][:TOP_CHANGE_DATES]
+        top = top[probability[top] > 0]
+        dates = series.index
+        result = {
+            'job_id': job_id,
+            'params': params,
+            'n': len(series),
+            'start': str(dates.min().date()),
+            'end': str(dates.max().date()),
+            # tau is the last day of the old regime; report the first day of the new one
+            'change_dates': [{'change_date': str(dates[i + 1].date()) if i + 1 < len(dates) else None,
+                              'probability': float(probability[i])} for i in top],
+            'mu1': float(means['mu1']),
+            'mu2': float(means['mu2']),
+            'sigma': float(means['sigma']),
+            'diagnostics': {k: v for k, v in posterior.attrs.items()
+                            if isinstance(v, (int, float, str, bool))},
+            'seconds': time.perf_counter() - started,
+        }
+    except Exception as e:
+        report('failed', 1.0, f"{type(e).__name__}: {e}")
+        return REGISTRY.snapshot(reset=True)
+
+    _write_json(os.path.join(directory, f"{job_id}.result.json"), result)
+    report('done', 1.0, f"Finished in {result['seconds']:.1f}s")
+    return REGISTRY.snapshot(reset=True)
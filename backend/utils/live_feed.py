@@ -0,0 +1,152 @@
+# backend/utils/live_feed.py
+import json
+import queue
+import sys
+import threading
+
+import numpy as np
+
+from utils.jobs import PROJECT_ROOT
+
+# Window of the rolling volatility, as in src/data_processing.py
+VOLATILITY_WINDOW = 30
+
+
+class LiveFeed:
+    """
+    Pushes updates of the price dataset to any number of streaming clients.
+
+    One background thread watches the resident dataset. When new rows appear
+    it computes, once, each row's daily return, 30-day rolling volatility and
+    the Bayesian online change point probability (the posterior probability
+    that a new regime started within the last ``recent_days`` observations),
+    serializes the update once and hands the same bytes to every client.
+
+    Each client has a bounded queue. A client that falls ``max_queue``
+    messages behind has its backlog dropped and receives a single ``reset``
+    event telling it to refetch, so a slow dashboard never holds memory or
+    slows down the others.
+
+    Args:
+        store (DataStore): Source of the ``prices`` dataset.
+        poll_interval (float): Seconds between dataset checks.
+        recent_days (int): Window of the reported change point probability.
+        max_queue (int): Per-client backlog bound.
+    """
+
+    def __init__(self, store, poll_interval=1.0, recent_days=5, max_queue=100):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.recent_days = recent_days
+        self.max_queue = max_queue
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._detector = None
+        self._last_date = None
+        self._latest = None
+
+    def subscribe(self):
+        """Register a client; returns its queue of ``(event, data)`` messages."""
+        client = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._clients.add(client)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+                self._thread.start()
+            if self._latest is not None:
+                client.put_nowait(('update', self._latest))
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._poll()
+            except Exception as e:  # keep the feed alive across bad reloads
+                self._broadcast('error', json.dumps({'error': str(e)}))
+            self._stop.wait(self.poll_interval)
+
+    def _poll(self):
+        prices = self.store.get('prices')
+        dates = prices.columns[prices.date_column]
+        if self._detector is None:
+            self._warm_up(prices)
+            return
+        first_new = int(np.searchsorted(dates, self._last_date, side='right'))
+        for i in range(first_new, len(dates)):
+            update = self._advance(prices, i)
+            if update is not None:
+                self._latest = json.dumps(update)
+                self._broadcast('update', self._latest)
+
+    def _warm_up(self, prices):
+        """Run the detector over the history once, so the first live update is meaningful."""
+        if PROJECT_ROOT not in sys.path:
+            sys.path.insert(0, PROJECT_ROOT)
+        from src.bayesian_segmentation import default_prior
+        from src.online_change_point import BayesianOnlineChangePointDetector
+
+        returns = _daily_returns(prices.columns['Price'])
+        finite = returns[np.isfinite(returns)]
+        prior = default_prior(finite) if len(finite) > 1 else {}
+        self._detector = BayesianOnlineChangePointDetector(recent_window=self.recent_days, **prior)
+        update = None
+        for i in range(len(returns)):
+            update = self._advance(prices, i, returns) or update
+        self._last_date = prices.columns[prices.date_column][-1] if len(prices) else None
+        if update is not None:
+            self._latest = json.dumps(update)
+            self._broadcast('update', self._latest)
+
+    def _advance(self, prices, i, returns=None):
+        """Feed row ``i`` to the detector and build its update message."""
+        self._last_date = prices.columns[prices.date_column][i]
+        price = prices.columns['Price']
+        if returns is None:
+            returns = _daily_returns(price[max(i - VOLATILITY_WINDOW, 0):i + 1])
+            offset = i - len(returns) + 1
+        else:
+            offset = 0
+        daily_return = returns[i - offset]
+        if not np.isfinite(daily_return):
+            return None
+        state = self._detector.update(daily_return)
+        window = returns[max(i - offset - VOLATILITY_WINDOW + 1, 0):i - offset + 1]
+        window = window[np.isfinite(window)]
+        volatility = float(np.std(window, ddof=1)) if len(window) == VOLATILITY_WINDOW else None
+        return {
+            'Date': prices.date_strings[i],
+            'Price': float(price[i]),
+            'daily_return': float(daily_return),
+            'volatility': volatility,
+            'changepoint_probability': state['changepoint_probability'],
+            'map_run_length': state['map_run_length'],
+        }
+
+    def _broadcast(self, event, data):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.put_nowait((event, data))
+            except queue.Full:
+                # Backpressure: drop this client's backlog and ask it to resync
+                with client.mutex:
+                    client.queue.clear()
+                client.put_nowait(('reset', json.dumps({'reason': 'client too slow'})))
+
+
+def _daily_returns(price):
+    """Percentage change, as ``calculate_daily_returns`` computes it (NaN first)."""
+    price = np.asarray(price, dtype=float)
+    returns = np.full(len(price), np.nan)
+    returns[1:] = (price[1:] / price[:-1] - 1.0) * 100
+    return returns
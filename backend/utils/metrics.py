@@ -0,0 +1,103 @@
+# backend/utils/metrics.py
+import contextlib
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+
+from utils.jobs import PROJECT_ROOT
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from src.instrumentation import REGISTRY
+
+# Directory of per-request cProfile dumps. Profiling is off unless it is set;
+# then a request opts in with ?profile=1 or an ``X-Profile: 1`` header.
+PROFILE_DIR_ENV = 'API_PROFILE_DIR'
+
+REGISTRY.histogram('http_request_duration_seconds', "Latency of API requests.")
+REGISTRY.histogram('http_request_stage_seconds',
+                   "Time API requests spend loading, filtering and serializing data.")
+REGISTRY.counter('http_requests_total', "API requests by route, method and status.")
+
+# One request is profiled at a time (from Python 3.12 only one profiler may be active);
+# concurrent opt-ins run unprofiled
+_profile_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def request_stage(name):
+    """
+    Time a block, or every call of a decorated function, as stage ``name``
+    of the current request. Durations of one stage add up over the request;
+    outside a request nothing is recorded.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            stages = g.setdefault('stage_seconds', {})
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def init_app(app):
+    """Time every request of ``app`` and serve the metrics at ``/api/metrics``."""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_stop_profiler)
+    app.add_url_rule('/api/metrics', 'metrics', metrics, methods=['GET'])
+
+
+def metrics():
+    """Latency histograms and counters of the API and pipeline, in Prometheus text format."""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.stage_seconds = {}
+    directory = os.environ.get(PROFILE_DIR_ENV)
+    if directory and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'):
+        if _profile_lock.acquire(blocking=False):
+            endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', request.endpoint or 'unmatched')
+            filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-{time.time_ns() % 10**9}.prof"
+            g.profile_path = os.path.join(directory, filename)
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+
+def _finish_request(response):
+    seconds = time.perf_counter() - g.get('request_started', time.perf_counter())
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    labels = {'route': route, 'method': request.method}
+    REGISTRY.observe('http_request_duration_seconds', seconds, **labels)
+    REGISTRY.inc('http_requests_total', status=response.status_code, **labels)
+    timings = []
+    for name, stage_seconds in g.get('stage_seconds', {}).items():
+        REGISTRY.observe('http_request_stage_seconds', stage_seconds, route=route, stage=name)
+        timings.append(f"{name};dur={stage_seconds * 1000:.2f}")
+    timings.append(f"total;dur={seconds * 1000:.2f}")
+    # Shown per request in the browser developer tools
+    response.headers['Server-Timing'] = ', '.join(timings)
+    if g.get('profiler') is not None:
+        _stop_profiler()
+        response.headers['X-Profile-File'] = os.path.abspath(g.profile_path)
+    return response
+
+
+def _stop_profiler(error=None):
+    """Disable the request's profiler, if any, and dump its statistics (readable with pstats)."""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+    try:
+        profiler.disable()
+        os.makedirs(os.path.dirname(g.profile_path) or '.', exist_ok=True)
+        profiler.dump_stats(g.profile_path)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,157 @@
+# backend/utils/responses.py
+import gzip
+import hashlib
+import io
+import json
+
+import numpy as np
+from flask import Response, request
+
+from utils.metrics import request_stage
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Response formats selectable with ?format= or the Accept header
+FORMATS = {
+    'records': 'application/json',
+    'columns': 'application/json',
+    'npz': 'application/x-npz',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+
+class NotAcceptable(Exception):
+    """The requested response format cannot be produced."""
+
+
+@request_stage('serialize')
+def dataset_response(dataset, columns=None, rows=slice(None)):
+    """
+    Serialize a slice of a ``Dataset`` for the current request.
+
+    The format comes from ``?format=`` (``records``, ``columns``, ``npz`` or
+    ``arrow``) or, failing that, the Accept header; the default stays
+    ``records`` for existing clients. The ETag is derived from the dataset
+    version and the query string, so an unchanged dataset answers a matching
+    ``If-None-Match`` with 304 before anything is serialized. Bodies are
+    compressed with brotli or gzip according to Accept-Encoding.
+
+    Args:
+        dataset (Dataset): Snapshot from the data store.
+        columns (list of str, optional): Columns to include. Defaults to all.
+        rows (slice or np.ndarray): Row selector.
+
+    Returns:
+        flask.Response
+
+    Raises:
+        NotAcceptable: If the format is unknown or its library is not installed.
+    """
+    fmt = _response_format()
+    columns = list(dataset.columns) if columns is None else list(columns)
+    etag = _etag(dataset, fmt)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        body = _SERIALIZERS[fmt](dataset, columns, rows)
+        response = Response(body, mimetype=FORMATS[fmt])
+        _compress(response)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+
+def _response_format():
+    fmt = request.args.get('format')
+    if fmt is None:
+        best = request.accept_mimetypes.best_match(
+            ['application/json', FORMATS['arrow'], FORMATS['npz']], default='application/json')
+        fmt = {FORMATS['arrow']: 'arrow', FORMATS['npz']: 'npz'}.get(best, 'records')
+    if fmt not in FORMATS:
+        raise NotAcceptable(f"Unknown format '{fmt}', expected one of {tuple(FORMATS)}")
+    return fmt
+
+
+def _etag(dataset, fmt):
+    digest = hashlib.sha1(dataset.version.encode())
+    digest.update(fmt.encode())
+    digest.update(request.query_string)
+    return digest.hexdigest()
+
+
+def _columns(dataset, columns, rows):
+    """JSON-ready column arrays: date strings, and None in place of NaN."""
+    data = {}
+    for column in columns:
+        if column == dataset.date_column:
+            data[column] = dataset.date_strings[rows].tolist()
+            continue
+        values = dataset.columns[column][rows]
+        missing = np.isnan(values) if values.dtype.kind == 'f' else None
+        if missing is not None and missing.any():
+            values = values.astype(object)
+            values[missing] = None
+        data[column] = values.tolist()
+    return data
+
+
+def _records_body(dataset, columns, rows):
+    return json.dumps(dataset.records(columns, rows))
+
+
+def _columns_body(dataset, columns, rows):
+    return json.dumps(_columns(dataset, columns, rows), allow_nan=False)
+
+
+def _typed_columns(dataset, columns, rows):
+    data = {}
+    for column in columns:
+        values = dataset.columns[column][rows]
+        data[column] = values.astype(str) if values.dtype == object else values
+    return data
+
+
+def _npz_body(dataset, columns, rows):
+    buffer = io.BytesIO()
+    np.savez(buffer, **_typed_columns(dataset, columns, rows))
+    return buffer.getvalue()
+
+
+def _arrow_body(dataset, columns, rows):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise NotAcceptable("Arrow responses require pyarrow to be installed")
+    table = pa.table(_typed_columns(dataset, columns, rows))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+_SERIALIZERS = {
+    'records': _records_body,
+    'columns': _columns_body,
+    'npz': _npz_body,
+    'arrow': _arrow_body,
+}
+
+
+def _compress(response):
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_BYTES:
+        return
+    encodings = request.accept_encodings
+    if brotli is not None and encodings['br']:
+        response.set_data(brotli.compress(body, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif encodings['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
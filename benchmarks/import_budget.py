@@ -0,0 +1,168 @@
+# benchmarks/import_budget.py
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARKS_DIR)
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'backend')
+
+# Libraries that take seconds to import and are only needed for plotting,
+# statistical tests or PyMC3 inference: no module may load them at import.
+HEAVY_MODULES = ('pymc3', 'theano', 'arviz', 'matplotlib', 'seaborn', 'statsmodels')
+
+# Seconds an import may add to the cost of importing numpy and pandas
+DEFAULT_BUDGET = 0.5
+
+# Imported in a fresh interpreter, after numpy and pandas so that their cost
+# (paid by every entry point anyway) is not counted against the module
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {cwd!r})
+import numpy, pandas
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds,
+                  'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def import_targets():
+    """
+    Modules whose import is checked, with the directory they are imported
+    from: every module of ``src`` and the backend app.
+
+    Returns:
+        list of tuple: (module name, working directory).
+    """
+    src_dir = os.path.join(PROJECT_ROOT, 'src')
+    targets = [(f"src.{name[:-3]}", PROJECT_ROOT) for name in sorted(os.listdir(src_dir))
+               if name.endswith('.py') and name != '__init__.py']
+    targets.append(('app', BACKEND_DIR))
+    return targets
+
+
+def measure_import(module, cwd, repeat=3):
+    """
+    Time importing ``module`` in fresh interpreters.
+
+    Args:
+        module (str): Module to import.
+        cwd (str): Working directory (also put first on ``sys.path``).
+        repeat (int): Interpreters started; the fastest import is kept.
+
+    Returns:
+        dict: ``seconds`` (fastest import) and ``loaded`` (heavy modules it imported).
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    code = _PROBE.format(cwd=cwd, module=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True,
+                                   text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run['seconds'])
+
+
+def slowest_imports(module, cwd, n=8):
+    """
+    The ``n`` modules with the largest cumulative import time (their own and
+    their imports') when importing ``module`` after numpy and pandas, from
+    ``python -X importtime``.
+
+    Returns:
+        list of tuple: (seconds, module name), slowest first.
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                f"import numpy, pandas; import {module}"],
+                               cwd=cwd, capture_output=True, text=True)
+    entries = []
+    after_baseline = False
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if name == 'pandas':
+            after_baseline = True
+        elif after_baseline and cumulative.strip().isdigit():
+            # The module itself and its parent packages include everything else
+            if not (module == name or module.startswith(f"{name}.")):
+                entries.append((int(cumulative) / 1e6, name))
+    return sorted(entries, reverse=True)[:n]
+
+
+def check_import_budget(budget=DEFAULT_BUDGET, repeat=3, names=None):
+    """
+    Check that no module imports a heavy library and that each import stays
+    within ``budget`` seconds.
+
+    Args:
+        budget (float): Seconds an import may add to numpy and pandas.
+        repeat (int): Interpreters started per module.
+        names (sequence of str, optional): Only check these modules.
+
+    Returns:
+        list of dict: One row per module with ``seconds``, ``loaded`` and a
+        ``status`` of 'ok', 'heavy', 'slow' or 'error'.
+    """
+    rows = []
+    for module, cwd in import_targets():
+        if names and module not in names:
+            continue
+        row = {'module': module}
+        try:
+            row.update(measure_import(module, cwd, repeat))
+        except RuntimeError as e:
+            row.update({'status': 'error', 'error': str(e)})
+            rows.append(row)
+            continue
+        if row['loaded']:
+            row['status'] = 'heavy'
+        elif row['seconds'] > budget:
+            row['status'] = 'slow'
+        else:
+            row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that importing src modules and the backend stays cheap: no "
+                    "plotting, statistics or inference libraries at import, and a time budget")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help="seconds an import may add to numpy and pandas (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3, help="interpreters started per module")
+    parser.add_argument('--only', nargs='+', metavar='MODULE', help="only check these modules")
+    args = parser.parse_args(argv)
+
+    rows = check_import_budget(args.budget, args.repeat, args.only)
+    failures = [row for row in rows if row['status'] != 'ok']
+    for row in rows:
+        if row['status'] == 'error':
+            print(f"  {row['module']:<42} FAILED: {row['error']}")
+            continue
+        loaded = f"  loads {', '.join(row['loaded'])}" if row['loaded'] else ''
+        print(f"  {row['module']:<42} {row['seconds'] * 1000:8.1f} ms  {row['status']}{loaded}")
+    for row in failures:
+        if row['status'] in ('heavy', 'slow'):
+            cwd = BACKEND_DIR if row['module'] == 'app' else PROJECT_ROOT
+            print(f"\nSlowest imports of {row['module']}:")
+            for seconds, name in slowest_imports(row['module'], cwd):
+                print(f"  {name:<52} {seconds * 1000:8.1f} ms")
+    print(f"\n{len(failures)} module(s) over the import budget of {args.budget:.2f}s "
+          f"or loading {', '.join(HEAVY_MODULES)}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .suite import BENCHMARKS, GROUPS, PROJECT_ROOT, SyntheticData
+except ImportError:
+    from suite import BENCHMARKS, GROUPS, PROJECT_ROOT, SyntheticData
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_DATA_DIR = os.path.join(BENCHMARKS_DIR, 'data')
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+# A benchmark is flagged when its median is this much slower than the baseline...
+DEFAULT_TOLERANCE = 0.25
+# ...and slower by at least this many seconds (below that, timer noise dominates).
+MIN_REGRESSION_SECONDS = 0.005
+
+# Runs slower than this are not repeated.
+SLOW_RUN_SECONDS = 10.0
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, groups=GROUPS, names=None, repeat=5,
+                   data_dir=DEFAULT_DATA_DIR, seed=0):
+    """
+    Time every selected benchmark at every size.
+
+    Each benchmark is set up once per size and timed ``repeat`` times (once if
+    a run takes more than ``SLOW_RUN_SECONDS``), with the output of the
+    pipeline functions silenced.
+
+    Args:
+        sizes (sequence of int): Series lengths.
+        groups (sequence of str): Benchmark groups to run.
+        names (sequence of str, optional): Only run these benchmarks.
+        repeat (int): Timed runs per benchmark and size.
+        data_dir (str): Cache directory of the generated input files.
+        seed (int): Seed of the synthetic series.
+
+    Returns:
+        dict: ``meta`` (environment and the selection run) and ``results``, one
+        entry per benchmark and size with min/median/mean seconds, or the
+        reason it was skipped or the error it raised.
+    """
+    selected = [b for b in BENCHMARKS if b['group'] in groups and (not names or b['name'] in names)]
+    cwd = os.getcwd()
+    results = []
+    try:
+        for n_rows in sizes:
+            print(f"\n=== {n_rows:,} rows ===")
+            data = SyntheticData(n_rows, data_dir, seed)
+            for spec in selected:
+                results.append(_run_one(spec, data, repeat))
+                _print_result(results[-1])
+    finally:
+        os.chdir(cwd)
+    meta = dict(_environment(seed), selection={'sizes': list(sizes), 'groups': list(groups),
+                                               'names': list(names) if names else None})
+    return {'meta': meta, 'results': results}
+
+
+def _run_one(spec, data, repeat):
+    result = {'key': f"{spec['group']}/{spec['name']}/{data.n_rows}", 'group': spec['group'],
+              'name': spec['name'], 'n_rows': data.n_rows}
+    if spec['max_rows'] is not None and data.n_rows > spec['max_rows']:
+        result['skipped'] = f"above max_rows={spec['max_rows']}"
+        return result
+    times = []
+    try:
+        with _quiet():
+            run = spec['setup'](data)
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - started)
+                if times[-1] > SLOW_RUN_SECONDS:
+                    break
+    except ImportError as e:
+        result['skipped'] = f"{type(e).__name__}: {e}"
+        return result
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        return result
+    result.update({'repeats': len(times), 'min': min(times), 'median': float(np.median(times)),
+                   'mean': float(np.mean(times)), 'rows_per_second': data.n_rows / min(times)})
+    return result
+
+
+@contextlib.contextmanager
+def _quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _print_result(result):
+    label = f"  {result['group']:<10} {result['name']:<28}"
+    if 'median' in result:
+        print(f"{label} {result['median'] * 1000:10.2f} ms (min {result['min'] * 1000:.2f}, "
+              f"{result['repeats']} runs)")
+    else:
+        print(f"{label} {'skipped' if 'skipped' in result else 'FAILED'}: "
+              f"{result.get('skipped') or result.get('error')}")
+
+
+def _environment(seed):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare median timings with a baseline report.
+
+    Benchmarks timed in the baseline that did not produce a timing in this run
+    are reported too, so that one that breaks or disappears does not silently
+    drop out of the comparison.
+
+    Args:
+        report (dict): Output of ``run_benchmarks``.
+        baseline (dict): An earlier report.
+        tolerance (float): Relative slowdown tolerated before flagging a regression.
+
+    Returns:
+        list of dict: One row per benchmark timed in both reports, with both
+        medians, their ratio and a ``status`` of 'regression', 'faster' or 'ok';
+        one per benchmark that failed in this run ('error'); and one per
+        benchmark timed in the baseline that this run skipped ('skipped', e.g.
+        a missing dependency) or did not run although it was selected
+        ('missing', e.g. removed or renamed). The timing fields of these rows
+        are None.
+    """
+    previous = {r['key']: r for r in baseline['results'] if 'median' in r}
+    rows = []
+    for result in report['results']:
+        base = previous.get(result['key'])
+        if 'error' in result:
+            rows.append(_untimed_row(result['key'], base, 'error', result['error']))
+            continue
+        if base is None:
+            continue
+        if 'median' not in result:
+            rows.append(_untimed_row(result['key'], base, 'skipped', result['skipped']))
+            continue
+        ratio = result['median'] / base['median']
+        slower = result['median'] - base['median']
+        if ratio > 1 + tolerance and slower > MIN_REGRESSION_SECONDS:
+            status = 'regression'
+        elif ratio < 1 / (1 + tolerance):
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append({'key': result['key'], 'baseline': base['median'], 'median': result['median'],
+                     'ratio': ratio, 'status': status})
+    ran = {result['key'] for result in report['results']}
+    selection = report['meta'].get('selection')
+    for key, base in previous.items():
+        if key not in ran and _selected(base, selection):
+            rows.append(_untimed_row(key, base, 'missing', "not in this run"))
+    return rows
+
+
+def _untimed_row(key, base, status, reason):
+    return {'key': key, 'baseline': base['median'] if base else None, 'median': None,
+            'ratio': None, 'status': status, 'reason': reason}
+
+
+def _selected(result, selection):
+    """Whether a run with ``selection`` (from the report's meta) should have run ``result``."""
+    if selection is None:
+        return False
+    return (result['n_rows'] in selection['sizes'] and result['group'] in selection['groups']
+            and (not selection['names'] or result['name'] in selection['names']))
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark ingestion, features, change point engines and API endpoints "
+                    "on synthetic price series")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="series lengths (default: %(default)s)")
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="only run these benchmarks")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help="cache of generated input files")
+    parser.add_argument('--output', help="results file (default: results/<timestamp>.json)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help="report to compare against, if it exists")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+    if args.only:
+        unknown = set(args.only) - {b['name'] for b in BENCHMARKS}
+        if unknown:
+            parser.error(f"unknown benchmarks: {sorted(unknown)}")
+
+    report = run_benchmarks(args.sizes, args.groups, args.only, args.repeat, args.data_dir,
+                            args.seed)
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"{report['meta']['timestamp'].replace(':', '')}.json")
+    _write_json(output, report)
+    print(f"\nResults written to {output}")
+
+    failures = [r for r in report['results'] if 'error' in r]
+    if failures:
+        print(f"\n{len(failures)} benchmark(s) failed:")
+        for result in failures:
+            print(f"  {result['key']:<52} {result['error']}")
+    regressions = missing = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare_to_baseline(report, baseline, args.tolerance)
+        print(f"\nComparison with {args.baseline} (commit {baseline['meta'].get('commit')}):")
+        for row in rows:
+            if row['median'] is None:
+                base = '-' if row['baseline'] is None else f"{row['baseline'] * 1000:.2f}"
+                print(f"  {row['key']:<52} {base:>10} -> {'-':>10}     "
+                      f"{row['status']}: {row['reason']}")
+                continue
+            print(f"  {row['key']:<52} {row['baseline'] * 1000:10.2f} -> "
+                  f"{row['median'] * 1000:10.2f} ms  x{row['ratio']:.2f}  {row['status']}")
+        regressions = [row for row in rows if row['status'] == 'regression']
+        missing = [row for row in rows if row['status'] == 'missing']
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}, "
+              f"{len(missing)} baseline benchmark(s) missing")
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+    return 1 if failures or regressions or missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+# benchmarks/suite.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .synthetic import synthetic_events, synthetic_prices, write_raw_csv
+except ImportError:
+    from synthetic import synthetic_events, synthetic_prices, write_raw_csv
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(PROJECT_ROOT, 'backend')
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+GROUPS = ('ingestion', 'features', 'engines', 'endpoints')
+
+# Registered benchmarks, in definition order
+BENCHMARKS = []
+
+
+def benchmark(group, max_rows=None):
+    """
+    Register a benchmark. The decorated function receives a ``SyntheticData``
+    and returns the zero-argument callable that is timed, so that setup work
+    is not measured. Sizes above ``max_rows`` are skipped.
+    """
+    if group not in GROUPS:
+        raise ValueError(f"Unknown benchmark group '{group}'")
+
+    def register(setup):
+        BENCHMARKS.append({'name': setup.__name__, 'group': group, 'setup': setup,
+                           'max_rows': max_rows})
+        return setup
+    return register
+
+
+class SyntheticData:
+    """
+    Inputs shared by every benchmark of one size, built on first use: the
+    synthetic prices and their change points, the raw CSV, the processed
+    frame and a backend data directory.
+
+    Args:
+        n_rows (int): Series length.
+        data_dir (str): Where generated files are kept between runs.
+        seed (int): Random seed of the series.
+    """
+
+    def __init__(self, n_rows, data_dir, seed=0):
+        self.n_rows = n_rows
+        self.directory = os.path.join(data_dir, f"{n_rows}-{seed}")
+        self.prices, self.change_points = synthetic_prices(n_rows, seed=seed)
+        self._processed = None
+
+    @property
+    def raw_path(self):
+        return write_raw_csv(self.prices, os.path.join(self.directory, 'raw.csv'))
+
+    @property
+    def processed(self):
+        """Prices with ``daily_return`` and ``volatility``, as ``data_processing.main`` writes them."""
+        if self._processed is None:
+            from src.data_processing import calculate_daily_returns, calculate_volatility
+            self._processed = calculate_volatility(calculate_daily_returns(self.prices.copy()))
+        return self._processed
+
+    @property
+    def backend_root(self):
+        """Directory laid out like the backend's working directory (``data/*.csv``)."""
+        root = os.path.join(self.directory, 'backend')
+        data = os.path.join(root, 'data')
+        if not os.path.exists(os.path.join(data, 'brent_clean.csv')):
+            os.makedirs(data, exist_ok=True)
+            synthetic_events(self.prices, self.change_points).to_csv(
+                os.path.join(data, 'event_data.csv'), index=False, date_format='%Y-%m-%d %H:%M:%S')
+            pd.DataFrame({'Date': self.prices.index[self.change_points],
+                          'index': self.change_points}).to_csv(
+                os.path.join(data, 'change_points.csv'), index=False,
+                date_format='%Y-%m-%d %H:%M:%S')
+            tmp_path = os.path.join(data, 'brent_clean.csv.tmp')
+            self.processed.to_csv(tmp_path, date_format='%Y-%m-%d %H:%M:%S')
+            os.replace(tmp_path, os.path.join(data, 'brent_clean.csv'))
+        return root
+
+
+# --- Ingestion ---------------------------------------------------------------
+
+@benchmark('ingestion')
+def load_and_clean_data(data):
+    from src.data_processing import load_and_clean_data
+    path = data.raw_path
+    return lambda: load_and_clean_data(path)
+
+
+@benchmark('ingestion')
+def load_and_clean_data_chunked(data):
+    from src.data_processing import load_and_clean_data_chunked
+    path = data.raw_path
+    return lambda: load_and_clean_data_chunked(path, date_formats=['%Y-%m-%d %H:%M:%S'])
+
+
+@benchmark('ingestion')
+def load_columnar(data):
+    from src.columnar_store import load_columnar, save_columnar
+    directory = os.path.join(data.directory, 'columnar')
+    save_columnar(data.processed, directory)
+    # Touch every value, so that memory-mapped pages are actually read
+    return lambda: load_columnar(directory).sum()
+
+
+# --- Features ----------------------------------------------------------------
+
+@benchmark('features')
+def calculate_daily_returns(data):
+    from src.data_processing import calculate_daily_returns
+    df = data.prices.copy()
+    return lambda: calculate_daily_returns(df)
+
+
+@benchmark('features')
+def calculate_volatility(data):
+    from src.data_processing import calculate_volatility
+    df = data.processed.copy()
+    return lambda: calculate_volatility(df)
+
+
+@benchmark('features')
+def calculate_panel_features(data):
+    from src.data_processing import calculate_panel_features
+    # Four instruments sharing the rows of the series
+    n = data.n_rows // 4
+    price = data.prices['Price'].to_numpy()
+    wide = pd.DataFrame({f"instrument_{i}": price[i * n:(i + 1) * n] for i in range(4)},
+                        index=data.prices.index[:n])
+    return lambda: calculate_panel_features(wide)
+
+
+@benchmark('features', max_rows=1_000_000)
+def rolling_acf(data):
+    from src.autocorrelation import rolling_acf
+    df = data.processed
+    return lambda: rolling_acf(df, 'daily_return', nlags=20, window=252, step=5, partial=True)
+
+
+@benchmark('features', max_rows=100_000)
+def rolling_stationarity(data):
+    from src.rolling_stationarity import rolling_stationarity
+    df = data.processed
+    return lambda: rolling_stationarity(df, 'daily_return', window=252, step=5, max_workers=1)
+
+
+# --- Change point engines ----------------------------------------------------
+
+@benchmark('engines', max_rows=1_000_000)
+def exact_switch_point(data):
+    from src.change_point_model import run_change_point_analysis
+    df = data.processed
+    return lambda: run_change_point_analysis(df, 'daily_return', engine='exact', random_seed=0)
+
+
+@benchmark('engines', max_rows=10_000)
+def pymc3_switch_point(data):
+    from src.change_point_model import run_change_point_analysis
+    df = data.processed
+    return lambda: run_change_point_analysis(df, 'daily_return', engine='pymc3', draws=500,
+                                             tune=500, chains=2, cores=1, random_seed=0)
+
+
+@benchmark('engines', max_rows=100_000)
+def scan_change_points(data):
+    from src.change_point_model import scan_change_points
+    df = data.processed
+    return lambda: scan_change_points(df, 'daily_return', window=504, step=21)
+
+
+@benchmark('engines', max_rows=100_000)
+def pelt(data):
+    from src.multiple_change_points import pelt
+    returns = data.processed['daily_return'].dropna().to_numpy()
+    pen = 2 * np.log(len(returns)) * np.var(returns)
+    return lambda: pelt(returns, pen, cost='meanvar', min_size=5)
+
+
+@benchmark('engines', max_rows=1_000_000)
+def binary_segmentation(data):
+    from src.multiple_change_points import binary_segmentation
+    returns = data.processed['daily_return'].dropna().to_numpy()
+    return lambda: binary_segmentation(returns, n_bkps=len(data.change_points), cost='meanvar',
+                                       min_size=5)
+
+
+@benchmark('engines', max_rows=100_000)
+def online_bocpd(data):
+    from src.bayesian_segmentation import default_prior
+    from src.online_change_point import detect_online
+    returns = data.processed['daily_return']
+    prior = default_prior(returns.dropna().to_numpy())
+    return lambda: detect_online(returns, **prior)
+
+
+@benchmark('engines', max_rows=100_000)
+def segmentation_posterior(data):
+    from src.bayesian_segmentation import run_segmentation_posterior
+    df = data.processed
+    return lambda: run_segmentation_posterior(df, 'daily_return', max_candidates=200)
+
+
+# --- API endpoints -----------------------------------------------------------
+
+def _client(data):
+    """Flask test client of ``backend/app.py`` serving this size's data directory."""
+    os.chdir(data.backend_root)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from app import app
+    return app.test_client()
+
+
+def _endpoint(data, url, headers=None):
+    client = _client(data)
+    response = client.get(url, headers=headers)  # warm-up: loads the dataset into the store
+    if response.status_code >= 400:
+        raise RuntimeError(f"GET {url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return lambda: client.get(url, headers=headers).get_data()
+
+
+def _middle_dates(data, fraction=0.1):
+    index = data.prices.index
+    lo = int(len(index) * (0.5 - fraction / 2))
+    hi = int(len(index) * (0.5 + fraction / 2))
+    return index[lo].strftime('%Y-%m-%dT%H:%M:%S'), index[hi].strftime('%Y-%m-%dT%H:%M:%S')
+
+
+@benchmark('endpoints', max_rows=1_000_000)
+def oil_prices_records(data):
+    return _endpoint(data, '/api/oil-prices')
+
+
+@benchmark('endpoints', max_rows=1_000_000)
+def oil_prices_columns(data):
+    return _endpoint(data, '/api/oil-prices?format=columns')
+
+
+@benchmark('endpoints')
+def oil_prices_downsampled(data):
+    return _endpoint(data, '/api/oil-prices?format=columns&max_points=1000')
+
+
+@benchmark('endpoints')
+def oil_prices_not_modified(data):
+    client = _client(data)
+    etag = client.get('/api/oil-prices?format=columns&max_points=1000').headers['ETag']
+    return _endpoint(data, '/api/oil-prices?format=columns&max_points=1000',
+                     headers={'If-None-Match': etag})
+
+
+@benchmark('endpoints', max_rows=1_000_000)
+def oil_prices_filter(data):
+    start, end = _middle_dates(data)
+    return _endpoint(data, f'/api/oil-prices/filter?format=columns&start={start}&end={end}')
+
+
+@benchmark('endpoints')
+def oil_metrics_downsampled(data):
+    return _endpoint(data, '/api/oil-metrics?format=columns&max_points=1000')
+
+
+@benchmark('endpoints')
+def events(data):
+    return _endpoint(data, '/api/events')
+
+
+@benchmark('endpoints')
+def change_points(data):
+    return _endpoint(data, '/api/change-points')
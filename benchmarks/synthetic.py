@@ -0,0 +1,62 @@
+# benchmarks/synthetic.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Minute bars: 10M rows span about 19 years, within the range of datetime64[ns]
+FREQ = 'min'
+START = '2000-01-03'
+
+
+def synthetic_prices(n_rows, n_change_points=4, seed=0):
+    """
+    A price series with known regime changes.
+
+    Log returns are Gaussian within each regime; every regime draws its own
+    drift and volatility, so changes show up in both the mean and the
+    variance of returns. Change points are spread evenly with some jitter.
+
+    Args:
+        n_rows (int): Number of observations.
+        n_change_points (int): Number of regime changes.
+        seed (int): Random seed; the same arguments always give the same series.
+
+    Returns:
+        tuple: (DataFrame with a ``Price`` column indexed by ``Date``, array of
+        change point positions, i.e. the first index of each new regime)
+    """
+    rng = np.random.default_rng(seed)
+    spacing = n_rows / (n_change_points + 1)
+    jitter = rng.uniform(-0.25, 0.25, n_change_points) * spacing
+    change_points = np.sort((np.arange(1, n_change_points + 1) * spacing + jitter).astype(np.int64))
+    bounds = np.r_[0, change_points, n_rows]
+    drift = rng.normal(0.0, 2e-4, n_change_points + 1)
+    volatility = rng.uniform(0.005, 0.03, n_change_points + 1)
+    regime = np.repeat(np.arange(n_change_points + 1), np.diff(bounds))
+
+    log_returns = rng.standard_normal(n_rows)
+    log_returns *= volatility[regime]
+    log_returns += drift[regime]
+    log_returns[0] = 0.0
+    price = 50.0 * np.exp(np.cumsum(log_returns))
+    index = pd.date_range(START, periods=n_rows, freq=FREQ, name='Date')
+    return pd.DataFrame({'Price': price}, index=index), change_points
+
+
+def synthetic_events(df, change_points):
+    """Event table (as in ``data/event_data.csv``) with one event per change point."""
+    return pd.DataFrame({'Date': df.index[change_points],
+                         'Description': [f"Regime change {i + 1}" for i in range(len(change_points))]})
+
+
+def write_raw_csv(df, path):
+    """Write prices in the raw ``Date,Price`` layout of ``BrentOilPrices.csv``, once per path."""
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, date_format='%Y-%m-%d %H:%M:%S', float_format='%.6f')
+    os.replace(tmp_path, path)
+    return path
@@ -1,22 +1,40 @@
 const API_BASE = 'http://127.0.0.1:5000/api';
 
-export async function fetchOilPrices(start, end) {
+// The API sends columnar JSON ({"Date": [...], "Price": [...]}) when asked with
+// format=columns; responses carry an ETag, so the browser revalidates with 304s.
+function columnsToRecords(columns) {
+  const keys = Object.keys(columns);
+  const length = keys.length ? columns[keys[0]].length : 0;
+  const records = new Array(length);
+  for (let i = 0; i < length; i += 1) {
+    const record = {};
+    for (const key of keys) record[key] = columns[key][i];
+    records[i] = record;
+  }
+  return records;
+}
+
+export async function fetchOilPrices(start, end, maxPoints) {
+  const params = new URLSearchParams({ format: 'columns' });
+  if (start) params.append('start', start);
+  if (end) params.append('end', end);
+  if (maxPoints) params.append('max_points', maxPoints);
   if (start || end) {
-    const params = new URLSearchParams();
-    if (start) params.append('start', start);
-    if (end) params.append('end', end);
-    const url = `${API_BASE}/oil-prices/filter?${params.toString()}`;
-    const res = await fetch(url);
+    const res = await fetch(`${API_BASE}/oil-prices/filter?${params.toString()}`);
     if (!res.ok) throw new Error('Failed to fetch filtered oil prices');
-    return res.json();
+    return columnsToRecords(await res.json());
   } else {
-    const res = await fetch(`${API_BASE}/oil-prices`);
+    const res = await fetch(`${API_BASE}/oil-prices?${params.toString()}`);
     if (!res.ok) throw new Error('Failed to fetch oil prices');
-    return res.json();
+    return columnsToRecords(await res.json());
   }
 }
-export async function fetchEvents() {
-  const response = await fetch('http://localhost:5000/api/events');
+export async function fetchEvents(start, end) {
+  const params = new URLSearchParams();
+  if (start) params.append('start', start);
+  if (end) params.append('end', end);
+  const query = params.toString();
+  const response = await fetch(`${API_BASE}/events${query ? `?${query}` : ''}`);
   if (!response.ok) throw new Error('Failed to fetch events');
   return response.json();
 }
@@ -27,3 +45,34 @@ export async function fetchChangePoints() {
   if (!res.ok) throw new Error('Failed to fetch change points');
   return res.json();
 }
+
+export async function submitChangePointJob(settings) {
+  const res = await fetch(`${API_BASE}/change-point-jobs`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(settings),
+  });
+  if (!res.ok) throw new Error('Failed to submit change point job');
+  return res.json();
+}
+
+export async function fetchChangePointJob(jobId) {
+  const res = await fetch(`${API_BASE}/change-point-jobs/${jobId}`);
+  if (!res.ok) throw new Error('Failed to fetch change point job status');
+  return res.json();
+}
+
+export async function fetchChangePointJobResult(jobId) {
+  const res = await fetch(`${API_BASE}/change-point-jobs/${jobId}/result`);
+  if (!res.ok) throw new Error('Change point job result is not available');
+  return res.json();
+}
+
+// Live prices and change point probabilities pushed by the backend (Server-Sent Events).
+// onReset is called when the client fell behind and should refetch its data.
+export function subscribeToLiveFeed(onUpdate, onReset) {
+  const source = new EventSource(`${API_BASE}/stream`);
+  source.addEventListener('update', (e) => onUpdate(JSON.parse(e.data)));
+  if (onReset) source.addEventListener('reset', () => onReset());
+  return () => source.close();
+}
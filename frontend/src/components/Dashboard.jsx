@@ -4,6 +4,9 @@ import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, ReferenceLine
 } from 'recharts';
 
+// Roughly one point per horizontal pixel of the chart
+const CHART_POINTS = 1000;
+
 export default function Dashboard() {
   const [oilPrices, setOilPrices] = useState([]);
   const [changePoints, setChangePoints] = useState([]);
@@ -16,7 +19,7 @@ const [events, setEvents] = useState([]);
   const loadData = async (start, end) => {
     setLoading(true);
     try {
-      const prices = await fetchOilPrices(start, end);
+      const prices = await fetchOilPrices(start, end, CHART_POINTS);
       const changes = await fetchChangePoints();
       const evts = await fetchEvents();  // Fetch events
       setOilPrices(prices);
@@ -0,0 +1,201 @@
+# src/autocorrelation.py
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+def acf(x, nlags=50, lengths=None):
+    """
+    Autocorrelation functions of many series in one FFT call.
+
+    Matches ``statsmodels.tsa.stattools.acf(x, nlags)`` (demeaned, biased
+    autocovariances divided by the variance) for every row of ``x``.
+
+    Args:
+        x (array-like): A series, or an array of series along the last axis.
+            Rows shorter than the last axis are given by ``lengths``; values
+            past a row's length are ignored.
+        nlags (int): Largest lag.
+        lengths (array-like, optional): Number of observations of each row.
+
+    Returns:
+        np.ndarray: Autocorrelations at lags 0..nlags, shape ``x.shape[:-1] +
+        (nlags + 1,)``. Lags not shorter than a row's length, and rows without
+        variance, are NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = x.shape[-1]
+    if lengths is None:
+        lengths = np.full(x.shape[:-1], n)
+        xc = x - x.mean(axis=-1, keepdims=True)
+    else:
+        lengths = np.asarray(lengths)
+        mask = np.arange(n) < lengths[..., None]
+        mean = np.where(mask, x, 0.0).sum(axis=-1, keepdims=True) / lengths[..., None]
+        xc = np.where(mask, x - mean, 0.0)
+
+    # Zero padding to n + nlags keeps the circular correlation free of wrap-around
+    size = 1 << int(np.ceil(np.log2(n + nlags)))
+    spectrum = np.fft.rfft(xc, n=size, axis=-1)
+    acov = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n=size, axis=-1)[..., :nlags + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = acov / acov[..., :1]
+    result[np.arange(nlags + 1) >= lengths[..., None]] = np.nan
+    result[~(acov[..., 0] > 0)] = np.nan
+    return result
+
+
+def durbin_levinson(acf_values):
+    """
+    Partial autocorrelations from autocorrelations with the Durbin-Levinson
+    recursion, for every row at once.
+
+    Applied to ``acf`` output this matches ``statsmodels`` ``pacf(x, nlags,
+    method='ywm')``, the default of ``plot_pacf``.
+
+    Args:
+        acf_values (array-like): Autocorrelations at lags 0..nlags along the last axis.
+
+    Returns:
+        np.ndarray: Partial autocorrelations at lags 0..nlags (lag 0 is 1).
+    """
+    r = np.asarray(acf_values, dtype=np.float64)
+    nlags = r.shape[-1] - 1
+    pacf = np.ones_like(r)
+    phi = np.zeros(r.shape[:-1] + (nlags + 1,))
+    variance = np.ones(r.shape[:-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k in range(1, nlags + 1):
+            # phi[..., 1:k] are the AR(k - 1) coefficients
+            a = (r[..., k] - np.sum(phi[..., 1:k] * r[..., k - 1:0:-1], axis=-1)) / variance
+            previous = phi[..., 1:k].copy()
+            phi[..., 1:k] = previous - a[..., None] * previous[..., ::-1]
+            phi[..., k] = a
+            variance = variance * (1.0 - a * a)
+            pacf[..., k] = a
+    return pacf
+
+
+def pacf(x, nlags=50, lengths=None):
+    """Partial autocorrelations of many series: ``durbin_levinson(acf(x, nlags, lengths))``."""
+    return durbin_levinson(acf(x, nlags, lengths))
+
+
+def confidence_band(values, nobs, alpha=0.05, partial=False):
+    """
+    Half-widths of the confidence band around zero drawn by ``plot_acf``
+    (Bartlett's formula) or, with ``partial=True``, ``plot_pacf`` (1 / sqrt(nobs)).
+
+    Args:
+        values (array-like): ACF or PACF values at lags 0..nlags along the last axis.
+        nobs (int or array-like): Observations behind each row.
+        alpha (float): Significance level.
+        partial (bool): Whether ``values`` are partial autocorrelations.
+
+    Returns:
+        np.ndarray: Half-widths with the shape of ``values`` (0 at lag 0).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    nobs = np.asarray(nobs, dtype=np.float64)[..., None]
+    variance = np.ones_like(values) / nobs
+    if not partial:
+        variance[..., 2:] *= 1.0 + 2.0 * np.cumsum(values[..., 1:-1] ** 2, axis=-1)
+    variance[..., 0] = 0.0
+    return NormalDist().inv_cdf(1.0 - alpha / 2.0) * np.sqrt(variance)
+
+
+def rolling_acf(df: pd.DataFrame, columns='daily_return', nlags=20, window=252, step=5,
+                partial=False):
+    """
+    ACF (or PACF) of sliding windows of one or more columns, each column's
+    windows computed in a single batched call.
+
+    Args:
+        df (pd.DataFrame): Date-indexed DataFrame.
+        columns (str or sequence of str): Column(s) to analyse; NaNs are dropped per column.
+        nlags (int): Largest lag.
+        window (int): Window length in observations.
+        step (int): Observations between consecutive windows.
+        partial (bool): Return partial autocorrelations.
+
+    Returns:
+        pd.DataFrame: One row per window, indexed by the window's last date, with
+        lags 1..nlags as columns; (column, lag) MultiIndex columns for several columns.
+    """
+    single = isinstance(columns, str)
+    tables = {}
+    for column in [columns] if single else list(columns):
+        series = df[column].dropna()
+        if len(series) < window:
+            raise ValueError(f"Column '{column}' has {len(series)} observations, "
+                             f"fewer than the window of {window}")
+        starts = np.arange(0, len(series) - window + 1, max(int(step), 1))
+        windows = np.lib.stride_tricks.sliding_window_view(series.to_numpy(dtype=np.float64),
+                                                           window)[starts]
+        values = pacf(windows, nlags) if partial else acf(windows, nlags)
+        tables[column] = pd.DataFrame(
+            values[:, 1:], columns=pd.RangeIndex(1, nlags + 1, name='lag'),
+            index=pd.Index(series.index[starts + window - 1], name=series.index.name or 'Date'))
+    if single:
+        return tables[columns]
+    return pd.concat(tables, axis=1)
+
+
+def segment_acf(df: pd.DataFrame, column, bkps, nlags=20, partial=False):
+    """
+    ACF (or PACF) of each segment delimited by ``bkps`` (as returned by
+    ``multiple_change_points.pelt``), all segments in one batched call.
+
+    Args:
+        df (pd.DataFrame): Time-indexed data the breakpoints were computed on.
+        column (str): Column that was segmented.
+        bkps (list): Segment end indices.
+        nlags (int): Largest lag.
+        partial (bool): Return partial autocorrelations.
+
+    Returns:
+        pd.DataFrame: Start/end dates, length and lags 1..nlags per segment.
+    """
+    series = df[column].dropna()
+    ends = np.asarray(bkps, dtype=np.int64)
+    starts = np.r_[0, ends[:-1]]
+    lengths = ends - starts
+    values = np.zeros((len(ends), int(lengths.max()) if len(ends) else 0))
+    x = series.to_numpy(dtype=np.float64)
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        values[i, :end - start] = x[start:end]
+    values = pacf(values, nlags, lengths) if partial else acf(values, nlags, lengths)
+    table = pd.DataFrame({'start': series.index[starts], 'end': series.index[ends - 1],
+                          'n': lengths})
+    lags = pd.DataFrame(values[:, 1:], columns=range(1, nlags + 1))
+    return pd.concat([table, lags], axis=1)
+
+
+def plot_correlogram(ax, values, nobs, title, alpha=0.05, partial=False):
+    """
+    Draw precomputed ACF or PACF values the way ``plot_acf``/``plot_pacf`` do:
+    stems and markers from lag 0 and the shaded confidence band around zero.
+
+    Args:
+        ax (matplotlib.axes.Axes): Target axes.
+        values (array-like): Values at lags 0..nlags (from ``acf`` or ``pacf``).
+        nobs (int): Observations the values were computed from.
+        title (str): Axes title.
+        alpha (float): Significance level of the band.
+        partial (bool): Whether ``values`` are partial autocorrelations.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    lags = np.arange(len(values))
+    band = confidence_band(values, nobs, alpha, partial)
+    ax.vlines(lags, [0], values)
+    ax.axhline()
+    ax.margins(0.05)
+    ax.plot(lags, values, marker='o', markersize=5, linestyle='None')
+    ax.set_title(title)
+    ax.set_ylim(-1, 1)
+    edges = lags[1:].astype(float)
+    edges[0] -= 0.5
+    edges[-1] += 0.5
+    ax.fill_between(edges, -band[1:], band[1:], alpha=0.25)
@@ -0,0 +1,165 @@
+# src/batch_analysis.py
+
+import contextlib
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Environment variables that size the thread pools of BLAS/OpenMP backends.
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+
+def run_batch_change_point_analysis(jobs, max_workers=None, threads_per_job=1, **analysis_kwargs):
+    """
+    Run ``run_change_point_analysis`` over many (series, column, window) jobs in
+    a process pool and collect one summary row per job.
+
+    Every distinct (DataFrame, column) pair is copied once into shared memory,
+    together with its dates, and workers read their window straight from it
+    instead of receiving pickled copies. Workers are started with BLAS/OpenMP
+    thread counts capped at ``threads_per_job`` and PyMC3 runs its chains in a
+    single process, so ``max_workers`` jobs never oversubscribe the cores.
+
+    Args:
+        jobs (list of dict): Each job has ``df`` (date-indexed DataFrame) and
+            ``column``, and optionally ``start``/``end`` (inclusive window bounds)
+            and ``name``.
+        max_workers (int, optional): Worker processes. Defaults to the CPU count.
+        threads_per_job (int): Threads each worker's numeric libraries may use.
+        **analysis_kwargs: Passed to ``run_change_point_analysis`` (engine, mode,
+            draws, ...).
+
+    Returns:
+        pd.DataFrame: One row per job with the window, the most probable change
+        date and its probability, posterior means of mu1, mu2 and sigma, the
+        run time and any error message.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return pd.DataFrame()
+    max_workers = max_workers or os.cpu_count() or 1
+    analysis_kwargs.setdefault('cores', 1)
+
+    blocks = {}
+    tasks = []
+    try:
+        for i, job in enumerate(jobs):
+            source = (id(job['df']), job['column'])
+            if source not in blocks:
+                blocks[source] = _share_series(job['df'][job['column']])
+            shm, n = blocks[source]
+            tasks.append((i, job.get('name', f"{job['column']}#{i}"), job['column'], shm.name, n,
+                          _to_ns(job.get('start')), _to_ns(job.get('end'))))
+
+        print(f"Running {len(tasks)} change point jobs on {max_workers} workers...")
+        results = [None] * len(tasks)
+        with _thread_limits(threads_per_job):
+            context = mp.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(threads_per_job,)) as pool:
+                futures = {pool.submit(_run_job, task, analysis_kwargs): task[0] for task in tasks}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]] = future.result()
+                    print(f"  [{done}/{len(tasks)}] {results[futures[future]]['name']} finished")
+    finally:
+        for shm, _ in blocks.values():
+            shm.close()
+            shm.unlink()
+    return pd.DataFrame(results)
+
+
+def _to_ns(value):
+    return None if value is None else pd.Timestamp(value).value
+
+
+def _share_series(series):
+    """Copy a date-indexed series into one shared block: int64 dates, then float64 values."""
+    n = len(series)
+    shm = shared_memory.SharedMemory(create=True, size=max(16 * n, 1))
+    dates = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=0)
+    values = np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=8 * n)
+    dates[:] = np.asarray(series.index, dtype='datetime64[ns]').view(np.int64)
+    values[:] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return shm, n
+
+
+@contextlib.contextmanager
+def _thread_limits(threads):
+    """Temporarily set thread-count variables so that spawned workers inherit them."""
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _init_worker(threads):
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+
+
+def _run_job(task, analysis_kwargs):
+    """Worker side: attach to the shared block, slice the window and run the analysis."""
+    try:
+        from .change_point_model import run_change_point_analysis
+    except ImportError:
+        from change_point_model import run_change_point_analysis
+
+    _, name, column, shm_name, n, start, end = task
+    row = {'name': name, 'column': column}
+    started = time.perf_counter()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        dates = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=0)
+        values = np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=8 * n)
+        lo = 0 if start is None else int(np.searchsorted(dates, start, side='left'))
+        hi = n if end is None else int(np.searchsorted(dates, end, side='right'))
+        window = pd.DataFrame({column: values[lo:hi].copy()},
+                              index=pd.DatetimeIndex(dates[lo:hi].astype('datetime64[ns]')))
+        del dates, values
+    finally:
+        shm.close()
+
+    series = window[column].dropna()
+    row.update({'start': series.index.min(), 'end': series.index.max(), 'n': len(series)})
+    try:
+        trace, model = run_change_point_analysis(window, column, **analysis_kwargs)
+        tau_probs = model.get('tau_probs') if isinstance(model, dict) else None
+        row.update(_summarize_posterior(trace, series.index, tau_probs))
+        row['error'] = None
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['seconds'] = time.perf_counter() - started
+    return row
+
+
+def _summarize_posterior(trace, dates, tau_probs=None):
+    """
+    Most probable change date (first day of the new regime, NaT for "no change")
+    and posterior means from a change point trace. The change probability is
+    taken from ``tau_probs`` (the exact engine's posterior of tau) when given,
+    otherwise from the frequencies of the tau draws.
+    """
+    posterior = trace.posterior
+    if tau_probs is None:
+        tau = posterior['tau'].values.ravel().astype(np.int64)
+        tau_probs = np.bincount(tau, minlength=len(dates)) / len(tau)
+    mode = int(np.argmax(tau_probs))
+    return {
+        'change_date': dates[mode + 1] if mode + 1 < len(dates) else pd.NaT,
+        'change_probability': float(tau_probs[mode]),
+        'mu1': float(posterior['mu1'].mean()),
+        'mu2': float(posterior['mu2'].mean()),
+        'sigma': float(posterior['sigma'].mean()),
+    }
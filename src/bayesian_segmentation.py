@@ -0,0 +1,156 @@
+# src/bayesian_segmentation.py
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .segment_stats import CumulativeStats
+except ImportError:
+    from segment_stats import CumulativeStats
+
+
+def default_prior(data):
+    """
+    Weakly informative Normal-Gamma segment prior scaled to the data: segment
+    means centred on the overall mean, segment variances around the overall variance.
+
+    Returns:
+        dict: ``mu0``, ``kappa0``, ``alpha0`` and ``beta0``.
+    """
+    data = np.asarray(data, dtype=float)
+    return {'mu0': float(np.mean(data)), 'kappa0': 0.01, 'alpha0': 2.0,
+            'beta0': float(np.var(data)) or 1.0}
+
+
+def run_segmentation_posterior(df: pd.DataFrame, column='daily_return', hazard=1 / 250,
+                               prior=None, max_segments=50, prune_threshold=1e-12,
+                               max_candidates=None):
+    """
+    Exact Bayesian multiple change point analysis by forward-backward recursions
+    over segment marginal likelihoods (product partition model, Fearnhead 2006).
+
+    Segments are independent with Normal-Gamma distributed mean and precision,
+    and a change occurs after each observation with probability ``hazard``
+    (geometric segment lengths). Every segment likelihood comes from prefix sums
+    in O(1). Segment start points whose forward weight drops below
+    ``prune_threshold`` relative to the total are discarded (Fearnhead & Liu,
+    2007); with the default threshold this is numerically exact. Setting
+    ``max_candidates`` additionally caps the number of live start points, which
+    makes the O(n^2) recursion linear in n with a small approximation error.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the time series data.
+        column (str): Column to analyze for change points.
+        hazard (float): Prior probability of a change point at each step.
+        prior (dict, optional): ``mu0``, ``kappa0``, ``alpha0``, ``beta0`` of the segment
+            prior. Defaults to ``default_prior(data)``.
+        max_segments (int): Largest number of segments tracked for the posterior
+            over the number of segments; the probability of more segments is not
+            in ``n_segments`` but reported as ``n_segments_truncated``. Does not
+            limit the change point probabilities.
+        prune_threshold (float): Relative weight below which a segment start is dropped.
+        max_candidates (int, optional): Keep at most this many of the most probable
+            segment starts (at least 2, the newest start included), bounding each
+            step to O(max_candidates) at the price of a small approximation error.
+
+    Returns:
+        dict: ``changepoint_probability`` (posterior probability that a new regime
+        starts on each day), ``posterior_mean`` (posterior mean of the regime level
+        on each day), ``n_segments`` (posterior over 1 to ``max_segments``
+        segments), ``n_segments_truncated`` (posterior probability of more than
+        ``max_segments`` segments, missing from ``n_segments``) and ``log_evidence``.
+
+    Raises:
+        ValueError: For fewer than two observations, a hazard outside (0, 1) or
+            ``max_candidates`` below 2.
+    """
+    series = df[column].dropna()
+    data = series.values.astype(float)
+    n = len(data)
+    if n < 2:
+        raise ValueError("At least two observations are required for change point analysis")
+    if not 0 < hazard < 1:
+        raise ValueError("hazard must be a probability in (0, 1)")
+    if max_candidates is not None and max_candidates < 2:
+        # One slot always goes to the newest start, so fewer than two keeps no history
+        raise ValueError("max_candidates must be at least 2")
+    prior = default_prior(data) if prior is None else prior
+
+    stats = CumulativeStats(data)
+    log_p, log_q = np.log(hazard), np.log1p(-hazard)
+    log_prune = np.log(prune_threshold)
+    max_segments = max(int(max_segments), 1)
+
+    def segment_terms(starts, t):
+        # Segment evidence times the prior of a run lasting t - s observations
+        return (stats.normal_gamma_log_marginal(starts, t, **prior)
+                + (t - starts - 1) * log_q)
+
+    # Forward pass: log_a[t] = log P(x[:t], a segment ends at t); log_ak adds the segment count.
+    log_a = np.full(n + 1, -np.inf)
+    log_a[0] = 0.0
+    log_ak = np.full((n + 1, max_segments + 1), -np.inf)
+    log_ak[0, 0] = 0.0
+    candidates = np.array([0], dtype=np.int64)
+    history = [None] * (n + 1)
+    for t in range(1, n + 1):
+        terms = segment_terms(candidates, t)
+        joint = log_a[candidates] + terms
+        top = np.max(joint)
+        total = top + np.log(np.sum(np.exp(joint - top)))
+        history[t] = (candidates, terms)
+        counts = _count_update(log_ak[candidates, :-1], terms)
+        if t < n:
+            log_a[t] = total + log_p
+            log_ak[t, 1:] = counts + log_p
+            keep = np.flatnonzero(joint - total >= log_prune)
+            if max_candidates is not None and len(keep) >= max_candidates:
+                best = np.argpartition(joint[keep], -(max_candidates - 1))[-(max_candidates - 1):]
+                keep = np.sort(keep[best])
+            candidates = np.append(candidates[keep], t)
+        else:
+            log_evidence = total
+            log_ak[t, 1:] = counts
+
+    # Backward pass: log_b[s] = log P(x[s:] | a segment starts at s)
+    log_b = np.full(n + 1, -np.inf)
+    mean_acc = np.zeros(n + 1)
+    m0 = prior['mu0'] - stats.shift
+    for t in range(n, 0, -1):
+        starts, terms = history[t]
+        tail = 0.0 if t == n else log_p + log_b[t]
+        log_b[starts] = np.logaddexp(log_b[starts], terms + tail)
+
+        # Posterior probability of each segment [s, t) and its posterior mean level
+        seg_prob = np.exp(log_a[starts] + terms + tail - log_evidence)
+        k, s, _ = stats.segment(starts, t)
+        level = stats.shift + (prior['kappa0'] * m0 + s) / (prior['kappa0'] + k)
+        np.add.at(mean_acc, starts, seg_prob * level)
+        mean_acc[t] -= np.sum(seg_prob * level)
+
+    cp_prob = np.zeros(n)
+    cp_prob[1:] = np.exp(log_a[1:n] + log_b[1:n] - log_evidence)
+    n_segments = np.exp(log_ak[n, 1:] - log_evidence)
+
+    return {
+        'changepoint_probability': pd.Series(np.clip(cp_prob, 0.0, 1.0), index=series.index),
+        'posterior_mean': pd.Series(np.cumsum(mean_acc)[:n], index=series.index),
+        'n_segments': pd.Series(n_segments, index=pd.RangeIndex(1, max_segments + 1,
+                                                                 name='n_segments')),
+        'n_segments_truncated': float(max(1.0 - np.sum(n_segments), 0.0)),
+        'log_evidence': float(log_evidence),
+    }
+
+
+def _count_update(log_counts, terms):
+    """
+    ``log(sum_s exp(log_counts[s, k] + terms[s]))`` for every segment count ``k``,
+    evaluated as a rescaled matrix-vector product instead of a log-space reduction.
+    Contributions more than ~700 nats below the largest term underflow to zero.
+    """
+    row_max = np.max(log_counts, axis=1)
+    row_max[~np.isfinite(row_max)] = 0.0
+    scaled = terms + row_max
+    top = np.max(scaled)
+    with np.errstate(divide='ignore'):
+        return np.log(np.exp(scaled - top) @ np.exp(log_counts - row_max[:, None])) + top
@@ -1,24 +1,194 @@
 # src/change_point_model.py
 
-import pymc3 as pm
+import time
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import arviz as az
 
-def run_change_point_analysis(df: pd.DataFrame, column='daily_return'):
+# PyMC3, ArviZ and matplotlib take seconds to import, so they are imported in
+# the functions that use them: the exact engine and the scan need none of them.
+
+try:
+    from .instrumentation import observe_stage, record_draws, stage
+    from .posterior_cache import default_cache
+    from .segment_stats import CumulativeStats
+except ImportError:
+    from instrumentation import observe_stage, record_draws, stage
+    from posterior_cache import default_cache
+    from segment_stats import CumulativeStats
+
+# Upper bound on the number of (tau, sigma) cells evaluated at once by the exact engine.
+_EXACT_BLOCK_CELLS = 2_000_000
+
+MODES = ('nuts', 'advi', 'smc')
+_PARAMS = ('tau', 'mu1', 'mu2', 'sigma')
+
+
+def run_change_point_analysis(df: pd.DataFrame, column='daily_return', engine='pymc3',
+                              mode='nuts', draws=2000, tune=2000, chains=4,
+                              time_budget_seconds=None, random_seed=None, cache=None,
+                              cores=None):
     """
-    Run Bayesian change point detection on a specified column using PyMC3.
-    
+    Run Bayesian change point detection on a specified column.
+
+    Two engines are available for the single switch-point model:
+
+    - ``'pymc3'``: approximate the posterior with PyMC3, using the inference
+      ``mode`` below.
+    - ``'exact'``: integrate ``mu1``/``mu2`` out analytically and ``sigma`` on a
+      fine grid, scoring every candidate ``tau`` in one vectorized pass over
+      cumulative sums. The result is the exact posterior of the same model,
+      returned together with independent draws from it. ``mode`` and the
+      time budget are ignored.
+
+    PyMC3 inference modes trade accuracy for speed:
+
+    - ``'nuts'``: NUTS for the means and sigma, Metropolis for ``tau`` (default).
+    - ``'advi'``: mean-field ADVI on a model with ``tau`` summed out of the
+      likelihood; ``tau`` draws are then taken from its exact conditional.
+    - ``'smc'``: Sequential Monte Carlo on the same marginalized model.
+
+    With ``time_budget_seconds``, sampling or optimization stops once the budget
+    is spent and whatever was produced is returned. NUTS and ADVI check the
+    budget at every step. Budgeted NUTS runs its chains one after another in
+    this process (``cores`` is ignored), so fewer chains than requested may
+    finish; a chain cut short is only kept when no chain completed. SMC checks
+    it only between chains: ``pm.sample_smc``
+    cannot be interrupted or capped, so each chain that starts runs to the end
+    and the first chain always runs, which can overrun the budget by up to one
+    chain's sampling time. Convergence diagnostics
+    (max R-hat, min bulk ESS, elapsed time, draws per second, whether the run
+    was cut short) are printed and stored in ``trace.posterior.attrs``. Each
+    phase (model build, tuning, drawing, diagnostics) is also timed in the
+    ``pipeline_stage_seconds`` metric of ``instrumentation.REGISTRY``.
+
+    With ``cache``, PyMC3 posteriors are looked up by a hash of the data and
+    of every setting above before sampling, and stored after it, so repeated
+    identical analyses load in milliseconds. The exact engine is not cached:
+    recomputing it is as cheap as loading it.
+
     Parameters:
         df (pd.DataFrame): DataFrame containing the time series data.
         column (str): Column to analyze for change points.
+        engine (str): ``'pymc3'`` (default) or ``'exact'``.
+        mode (str): ``'nuts'`` (default), ``'advi'`` or ``'smc'``.
+        draws (int): Posterior draws per chain.
+        tune (int): NUTS tuning steps per chain, or ADVI optimization steps.
+        chains (int): Number of chains (NUTS/SMC) or of draw groups (ADVI).
+        time_budget_seconds (float, optional): Wall-clock budget for inference
+            (for SMC, checked between chains only). NUTS chains then run
+            sequentially, ignoring ``cores``, and may be fewer than ``chains``.
+        random_seed (int, optional): Seed for the sampler / posterior draws.
+        cache (PosteriorCache or bool, optional): Cache to use, or True for
+            ``default_cache()``.
+        cores (int, optional): Processes PyMC3 may use to run NUTS chains in parallel.
 
     Returns:
-        trace (MultiTrace): PyMC3 trace object.
-        model (pm.Model): The PyMC3 model.
+        trace (az.InferenceData): Posterior draws of tau, mu1, mu2 and sigma.
+        model (pm.Model or dict): The PyMC3 model, or for ``engine='exact'`` a dict
+            with the full ``tau_probs`` vector, a ``moments`` table (posterior
+            mean/sd of tau, mu1, mu2, sigma) and the model ``log_evidence``.
     """
     data = df[column].dropna().values
+
+    if engine == 'exact':
+        return _run_exact_switch_point(data, draws=draws, chains=chains, random_seed=random_seed)
+    if engine != 'pymc3':
+        raise ValueError(f"Unknown engine '{engine}'. Use 'pymc3' or 'exact'.")
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Choose from {MODES}.")
+    import arviz as az
+    import pymc3 as pm
+
+    if cache is True:
+        cache = default_cache()
+    if cache:
+        key = cache.key(data, column=column, engine=engine, mode=mode, draws=draws, tune=tune,
+                        chains=chains, time_budget_seconds=time_budget_seconds,
+                        random_seed=random_seed)
+        with stage('change_point', 'cache_lookup'):
+            trace = cache.get(key)
+        if trace is not None:
+            print(f"Loaded cached posterior {key[:12]} from {cache.directory}")
+            model = _switch_point_model(data) if mode == 'nuts' else _marginal_switch_point_model(data)
+            return trace, model
+
+    deadline = None if time_budget_seconds is None else time.perf_counter() + time_budget_seconds
+    started = time.perf_counter()
+    with stage('change_point', f'{mode}_build_model'):
+        model = _switch_point_model(data) if mode == 'nuts' else _marginal_switch_point_model(data)
+    sampling_started = time.perf_counter()
+    if mode == 'nuts':
+        if deadline is None:
+            with model, stage('change_point', 'nuts_sample'):
+                trace = pm.sample(draws, tune=tune, chains=chains, cores=cores,
+                                  target_accept=0.95, random_seed=random_seed,
+                                  return_inferencedata=True)
+            stopped_early = False
+        else:
+            trace, stopped_early = _sample_nuts_with_budget(model, draws, tune, chains,
+                                                            deadline, random_seed)
+        sampling_seconds = time.perf_counter() - sampling_started
+    else:
+        fit = _fit_advi if mode == 'advi' else _sample_smc
+        samples, stopped_early = fit(model, draws, tune, chains, deadline, random_seed)
+        sampling_seconds = time.perf_counter() - sampling_started
+        with stage('change_point', 'draw_tau'):
+            rng = np.random.default_rng(random_seed)
+            samples['tau'] = _draw_tau_given_params(data, samples, rng)
+            trace = az.from_dict(posterior=samples)
+
+    with stage('change_point', 'diagnostics'):
+        diagnostics = convergence_diagnostics(trace)
+    n_draws = diagnostics['n_chains'] * diagnostics['n_draws']
+    trace.posterior.attrs.update({
+        'inference_mode': mode,
+        'elapsed_seconds': time.perf_counter() - started,
+        'sampling_seconds': sampling_seconds,
+        'draws_per_second': record_draws('pymc3', mode, n_draws, sampling_seconds),
+        'stopped_early': int(stopped_early),
+        **diagnostics,
+    })
+    print(f"{mode.upper()} finished in {trace.posterior.attrs['elapsed_seconds']:.1f}s"
+          f" ({trace.posterior.attrs['draws_per_second']:.0f} draws/s)"
+          f"{' (time budget reached)' if stopped_early else ''}: "
+          f"max R-hat={diagnostics['max_r_hat']:.3f}, min ESS={diagnostics['min_ess_bulk']:.0f}")
+    if cache:
+        with stage('change_point', 'cache_store'):
+            cache.put(key, trace)
+    return trace, model
+
+
+def convergence_diagnostics(trace):
+    """
+    Worst-case convergence diagnostics over the model parameters.
+
+    Parameters:
+        trace (az.InferenceData): Posterior draws.
+
+    Returns:
+        dict: ``max_r_hat`` (NaN with a single chain), ``min_ess_bulk``,
+        ``n_chains`` and ``n_draws``.
+    """
+    import arviz as az
+
+    posterior = trace.posterior
+    names = [name for name in _PARAMS if name in posterior]
+    n_chains, n_draws = posterior.sizes['chain'], posterior.sizes['draw']
+    r_hat = np.nan
+    if n_chains > 1 and n_draws >= 4:
+        r_hat = float(max(az.rhat(trace, var_names=names)[name].values for name in names))
+    ess = np.nan
+    if n_draws >= 4:
+        ess = float(min(az.ess(trace, var_names=names)[name].values for name in names))
+    return {'max_r_hat': r_hat, 'min_ess_bulk': ess, 'n_chains': int(n_chains),
+            'n_draws': int(n_draws)}
+
+
+def _switch_point_model(data):
+    """The single switch-point model with an explicit discrete ``tau``."""
+    import pymc3 as pm
+
     n = len(data)
 
     with pm.Model() as model:
@@ -36,12 +206,421 @@ def run_change_point_analysis(df: pd.DataFrame, column='daily_return'):
         mu = pm.math.switch(tau >= np.arange(n), mu1, mu2)
 
         # Likelihood
-        obs = pm.Normal('obs', mu=mu, sd=sigma, observed=data)
+        pm.Normal('obs', mu=mu, sd=sigma, observed=data)
 
-        # Sampling
-        trace = pm.sample(2000, tune=2000, target_accept=0.95, return_inferencedata=True)
+    return model
 
-    return trace, model
+
+def _tau_log_likelihood(stats, mu1, mu2, sigma, log=np.log):
+    """
+    Log-likelihood of every ``tau`` (last axis) for the given parameters
+    (leading axes). Pass ``log=pm.math.log`` to build it from Theano tensors.
+    """
+    n = stats.n
+    k1 = np.arange(1, n + 1)
+    s1, q1 = stats.s1[1:], stats.s2[1:]
+    s2, q2 = stats.s1[n] - s1, stats.s2[n] - q1
+    d1, d2 = mu1 - stats.shift, mu2 - stats.shift
+    sq = q1 - 2.0 * d1 * s1 + k1 * d1 * d1 + q2 - 2.0 * d2 * s2 + (n - k1) * d2 * d2
+    return -n * log(sigma) - 0.5 * n * np.log(2.0 * np.pi) - sq / (2.0 * sigma * sigma)
+
+
+def _marginal_switch_point_model(data):
+    """
+    The switch-point model with the discrete ``tau`` summed out of the
+    likelihood, leaving only continuous parameters for ADVI and SMC.
+    """
+    import pymc3 as pm
+
+    stats = CumulativeStats(data)
+    n = len(data)
+
+    with pm.Model() as model:
+        mu1 = pm.Normal('mu1', mu=np.mean(data), sd=np.std(data))
+        mu2 = pm.Normal('mu2', mu=np.mean(data), sd=np.std(data))
+        sigma = pm.HalfNormal('sigma', sd=1)
+
+        # Uniform prior over tau: log(1/n * sum_tau p(data | tau, mu1, mu2, sigma))
+        loglik = _tau_log_likelihood(stats, mu1, mu2, sigma, log=pm.math.log)
+        pm.Potential('obs', pm.math.logsumexp(loglik) - np.log(n))
+
+    return model
+
+
+def _draw_tau_given_params(data, samples, rng, block=256):
+    """Draw tau from p(tau | mu1, mu2, sigma, data) for every posterior draw."""
+    stats = CumulativeStats(data)
+    mu1, mu2, sigma = (samples[name].reshape(-1) for name in ('mu1', 'mu2', 'sigma'))
+    tau = np.empty(len(mu1), dtype=np.int64)
+    for start in range(0, len(mu1), block):
+        part = slice(start, start + block)
+        loglik = _tau_log_likelihood(stats, mu1[part, None], mu2[part, None], sigma[part, None])
+        probs = np.exp(loglik - loglik.max(axis=1, keepdims=True))
+        cdf = np.cumsum(probs, axis=1)
+        u = rng.random(len(cdf)) * cdf[:, -1]
+        tau[part] = np.minimum((cdf < u[:, None]).sum(axis=1), stats.n - 1)
+    return tau.reshape(samples['mu1'].shape)
+
+
+def _stack_chains(chains, names):
+    """Stack per-chain draw arrays, truncated to the shortest chain, as (chain, draw)."""
+    length = min(len(chain[names[0]]) for chain in chains)
+    return {name: np.stack([chain[name][:length] for chain in chains]) for name in names}
+
+
+def _sample_nuts_with_budget(model, draws, tune, chains, deadline, random_seed):
+    """
+    Run NUTS chains one after another with ``pm.iter_sample`` and stop as soon as
+    the deadline passes. Chains that never left tuning are dropped, and a chain
+    cut short while drawing is kept only if no chain completed: stacking it with
+    complete chains would truncate them all to its length.
+    """
+    import arviz as az
+    import pymc3 as pm
+
+    collected = []
+    stopped_early = False
+    with model:
+        step = pm.sampling.assign_step_methods(model, step_kwargs={'nuts': {'target_accept': 0.95}})
+        for chain in range(chains):
+            seed = None if random_seed is None else random_seed + chain
+            multitrace = None
+            chain_started = tuned = time.perf_counter()
+            for i, multitrace in enumerate(pm.iter_sample(tune + draws, step, chain=chain,
+                                                          tune=tune, random_seed=seed)):
+                if i + 1 == tune:
+                    tuned = time.perf_counter()
+                if i + 1 < tune + draws and time.perf_counter() >= deadline:
+                    stopped_early = True
+                    break
+            _record_phases(chain_started, tuned, time.perf_counter(), tune, multitrace)
+            # A chain cut short is kept only when no chain completed
+            cut_short = stopped_early and collected
+            if multitrace is not None and len(multitrace) > tune and not cut_short:
+                collected.append({name: multitrace.get_values(name)[tune:] for name in _PARAMS})
+            if stopped_early:
+                break
+    if not collected:
+        raise RuntimeError("Time budget ran out before any NUTS chain finished tuning")
+    return az.from_dict(posterior=_stack_chains(collected, list(_PARAMS))), stopped_early
+
+
+def _record_phases(chain_started, tuned, finished, tune, multitrace):
+    """Record the tuning and drawing phases of one NUTS chain run with ``pm.iter_sample``."""
+    done = 0 if multitrace is None else len(multitrace)
+    if done < tune:
+        tuned = finished
+    if tune > 0:
+        observe_stage('change_point', 'nuts_tune', tuned - chain_started)
+    if done > tune:
+        observe_stage('change_point', 'nuts_draw', finished - tuned)
+
+
+def _fit_advi(model, draws, tune, chains, deadline, random_seed):
+    """Mean-field ADVI for ``tune`` steps or until the deadline, then draw from the fit."""
+    import pymc3 as pm
+
+    state = {'stopped_early': False}
+
+    def budget(approx, losses, i):
+        if deadline is not None and time.perf_counter() >= deadline:
+            state['stopped_early'] = True
+            raise StopIteration(f"Time budget reached after {i} ADVI iterations")
+
+    with model:
+        with stage('change_point', 'advi_fit'):
+            approx = pm.fit(n=max(tune, 1), method='advi', random_seed=random_seed,
+                            callbacks=[budget, pm.callbacks.CheckParametersConvergence()])
+        with stage('change_point', 'advi_draw'):
+            multitrace = approx.sample(draws * chains)
+    names = ['mu1', 'mu2', 'sigma']
+    samples = {name: multitrace.get_values(name).reshape(chains, draws) for name in names}
+    return samples, state['stopped_early']
+
+
+def _sample_smc(model, draws, tune, chains, deadline, random_seed):
+    """
+    SMC, one chain at a time while the time budget lasts (at least one chain).
+    The deadline is only checked before each chain: a running ``pm.sample_smc``
+    has adaptive stages and cannot be stopped, so a chain may end past it.
+    """
+    import pymc3 as pm
+
+    names = ['mu1', 'mu2', 'sigma']
+    collected = []
+    stopped_early = False
+    with model:
+        for chain in range(chains):
+            if collected and deadline is not None and time.perf_counter() >= deadline:
+                stopped_early = True
+                break
+            seed = -1 if random_seed is None else random_seed + chain
+            with stage('change_point', 'smc_sample'):
+                multitrace = pm.sample_smc(draws, chains=1, cores=1, random_seed=seed)
+            collected.append({name: multitrace.get_values(name) for name in names})
+    return _stack_chains(collected, names), stopped_early
+
+
+def _sigma_grid(sse, n, size):
+    """
+    Log-spaced grid for sigma covering the posterior under every candidate tau.
+
+    The mode of ``-n*log(s) - sse/(2*s**2) - s**2/2`` (likelihood profile times
+    the HalfNormal(1) prior) is bracketed between the smallest and largest
+    residual sums of squares, then widened by several posterior widths.
+    ``sse`` may carry leading axes (one grid per row, e.g. per window).
+    """
+    def mode(s):
+        return np.sqrt((-n + np.sqrt(n * n + 4.0 * s)) / 2.0)
+
+    lo, hi = mode(np.min(sse, axis=-1)), mode(np.max(sse, axis=-1))
+    pad = 12.0 / np.sqrt(2.0 * n)
+    lo = np.maximum(lo, 1e-12 * np.maximum(hi, 1.0))
+    lo, hi = np.log(lo)[..., None] - pad, np.log(hi)[..., None] + pad
+    log_sigma = lo + (hi - lo) * np.linspace(0.0, 1.0, size)
+    # Trapezoid weights in log-space; the Jacobian d(sigma) = sigma d(log sigma)
+    log_w = np.log(hi - lo) - np.log(size - 1) + log_sigma
+    log_w[..., [0, -1]] -= np.log(2.0)
+    return np.exp(log_sigma), log_w
+
+
+def _segment_evidence(k, s, var, v0):
+    """
+    Segment-dependent part of the log marginal likelihood of a segment whose
+    Normal(m0, v0) mean prior has been integrated out, for known noise variance
+    ``var``. ``s`` is the segment sum of ``x - m0``. The remaining terms,
+    ``-0.5 * (n * log(2*pi*var) + sum((x - m0)**2) / var)``, do not depend on
+    where the series is split. Empty segments contribute zero.
+    """
+    return -0.5 * np.log1p(k * v0 / var) + 0.5 * v0 * s * s / (var * (var + k * v0))
+
+
+def _segment_mean_posterior(k, s, var, v0, m0):
+    """Posterior mean and variance of a segment mean given the noise variance."""
+    post_var = 1.0 / (1.0 / v0 + k / var)
+    return m0 + post_var * s / var, post_var
+
+
+def _switch_point_log_posterior(stats, tau, sigma, log_w, v0):
+    """
+    Unnormalized log posterior over a block of ``tau`` values (rows) and the
+    sigma grid (columns) for the single switch-point model.
+    """
+    n = stats.n
+    k1, s1, _ = stats.segment(np.zeros_like(tau), tau + 1)
+    k2, s2 = n - k1, stats.s1[n] - s1
+    var = sigma * sigma
+    log_prior = 0.5 * np.log(2.0 / np.pi) - 0.5 * var + log_w
+    shared = -0.5 * (n * np.log(2.0 * np.pi * var) + stats.s2[n] / var) + log_prior
+    var = var[None, :]
+    return (_segment_evidence(k1[:, None], s1[:, None], var, v0)
+            + _segment_evidence(k2[:, None], s2[:, None], var, v0)
+            + shared[None, :])
+
+
+def _logsumexp(a, axis=None):
+    a_max = np.max(a, axis=axis, keepdims=True)
+    out = np.log(np.sum(np.exp(a - a_max), axis=axis, keepdims=True)) + a_max
+    return np.squeeze(out, axis=axis) if axis is not None else out.item()
+
+
+def _exact_switch_point_posterior(data, grid_size=128):
+    """
+    Exact posterior of the single switch-point model used by the PyMC3 engine:
+    tau ~ DiscreteUniform(0, n-1), mu1, mu2 ~ Normal(mean, std),
+    sigma ~ HalfNormal(1), x[t] ~ Normal(mu1 if t <= tau else mu2, sigma).
+
+    The segment means are integrated out in closed form and sigma by quadrature,
+    so every tau is scored in O(grid_size) from cumulative sums.
+
+    Returns:
+        dict: ``tau_probs`` plus per-tau conditional moments used for summaries.
+    """
+    n = len(data)
+    if n < 2:
+        raise ValueError("At least two observations are required for change point analysis")
+    m0, v0 = float(np.mean(data)), float(np.var(data))
+    if v0 <= 0:
+        raise ValueError("Series is constant; no change point can be identified")
+
+    stats = CumulativeStats(data, shift=m0)
+    taus = np.arange(n)
+    sse = stats.sse(0, taus + 1) + stats.sse(taus + 1, n)
+    sigma, log_w = _sigma_grid(sse, n, grid_size)
+
+    log_tau = np.empty(n)
+    cond = {name: np.empty(n) for name in ('mu1', 'mu1_sq', 'mu2', 'mu2_sq', 'sigma', 'sigma_sq')}
+    block = max(1, _EXACT_BLOCK_CELLS // grid_size)
+    var = sigma * sigma
+    for start in range(0, n, block):
+        tau = taus[start:start + block]
+        logp = _switch_point_log_posterior(stats, tau, sigma, log_w, v0)
+        row_norm = _logsumexp(logp, axis=1)
+        log_tau[tau] = row_norm
+        w = np.exp(logp - row_norm[:, None])
+
+        for name, lo, hi in (('mu1', np.zeros_like(tau), tau + 1),
+                             ('mu2', tau + 1, np.full_like(tau, n))):
+            k, s, _ = stats.segment(lo, hi)
+            mean, post_var = _segment_mean_posterior(k[:, None], s[:, None], var[None, :], v0, m0)
+            cond[name][tau] = np.sum(w * mean, axis=1)
+            cond[name + '_sq'][tau] = np.sum(w * (mean * mean + post_var), axis=1)
+        cond['sigma'][tau] = w @ sigma
+        cond['sigma_sq'][tau] = w @ var
+
+    log_evidence = _logsumexp(log_tau) - np.log(n)
+    tau_probs = np.exp(log_tau - _logsumexp(log_tau))
+    return {
+        'stats': stats, 'sigma_grid': sigma, 'log_w': log_w, 'v0': v0, 'm0': m0,
+        'tau_probs': tau_probs, 'log_evidence': log_evidence, 'conditional': cond,
+    }
+
+
+def _draw_exact_posterior(post, draws, chains, rng):
+    """Draw independent samples of (tau, mu1, mu2, sigma) from the exact posterior."""
+    stats, sigma, log_w = post['stats'], post['sigma_grid'], post['log_w']
+    n, size = stats.n, draws * chains
+    tau = rng.choice(n, size=size, p=post['tau_probs'])
+
+    # Sigma | tau: categorical over the grid, jittered within its log-spaced cell
+    unique_tau, inverse = np.unique(tau, return_inverse=True)
+    logp = _switch_point_log_posterior(stats, unique_tau, sigma, log_w, post['v0'])
+    probs = np.exp(logp - _logsumexp(logp, axis=1)[:, None])
+    cdf = np.cumsum(probs, axis=1)[inverse]
+    idx = np.minimum((cdf < rng.random(size)[:, None]).sum(axis=1), len(sigma) - 1)
+    step = np.log(sigma[1]) - np.log(sigma[0])
+    sigma_draw = sigma[idx] * np.exp(rng.uniform(-0.5, 0.5, size) * step)
+
+    var = sigma_draw * sigma_draw
+    out = {'tau': tau, 'sigma': sigma_draw}
+    for name, lo, hi in (('mu1', np.zeros_like(tau), tau + 1), ('mu2', tau + 1, np.full_like(tau, n))):
+        k, s, _ = stats.segment(lo, hi)
+        mean, post_var = _segment_mean_posterior(k, s, var, post['v0'], post['m0'])
+        out[name] = rng.normal(mean, np.sqrt(post_var))
+    return {name: values.reshape(chains, draws) for name, values in out.items()}
+
+
+def _run_exact_switch_point(data, draws=2000, chains=4, random_seed=None):
+    """Exact engine behind ``run_change_point_analysis(engine='exact')``."""
+    import arviz as az
+
+    with stage('change_point', 'exact_posterior'):
+        post = _exact_switch_point_posterior(data)
+    rng = np.random.default_rng(random_seed)
+    with stage('change_point', 'exact_draw') as timing:
+        samples = _draw_exact_posterior(post, draws, chains, rng)
+    record_draws('exact', 'exact', draws * chains, timing.seconds)
+    trace = az.from_dict(posterior=samples)
+
+    p, cond = post['tau_probs'], post['conditional']
+    tau_index = np.arange(len(p))
+    tau_mean = p @ tau_index
+    rows = {'tau': (tau_mean, np.sqrt(max(p @ tau_index ** 2 - tau_mean ** 2, 0.0)))}
+    for name in ('mu1', 'mu2', 'sigma'):
+        mean = p @ cond[name]
+        rows[name] = (mean, np.sqrt(max(p @ cond[name + '_sq'] - mean ** 2, 0.0)))
+    moments = pd.DataFrame.from_dict(rows, orient='index', columns=['mean', 'sd'])
+
+    result = {
+        'engine': 'exact',
+        'tau_probs': p,
+        'moments': moments,
+        'log_evidence': post['log_evidence'],
+    }
+    return trace, result
+
+
+def scan_change_points(df: pd.DataFrame, column='daily_return', window=504, step=21,
+                       grid_size=64):
+    """
+    Scan the series with a sliding window and find the most probable change
+    point inside each window under the single switch-point model.
+
+    Each window gets the exact posterior of ``engine='exact'`` (with priors
+    centred on the window's own mean and spread). Prefix sums of the whole
+    series are built once; as the window slides, every window's segment
+    statistics are differences of them, so no window is refitted from raw
+    data and the total cost is O(n_windows * window * grid_size), with all
+    windows of a block evaluated in one vectorized pass.
+
+    Parameters:
+        df (pd.DataFrame): Date-indexed DataFrame containing the time series data.
+        column (str): Column to analyze for change points.
+        window (int): Window length in observations (504 is about two trading years).
+        step (int): Observations between consecutive windows (21 is about a month).
+        grid_size (int): Points in the sigma quadrature grid.
+
+    Returns:
+        pd.DataFrame: One row per window, indexed by the window's last date, with
+        ``window_start``, the most probable ``change_date`` (first day of the new
+        regime; NaT when "no change inside the window" is most probable), its
+        ``change_probability``, the ``no_change_probability`` and the posterior
+        means of ``mu1``, ``mu2`` and ``sigma``.
+    """
+    series = df[column].dropna()
+    x = series.values.astype(float)
+    n, window = len(x), int(window)
+    if window < 2 or n < window:
+        raise ValueError(f"Need a window of at least 2 and at most {n} observations")
+
+    stats = CumulativeStats(x)
+    starts = np.arange(0, n - window + 1, max(int(step), 1))
+    offsets = np.arange(window)
+    results = {name: np.full(len(starts), np.nan)
+               for name in ('tau', 'change_probability', 'no_change_probability',
+                            'mu1', 'mu2', 'sigma')}
+    block = max(1, _EXACT_BLOCK_CELLS // (window * grid_size))
+
+    for first in range(0, len(starts), block):
+        rows = slice(first, first + block)
+        a = starts[rows][:, None]
+        _, s_tot, q_tot = stats.segment(a, a + window)
+        m0 = s_tot / window
+        v0 = q_tot / window - m0 * m0
+        valid = v0[:, 0] > 1e-12 * max(1.0, float(np.max(np.abs(q_tot))) / window)
+        if not valid.any():
+            continue
+        a, m0, v0 = a[valid], m0[valid], v0[valid]
+
+        # Segment statistics for every tau of every window, recentred on the window mean
+        k1, s1, _ = stats.segment(a, a + offsets + 1)
+        s1c = s1 - k1 * m0
+        sse = stats.sse(a, a + offsets + 1) + stats.sse(a + offsets + 1, a + window)
+        sigma, log_w = _sigma_grid(sse, window, grid_size)
+        var = sigma * sigma
+        shared = (-0.5 * (window * np.log(2.0 * np.pi * var) + window * v0 / var)
+                  + 0.5 * np.log(2.0 / np.pi) - 0.5 * var + log_w)
+
+        var3, v03 = var[:, None, :], v0[:, :, None]
+        k13, s13 = k1[:, :, None], s1c[:, :, None]
+        logp = (_segment_evidence(k13, s13, var3, v03)
+                + _segment_evidence(window - k13, -s13, var3, v03) + shared[:, None, :])
+        logp -= _logsumexp(logp.reshape(len(a), -1), axis=1)[:, None, None]
+        w = np.exp(logp)
+        tau_probs = w.sum(axis=2)
+
+        mean1, _ = _segment_mean_posterior(k13, s13, var3, v03, m0[:, :, None])
+        mean2, _ = _segment_mean_posterior(window - k13, -s13, var3, v03, m0[:, :, None])
+        tau_map = np.argmax(tau_probs, axis=1)
+        idx = np.flatnonzero(valid) + first
+        results['tau'][idx] = tau_map
+        results['change_probability'][idx] = tau_probs[np.arange(len(a)), tau_map]
+        results['no_change_probability'][idx] = tau_probs[:, -1]
+        results['mu1'][idx] = np.sum(w * mean1, axis=(1, 2)) + stats.shift
+        results['mu2'][idx] = np.sum(w * mean2, axis=(1, 2)) + stats.shift
+        results['sigma'][idx] = np.sum(w.sum(axis=1) * sigma, axis=1)
+
+    dates = series.index
+    tau = results.pop('tau')
+    has_change = np.isfinite(tau) & (tau < window - 1)
+    change_pos = starts + np.where(has_change, tau, 0).astype(np.int64) + 1
+    change_date = pd.Series(dates[np.minimum(change_pos, n - 1)]).where(has_change)
+    table = pd.DataFrame({
+        'window_start': dates[starts],
+        'change_date': change_date.values,
+        **results,
+    }, index=pd.Index(dates[starts + window - 1], name=dates.name or 'Date'))
+    return table
 
 
 def plot_trace(trace):
@@ -51,6 +630,9 @@ def plot_trace(trace):
     Parameters:
         trace (MultiTrace): PyMC3 trace object.
     """
+    import arviz as az
+    import matplotlib.pyplot as plt
+
     az.plot_trace(trace)
     plt.tight_layout()
     plt.show()
@@ -63,6 +645,8 @@ def summarize_results(trace):
     Parameters:
         trace (MultiTrace): PyMC3 trace object.
     """
+    import arviz as az
+
     summary = az.summary(trace, round_to=4)
     print(summary)
     return summary
@@ -0,0 +1,273 @@
+# src/columnar_store.py
+
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 2
+META_FILE = 'meta.json'
+
+# Chunks a column may have before an append merges them back into one file,
+# so that the store stays memory-mapped rather than concatenated on load
+MAX_CHUNKS = 8
+
+
+def save_columnar(df: pd.DataFrame, directory):
+    """
+    Save a date-indexed DataFrame as a directory of ``.npy`` column files plus
+    a ``meta.json`` header (column names, dtypes, row count, content version).
+
+    The index is stored as int64 nanoseconds and numeric columns keep their
+    dtype. Column files carry the content version in their names and
+    ``meta.json`` is replaced atomically last, so readers see either the old or
+    the new snapshot; files of the previous snapshot are then removed (readers
+    that already mapped them keep working on POSIX systems). Chunks added by
+    ``append_columnar`` are merged back into one file per column.
+
+    Args:
+        df (pd.DataFrame): DataFrame with a DatetimeIndex.
+        directory (str): Output directory, created if needed.
+
+    Returns:
+        dict: The metadata written.
+    """
+    arrays = _column_arrays(df)
+    version = _digest(arrays).hexdigest()[:16]
+
+    os.makedirs(directory, exist_ok=True)
+    old_meta = read_meta(directory)
+    if old_meta is not None and old_meta['version'] == version:
+        # Identical content; rewriting would truncate files other processes have mapped
+        return old_meta
+    files = {}
+    for i, (name, values) in enumerate(arrays.items()):
+        files[name] = [f"{i:03d}.{version}.npy"]
+        np.save(os.path.join(directory, files[name][0]), values, allow_pickle=False)
+
+    index_name = next(iter(arrays))
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'n_rows': len(df),
+        'index': index_name,
+        'columns': [name for name in arrays if name != index_name],
+        'dtypes': {name: ('datetime64[ns]' if name == index_name else values.dtype.str)
+                   for name, values in arrays.items()},
+        'files': files,
+    }
+    _write_meta(directory, meta)
+    if old_meta is not None:
+        _remove_files(directory, _chunk_files(old_meta))
+    return meta
+
+
+def append_columnar(df: pd.DataFrame, directory):
+    """
+    Append rows to a columnar store without rewriting it.
+
+    The rows are written as one more chunk file per column, listed after the
+    existing chunks in ``meta.json``, so an append costs time proportional to
+    the new rows only. Existing files are never modified and ``meta.json`` is
+    replaced atomically last, so readers keep seeing consistent snapshots. The
+    new content version hashes the previous one with the appended rows.
+
+    A store with several chunks is concatenated in memory when loaded, so once
+    a column would have more than ``MAX_CHUNKS`` chunks the append instead
+    rewrites each column as a single file (again replacing ``meta.json`` last
+    and then removing the old chunks). Appends thus cost O(new rows), plus
+    O(history) once every ``MAX_CHUNKS`` appends.
+
+    Args:
+        df (pd.DataFrame): Rows to append, with the store's index and columns,
+            all dated after the store's last row.
+        directory (str): Store written by ``save_columnar``.
+
+    Returns:
+        dict: The metadata written.
+
+    Raises:
+        FileNotFoundError: If there is no store at ``directory``.
+        ValueError: If the columns differ from the store's, the rows do not
+            follow its last date, or a column's values do not fit its dtype.
+    """
+    meta = read_meta(directory)
+    if meta is None:
+        raise FileNotFoundError(f"No columnar store at {directory}")
+    _check_format(meta)
+    if len(df) == 0:
+        return meta
+    arrays = _column_arrays(df)
+    index_name = next(iter(arrays))
+    if index_name != meta['index'] or list(arrays)[1:] != meta['columns']:
+        raise ValueError(f"Columns {list(arrays)} do not match columnar store {directory}")
+    last = last_index(directory)
+    if last is not None and arrays[index_name].min() <= last.value:
+        raise ValueError(f"Appended rows must be dated after {last}, the last row of {directory}")
+
+    dtypes = dict(meta['dtypes'])
+    for name, values in arrays.items():
+        if name == index_name:
+            continue
+        stored = np.dtype(dtypes[name])
+        if stored.kind == 'U':
+            # Chunks of strings may differ in width; loading concatenates them to the widest
+            values = values.astype(str)
+            dtypes[name] = max(stored, values.dtype, key=lambda dtype: dtype.itemsize).str
+        elif np.can_cast(values.dtype, stored, 'same_kind'):
+            values = values.astype(stored, copy=False)
+        else:
+            raise ValueError(f"Column '{name}' of {directory} is {stored}, "
+                             f"cannot append {values.dtype}")
+        arrays[name] = values
+
+    digest = _digest(arrays)
+    digest.update(meta['version'].encode())
+    version = digest.hexdigest()[:16]
+    files = {name: list(_chunks(meta, name)) for name in arrays}
+    obsolete = []
+    if len(files[index_name]) >= MAX_CHUNKS:
+        history, _ = load_columnar_arrays(directory, mmap=True)
+        for name in arrays:
+            old = history[name].view(np.int64) if name == index_name else history[name]
+            arrays[name] = np.concatenate([old, arrays[name]])
+            if name != index_name:
+                dtypes[name] = arrays[name].dtype.str
+        obsolete = _chunk_files(meta)
+        files = {name: [] for name in arrays}
+    for i, (name, values) in enumerate(arrays.items()):
+        chunk = f"{i:03d}.{version}.npy"
+        np.save(os.path.join(directory, chunk), values, allow_pickle=False)
+        files[name].append(chunk)
+
+    meta = dict(meta, format_version=FORMAT_VERSION, version=version,
+                n_rows=meta['n_rows'] + len(df), dtypes=dtypes, files=files)
+    _write_meta(directory, meta)
+    _remove_files(directory, obsolete)
+    return meta
+
+
+def last_index(directory):
+    """Last index value of a columnar store as a Timestamp, or None if it is missing or empty."""
+    meta = read_meta(directory)
+    if meta is None or not meta['n_rows']:
+        return None
+    _check_format(meta)
+    for chunk in reversed(_chunks(meta, meta['index'])):
+        values = np.load(os.path.join(directory, chunk), mmap_mode='r', allow_pickle=False)
+        if len(values):
+            return pd.Timestamp(int(values[-1]))
+    return None
+
+
+def _column_arrays(df):
+    """Index (as int64 nanoseconds) and columns of ``df`` as the arrays a store holds."""
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise ValueError("Columnar stores expect a DataFrame with a DatetimeIndex")
+    arrays = {df.index.name or 'Date': np.asarray(df.index, dtype='datetime64[ns]').view(np.int64)}
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype.kind not in 'biuf':
+            values = values.astype(str)
+        arrays[str(column)] = np.ascontiguousarray(values)
+    return arrays
+
+
+def _digest(arrays):
+    digest = hashlib.sha1()
+    for name, values in arrays.items():
+        digest.update(name.encode())
+        digest.update(values.dtype.str.encode())
+        digest.update(values.tobytes())
+    return digest
+
+
+def _chunks(meta, name):
+    """Chunk files of a column, oldest first (a single file name in format 1)."""
+    files = meta['files'][name]
+    return [files] if isinstance(files, str) else files
+
+
+def _chunk_files(meta):
+    return [chunk for name in meta['files'] for chunk in _chunks(meta, name)]
+
+
+def _remove_files(directory, names):
+    # Readers that already mapped them keep working on POSIX systems
+    for name in names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def _check_format(meta):
+    if meta['format_version'] > FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar store version {meta['format_version']}")
+
+
+def _write_meta(directory, meta):
+    tmp_path = os.path.join(directory, f"{META_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+
+def read_meta(directory):
+    """The ``meta.json`` header of a columnar store, or None if there is none."""
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_columnar_arrays(directory, columns=None, mmap=True):
+    """
+    Column arrays of a columnar store, memory-mapped read-only by default so
+    that every process reading the store shares one page-cache copy. Columns
+    with appended chunks are concatenated into memory instead.
+
+    Args:
+        directory (str): Store written by ``save_columnar``.
+        columns (list of str, optional): Columns to load. Defaults to all.
+        mmap (bool): Memory-map the files instead of reading them.
+
+    Returns:
+        tuple: (arrays dict with the index as datetime64[ns] first, meta dict).
+    """
+    meta = read_meta(directory)
+    if meta is None:
+        raise FileNotFoundError(f"No columnar store at {directory}")
+    _check_format(meta)
+    names = [meta['index']] + (meta['columns'] if columns is None else list(columns))
+    arrays = {}
+    for name in names:
+        if name not in meta['files']:
+            raise KeyError(f"Column '{name}' not in columnar store {directory}")
+        chunks = [np.load(os.path.join(directory, chunk), mmap_mode='r' if mmap else None,
+                          allow_pickle=False) for chunk in _chunks(meta, name)]
+        values = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        arrays[name] = values.view('datetime64[ns]') if name == meta['index'] else values
+    return arrays, meta
+
+
+def load_columnar(directory, columns=None, mmap=True):
+    """
+    Load a columnar store as a DataFrame indexed by date, without copying the
+    memory-mapped column data (columns with appended chunks are concatenated).
+
+    Args:
+        directory (str): Store written by ``save_columnar``.
+        columns (list of str, optional): Columns to load. Defaults to all.
+        mmap (bool): Memory-map the files instead of reading them.
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by datetime (read-only when memory-mapped).
+    """
+    arrays, meta = load_columnar_arrays(directory, columns, mmap)
+    index = pd.DatetimeIndex(arrays.pop(meta['index']), name=meta['index'])
+    return pd.DataFrame(arrays, index=index, copy=False)
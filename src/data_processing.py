@@ -1,8 +1,17 @@
 import pandas as pd
 import numpy as np
 import os
+import json
+import argparse
 from datetime import datetime
 
+try:
+    from .columnar_store import append_columnar, last_index, load_columnar, save_columnar
+    from .instrumentation import report_stages, stage
+except ImportError:
+    from columnar_store import append_columnar, last_index, load_columnar, save_columnar
+    from instrumentation import report_stages, stage
+
 def load_and_clean_data(filepath):
     """
     Load Brent oil price data from a CSV file, clean and preprocess it.
@@ -55,6 +64,163 @@ def load_and_clean_data(filepath):
         print(f"Data loading failed: {e}")
         return None
 
+# Date formats tried, in order, when sniffing a raw file
+DATE_FORMATS = (
+    '%d-%b-%y', '%b %d, %Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M', '%d-%b-%Y', '%d/%m/%Y', '%m/%d/%Y', '%Y%m%d', '%d.%m.%Y',
+)
+
+
+def detect_date_formats(values, candidates=DATE_FORMATS):
+    """
+    Explicit formats that together parse a sample of date strings.
+
+    Formats are chosen greedily, each one covering as many of the still
+    unparsed values as possible, until every value is covered or no
+    candidate helps.
+
+    Args:
+        values (array-like): Sample of raw date strings.
+        candidates (sequence of str): strptime formats to consider.
+
+    Returns:
+        list of str: Formats to try in order.
+    """
+    remaining = pd.Series(pd.unique(pd.Series(values).dropna().astype(str).str.strip()))
+    formats = []
+    while len(remaining) and len(formats) < len(candidates):
+        best, best_parsed = None, None
+        for fmt in candidates:
+            if fmt in formats:
+                continue
+            parsed = pd.to_datetime(remaining, format=fmt, errors='coerce').notna()
+            if best_parsed is None or parsed.sum() > best_parsed.sum():
+                best, best_parsed = fmt, parsed
+        if best_parsed is None or not best_parsed.any():
+            break
+        formats.append(best)
+        remaining = remaining[~best_parsed.values]
+    return formats
+
+
+def _parse_dates(values, formats):
+    """Parse strings with each explicit format in turn; unparsed values stay NaT."""
+    values = values.astype(str).str.strip()
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        todo = dates.isna()
+        if not todo.any():
+            break
+        dates[todo] = pd.to_datetime(values[todo], format=fmt, errors='coerce')
+    return dates
+
+
+def _standard_column_names(columns):
+    """Map the date and price columns of a raw file to 'Date' and 'Price'."""
+    renames = {}
+    if 'Date' not in columns:
+        date_col = [col for col in columns if col.lower() == 'date']
+        if not date_col:
+            raise ValueError("Missing 'Date' column")
+        renames[date_col[0]] = 'Date'
+    if 'Price' not in columns:
+        price_col = [col for col in columns if col.lower() in ['price', 'value', 'close']]
+        if not price_col:
+            raise ValueError("Missing 'Price' column")
+        renames[price_col[0]] = 'Price'
+    return renames
+
+
+def load_and_clean_data_chunked(filepath, chunksize=1_000_000, date_formats=None,
+                                instrument_column=None, sample_size=10_000):
+    """
+    Load and clean a large raw price file in bounded-memory chunks.
+
+    Unlike ``load_and_clean_data``, dates are parsed with explicit formats:
+    they are detected once from a sample of the first chunk (mixed files such
+    as ``20-May-87`` alongside ISO dates get several formats, tried in turn)
+    unless given. Each chunk is parsed vectorized, ``Price`` is kept as
+    float64, other numeric columns are downcast and text columns become
+    categoricals. Rows whose date cannot be parsed are dropped and counted,
+    and prices that are missing or not numeric are counted before being
+    interpolated as in ``load_and_clean_data``.
+
+    Args:
+        filepath (str): Path to the raw data CSV file
+        chunksize (int): Rows read per chunk
+        date_formats (list of str, optional): Explicit strptime formats. Detected if omitted.
+        instrument_column (str, optional): Column identifying the instrument in
+            multi-benchmark files; prices are interpolated per instrument.
+        sample_size (int): Rows of the first chunk used for format detection
+
+    Returns:
+        tuple: (cleaned DataFrame indexed by date, per-chunk report DataFrame with
+        ``rows``, ``rejected_dates``, ``invalid_prices`` and sample rejected values)
+    """
+    print(f"Loading data in chunks of {chunksize} rows from: {filepath}")
+    formats = list(date_formats) if date_formats else None
+    frames, report = [], []
+    reader = pd.read_csv(filepath, chunksize=chunksize, dtype=str, keep_default_na=False,
+                         na_values=[''])
+    for i, chunk in enumerate(reader):
+        chunk = chunk.rename(columns=_standard_column_names(chunk.columns))
+        if formats is None:
+            formats = detect_date_formats(chunk['Date'].head(sample_size))
+            print(f"Detected date formats: {formats}")
+        dates = _parse_dates(chunk['Date'], formats)
+        bad_dates = dates.isna()
+        if bad_dates.any() and date_formats is None:
+            # Formats that only appear later in the file are detected on the rejected values
+            extra = [fmt for fmt in detect_date_formats(chunk['Date'][bad_dates]) if fmt not in formats]
+            if extra:
+                formats += extra
+                print(f"Added date formats: {extra}")
+                dates = _parse_dates(chunk['Date'], formats)
+                bad_dates = dates.isna()
+
+        prices = pd.to_numeric(chunk['Price'], errors='coerce')
+        report.append({
+            'chunk': i,
+            'rows': len(chunk),
+            'rejected_dates': int(bad_dates.sum()),
+            'invalid_prices': int((prices.isna() & ~bad_dates).sum()),
+            'rejected_samples': chunk.loc[bad_dates, 'Date'].head(5).tolist(),
+        })
+
+        chunk = chunk.assign(Date=dates, Price=prices)[~bad_dates]
+        for column in chunk.columns.difference(['Date', 'Price']):
+            numeric = pd.to_numeric(chunk[column], errors='coerce')
+            if numeric.notna().sum() == chunk[column].notna().sum():
+                chunk[column] = pd.to_numeric(numeric, downcast='float' if (numeric % 1).any() else 'integer')
+            else:
+                chunk[column] = chunk[column].astype('category')
+        frames.append(chunk)
+
+    report = pd.DataFrame(report, columns=['chunk', 'rows', 'rejected_dates', 'invalid_prices',
+                                           'rejected_samples'])
+    if not frames:
+        return pd.DataFrame(columns=['Price'], index=pd.DatetimeIndex([], name='Date')), report
+    df = pd.concat(frames, ignore_index=True)
+    df = df.sort_values('Date', kind='stable').set_index('Date')
+    for column in df.columns:
+        # Chunks with different categories concatenate to plain strings
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = df[column].astype('category')
+
+    # Handle missing price values
+    if instrument_column is None:
+        df['Price'] = df['Price'].interpolate(method='time')
+    else:
+        df['Price'] = df.groupby(instrument_column, observed=True)['Price'].transform(
+            lambda price: price.interpolate(method='time'))
+    df.dropna(subset=['Price'], inplace=True)
+
+    rejected = int(report['rejected_dates'].sum())
+    print(f"Data loaded: {df.shape[0]} records from {df.index.min()} to {df.index.max()}; "
+          f"{rejected} rows rejected for unparseable dates")
+    return df, report
+
+
 def calculate_daily_returns(df):
     """
     Compute daily percentage return of Brent oil price.
@@ -82,35 +248,361 @@ def calculate_volatility(df, window=30):
     df['volatility'] = df['daily_return'].rolling(window=window).std()
     return df
 
-def save_processed_data(df, output_path):
+def calculate_panel_features(prices, window=30, instrument_column=None, value_column='Price'):
     """
-    Save processed DataFrame to a CSV file.
+    Compute daily returns, log returns and rolling volatility for many
+    instruments at once.
+
+    Each instrument follows its own trading calendar: a return is taken
+    against the instrument's previous observed price (gaps and holidays are
+    skipped, not treated as zero or missing returns), and its volatility is
+    the standard deviation of its last ``window`` observed returns. All
+    instruments are processed in a single pass: observed prices are packed
+    instrument by instrument, returns are ratios of neighbouring packed
+    values and rolling sums come from cumulative sums over the packed
+    returns, so the cost does not grow with a Python loop over instruments.
+
+    Args:
+        prices (pd.DataFrame): Wide table (date index x instrument columns), or a
+            long table indexed by date with ``instrument_column`` and ``value_column``
+        window (int): Rolling volatility window in observations (default=30)
+        instrument_column (str, optional): Instrument column of a long table
+        value_column (str): Price column of a long table
+
+    Returns:
+        pd.DataFrame: Date-indexed frame with (feature, instrument) columns, where
+        feature is ``daily_return`` (percent), ``log_return`` or ``volatility``
+        (of ``daily_return``, like ``calculate_volatility``)
+    """
+    if instrument_column is not None:
+        prices = prices.set_index(instrument_column, append=True)[value_column].unstack(instrument_column)
+    n_rows, n_cols = prices.shape
+    # Instrument-major layout: one contiguous row of prices per instrument
+    price = np.ascontiguousarray(prices.to_numpy(dtype=float).T).ravel()
+    observed = np.isfinite(price)
+
+    # Observed prices packed instrument by instrument; consecutive packed values of
+    # one instrument are consecutive trading days on its own calendar.
+    packed = price[observed]
+    counts = observed.reshape(n_cols, n_rows).sum(axis=1)
+    first = np.zeros(len(packed), dtype=bool)
+    first[np.cumsum(counts)[:-1][counts[1:] > 0]] = True
+    first[:1] = True
+
+    ratio = np.empty(len(packed))
+    ratio[:1] = np.nan
+    np.divide(packed[1:], packed[:-1], out=ratio[1:])
+    ratio[first] = np.nan
+
+    # One output block of shape (feature x instrument, date), filled in place
+    out = np.full((3, n_cols * n_rows), np.nan)
+    daily_return, log_return, volatility = out
+    log_return[observed] = np.log(ratio)
+    ratio -= 1
+    ratio *= 100
+    daily_return[observed] = ratio
+
+    if window > 1 and len(packed):
+        # A window is complete when no instrument starts within its last `window` returns
+        starts = np.cumsum(first)
+        complete = np.zeros(len(packed), dtype=bool)
+        complete[window:] = starts[window:] == starts[:-window]
+        # Centre each instrument on its mean to keep the sums of squares well conditioned
+        present = counts[counts > 0]
+        centred = np.nan_to_num(ratio, nan=0.0)
+        centred -= np.repeat(np.add.reduceat(centred, np.flatnonzero(first)) / np.maximum(present - 1, 1),
+                             present)
+        centred[first] = 0.0
+        s1 = np.zeros(len(packed) + 1)
+        s2 = np.zeros(len(packed) + 1)
+        np.cumsum(centred, out=s1[1:])
+        np.cumsum(np.square(centred, out=centred), out=s2[1:])
+        # variance = (sum of squares - sum^2 / window) / (window - 1), computed in place
+        variance = np.full(len(packed), np.nan)
+        total = np.subtract(s1[window + 1:], s1[1:-window])
+        np.square(total, out=total)
+        total /= window
+        rolling = np.subtract(s2[window + 1:], s2[1:-window], out=variance[window:])
+        rolling -= total
+        np.maximum(rolling, 0.0, out=rolling)
+        rolling /= window - 1
+        variance[~complete] = np.nan
+        volatility[observed] = np.sqrt(variance)
+
+    columns = pd.MultiIndex.from_product([['daily_return', 'log_return', 'volatility'], prices.columns],
+                                         names=['feature', prices.columns.name or 'instrument'])
+    return pd.DataFrame(out.reshape(3 * n_cols, n_rows).T, index=prices.index, columns=columns,
+                        copy=False)
+
+
+def save_processed_data(df, output_path, format='csv'):
+    """
+    Save processed DataFrame to a CSV file or to a binary columnar store.
 
     Args:
         df (pd.DataFrame): DataFrame to save
-        output_path (str): Path to output CSV
+        output_path (str): Path to output CSV, or the store directory for ``'npy'``
+        format (str): ``'csv'`` (text export) or ``'npy'`` (a directory of
+            ``.npy`` columns with a metadata header, see ``columnar_store``;
+            it loads memory-mapped in near-constant time)
     """
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path)
+    if format == 'npy':
+        save_columnar(df, output_path)
+    elif format == 'csv':
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        df.to_csv(output_path)
+    else:
+        raise ValueError(f"Unknown format '{format}', expected 'csv' or 'npy'")
     print(f"Data saved to: {output_path}")
 
-def main():
+
+def load_processed_data(path, mmap=True):
+    """
+    Load processed data saved by ``save_processed_data`` in either format:
+    a columnar store directory is memory-mapped, a CSV is parsed.
+
+    Args:
+        path (str): CSV file or columnar store directory
+        mmap (bool): Memory-map a columnar store instead of reading it
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by datetime
+    """
+    if os.path.isdir(path):
+        return load_columnar(path, mmap=mmap)
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+def _state_path(processed_path):
+    return f"{processed_path}.state.json"
+
+
+def _save_state(processed_path, state):
+    tmp_path = f"{_state_path(processed_path)}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _state_path(processed_path))
+
+
+def _load_state(processed_path):
+    try:
+        with open(_state_path(processed_path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _make_state(df, raw_offset, window):
+    """Everything an incremental run needs to continue after the last processed row."""
+    return {
+        'raw_offset': raw_offset,
+        'last_date': df.index[-1].isoformat(),
+        'last_price': float(df['Price'].iloc[-1]),
+        'window': window,
+        # Most recent daily returns, oldest first (NaN is stored as None)
+        'returns': [None if pd.isna(r) else float(r) for r in df['daily_return'].iloc[-window:]],
+    }
+
+
+def _rebuild_processed_data(raw_path, processed_path, window):
+    raw_offset = os.path.getsize(raw_path)
+    df = load_and_clean_data(raw_path)
+    if df is None:
+        return None
+    df = calculate_daily_returns(df)
+    df = calculate_volatility(df, window=window)
+    save_processed_data(df, processed_path)
+    _save_state(processed_path, _make_state(df, raw_offset, window))
+    return df
+
+
+def update_processed_data(raw_path, processed_path, window=30, binary_path=None):
+    """
+    Bring the processed CSV up to date with rows appended to the raw file.
+
+    Only the bytes added to the raw file since the last run are read. Rows
+    newer than the last processed date get their ``daily_return`` from the
+    carried-over last price and their ``volatility`` from running sums over
+    the last ``window`` returns, and are appended to the processed CSV
+    without rewriting it. The carried-over state is kept next to the
+    processed file in ``<processed_path>.state.json``.
+
+    Rows are written to the CSV (and the columnar store) before the state is
+    saved, so a run that crashes in between leaves them written but not
+    recorded; the next run reads them again but only appends the rows dated
+    after the outputs' last rows, which makes the update idempotent.
+
+    Falls back to a full rebuild when there is no processed file or state,
+    when the window changed, or when the raw file shrank (i.e. was rewritten
+    rather than appended to).
+
+    Args:
+        raw_path (str): Path to the raw data CSV file
+        processed_path (str): Path to the processed CSV
+        window (int): Rolling volatility window (default=30)
+        binary_path (str, optional): Columnar store to keep in sync. The new
+            rows are appended to it as one more chunk per column, without
+            reading or rewriting its history; it is rebuilt from the processed
+            CSV only if missing or not ending at the last processed date (or
+            at one of the new rows, after a crash).
+
+    Returns:
+        pd.DataFrame: The newly processed rows (every row after a rebuild),
+        or None if loading failed.
+    """
+    state = _load_state(processed_path)
+    raw_size = os.path.getsize(raw_path)
+    if (state is None or not os.path.exists(processed_path) or state['window'] != window
+            or raw_size < state['raw_offset']):
+        print("No usable incremental state, rebuilding processed data")
+        df = _rebuild_processed_data(raw_path, processed_path, window)
+        if df is not None and binary_path is not None:
+            save_processed_data(df, binary_path, format='npy')
+        return df
+
+    with open(raw_path, 'rb') as f:
+        header = f.readline()
+        f.seek(state['raw_offset'])
+        new_bytes = f.read(raw_size - state['raw_offset'])
+    # Only complete lines are consumed; a partially written last line waits for the next run
+    new_bytes = new_bytes[:new_bytes.rfind(b'\n') + 1]
+    raw_offset = state['raw_offset'] + len(new_bytes)
+
+    last_date = pd.Timestamp(state['last_date'])
+    new = _clean_new_rows(header + new_bytes, last_date, state['last_price'])
+    if new.empty:
+        state['raw_offset'] = raw_offset
+        _save_state(processed_path, state)
+        print("No new rows to process")
+        return new
+
+    # Carried state: last price and running sums over the volatility window
+    prices = new['Price'].to_numpy(dtype=float)
+    previous = np.concatenate(([state['last_price']], prices[:-1]))
+    returns = (prices / previous - 1) * 100
+    recent = [np.nan if r is None else r for r in state['returns']]
+    finite = [r for r in recent if not np.isnan(r)]
+    total, total_sq, count = sum(finite), sum(r * r for r in finite), len(finite)
+    volatility = np.full(len(returns), np.nan)
+    for i, r in enumerate(returns):
+        recent.append(r)
+        if not np.isnan(r):
+            total, total_sq, count = total + r, total_sq + r * r, count + 1
+        if len(recent) > window:
+            dropped = recent.pop(0)
+            if not np.isnan(dropped):
+                total, total_sq, count = total - dropped, total_sq - dropped * dropped, count - 1
+        if count == window and window > 1:
+            volatility[i] = np.sqrt(max(total_sq - total * total / window, 0.0) / (window - 1))
+
+    new['daily_return'] = returns
+    new['volatility'] = volatility
+    columns = pd.read_csv(processed_path, nrows=0, index_col=0).columns
+    # A run that crashed before saving its state may already have appended some of
+    # these rows; the carried state still covers them, but they are written only once
+    written = _last_processed_date(processed_path)
+    unwritten = new if written is None else new[new.index > written]
+    unwritten.reindex(columns=columns).to_csv(processed_path, mode='a', header=False)
+
+    if binary_path is not None:
+        stored = last_index(binary_path)
+        if stored is not None and (stored == last_date or stored in new.index):
+            unstored = new[new.index > stored]
+            append_columnar(unstored.reindex(columns=columns), binary_path)
+            print(f"Appended {len(unstored)} rows to: {binary_path}")
+        else:
+            print("Columnar store out of step with the processed CSV, rebuilding it")
+            save_processed_data(load_processed_data(processed_path), binary_path, format='npy')
+
+    state.update(_make_state(new, raw_offset, window))
+    state['returns'] = [None if np.isnan(r) else float(r) for r in recent]
+    _save_state(processed_path, state)
+    print(f"Appended {len(unwritten)} rows up to {new.index.max().date()} to: {processed_path}")
+    return new
+
+
+def _last_processed_date(processed_path):
+    """
+    Date of the last complete row of the processed CSV, read from its tail, or
+    None if it has no rows. A partially written last line is cut off.
+    """
+    with open(processed_path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        tail_start = max(size - 4096, 0)
+        f.seek(tail_start)
+        tail = f.read()
+        if tail and not tail.endswith(b'\n'):
+            f.truncate(tail_start + tail.rfind(b'\n') + 1)
+            tail = tail[:tail.rfind(b'\n') + 1]
+    for line in reversed(tail.splitlines()):
+        if line.strip():
+            try:
+                return pd.Timestamp(line.split(b',', 1)[0].decode())
+            except ValueError:
+                # Header line: no rows yet
+                return None
+    return None
+
+
+def _clean_new_rows(csv_bytes, last_date, last_price):
+    """Clean raw rows as ``load_and_clean_data`` does and keep those after ``last_date``."""
+    import io
+    df = pd.read_csv(io.BytesIO(csv_bytes))
+    df.columns = ['Date' if c.lower() == 'date' else
+                  'Price' if c.lower() in ['price', 'value', 'close'] else c for c in df.columns]
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df = df.dropna(subset=['Date']).sort_values('Date').set_index('Date')
+    df = df[df.index > last_date]
+    df['Price'] = pd.to_numeric(df['Price'], errors='coerce')
+    if df['Price'].isna().any():
+        # Interpolate in time from the last processed price, as the full pipeline does
+        anchor = pd.DataFrame({'Price': [last_price]}, index=pd.DatetimeIndex([last_date]))
+        df['Price'] = pd.concat([anchor, df[['Price']]])['Price'].interpolate(method='time').iloc[1:]
+        df = df.dropna(subset=['Price'])
+    return df
+
+
+def main(incremental=False):
     """
     Script entry point for testing the data processing pipeline
+
+    Args:
+        incremental (bool): Only process rows added to the raw file since the
+            last run (see ``update_processed_data``).
     """
     print("=== Running Brent Oil Data Processor ===")
     raw_path = '../data/BrentOilPrices.csv'
     processed_path = '../data/processed/brent_clean.csv'
+    binary_path = '../data/processed/brent_clean'
 
-    df = load_and_clean_data(raw_path)
+    if incremental:
+        with stage('data_processing', 'incremental_update'):
+            new = update_processed_data(raw_path, processed_path, binary_path=binary_path)
+        if new is None:
+            print("Data processing failed.")
+        report_stages('data_processing')
+        return
+
+    with stage('data_processing', 'load_and_clean'):
+        df = load_and_clean_data(raw_path)
 
     if df is not None:
-        df = calculate_daily_returns(df)
-        df = calculate_volatility(df)
+        with stage('data_processing', 'daily_returns'):
+            df = calculate_daily_returns(df)
+        with stage('data_processing', 'volatility'):
+            df = calculate_volatility(df)
         print(df.head())
-        save_processed_data(df, processed_path)
+        with stage('data_processing', 'save_csv'):
+            save_processed_data(df, processed_path)
+        with stage('data_processing', 'save_npy'):
+            save_processed_data(df, binary_path, format='npy')
+        with stage('data_processing', 'save_state'):
+            _save_state(processed_path, _make_state(df, os.path.getsize(raw_path), 30))
     else:
         print("Data processing failed.")
+    report_stages('data_processing')
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Clean Brent oil prices and compute returns and volatility")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only process rows added to the raw file since the last run")
+    main(parser.parse_args().incremental)
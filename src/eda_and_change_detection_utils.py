@@ -1,20 +1,22 @@
 # eda_and_change_detection_utils.py
 
+import functools
 import pandas as pd
 import os
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import seaborn as sns
-from statsmodels.tsa.stattools import adfuller, kpss
-from statsmodels.tsa.seasonal import seasonal_decompose
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 import warnings
 
-# Suppress all warnings for a cleaner output
-warnings.filterwarnings('ignore')
-
-# Set a consistent style for plots
-sns.set(style="whitegrid")
+try:
+    from .autocorrelation import acf, durbin_levinson, plot_correlogram
+    from .columnar_store import load_columnar
+    from .instrumentation import report_stages, stage
+    from .plot_aggregation import MAX_EVENT_LABELS, draw_event_lines, plot_aggregated
+    from .report_rendering import render_report
+except ImportError:
+    from autocorrelation import acf, durbin_levinson, plot_correlogram
+    from columnar_store import load_columnar
+    from instrumentation import report_stages, stage
+    from plot_aggregation import MAX_EVENT_LABELS, draw_event_lines, plot_aggregated
+    from report_rendering import render_report
 
 # Get the absolute path of the script's directory and then the project root.
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -24,16 +26,32 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 REPORTS_DIR = os.path.join(PROJECT_ROOT, 'reports')
 DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 
-# Ensure directories exist
-os.makedirs(os.path.join(REPORTS_DIR, 'figures'), exist_ok=True)
-os.makedirs(os.path.join(DATA_DIR, 'processed'), exist_ok=True)
+@functools.lru_cache(maxsize=None)
+def _pyplot():
+    """
+    matplotlib's pyplot, imported on first use with the seaborn style of the
+    report applied. Plotting and statistics libraries take seconds to load, so
+    they are imported by the functions that need them rather than with this module.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set(style="whitegrid")
+    return plt
+
+def _figure_path(filename):
+    """Path of a figure in ``REPORTS_DIR/figures``, creating the directory if needed."""
+    figures_dir = os.path.join(REPORTS_DIR, 'figures')
+    os.makedirs(figures_dir, exist_ok=True)
+    return os.path.join(figures_dir, filename)
 
 def load_cleaned_data(filename: str = 'brent_clean.csv'):
     """
     Load the cleaned Brent oil price data from the data/processed directory.
 
     Args:
-        filename (str): The name of the data file.
+        filename (str): The name of the data file, or of a columnar store
+            directory (memory-mapped instead of parsed).
 
     Returns:
         pd.DataFrame: DataFrame indexed by datetime.
@@ -41,7 +59,10 @@ def load_cleaned_data(filename: str = 'brent_clean.csv'):
     data_path = os.path.join(DATA_DIR, 'processed', filename)
     try:
         print(f"Attempting to load data from: {data_path}")
-        df = pd.read_csv(data_path, index_col=0, parse_dates=True)
+        if os.path.isdir(data_path):
+            df = load_columnar(data_path)
+        else:
+            df = pd.read_csv(data_path, index_col=0, parse_dates=True)
         print(f"Data loaded: {df.shape} from {df.index.min()} to {df.index.max()}")
         return df
     except FileNotFoundError:
@@ -74,28 +95,43 @@ def compile_event_metadata():
     print(f"Compiled {len(df_events)} events.")
     return df_events
 
-def plot_and_save(df, column, title, filename, y_label=None):
-    """Plot a time series and save the figure."""
+def plot_and_save(df, column, title, filename, y_label=None, save_path=None, aggregate=False):
+    """
+    Plot a time series and save the figure (to reports/figures/filename unless save_path is given).
+    With aggregate=True only the points visible at the figure's resolution are drawn.
+    """
+    plt = _pyplot()
     plt.figure(figsize=(14, 6))
-    plt.plot(df.index, df[column], label=column)
+    if aggregate:
+        plot_aggregated(plt.gca(), df.index, df[column], label=column)
+    else:
+        plt.plot(df.index, df[column], label=column)
     plt.title(title, fontsize=16)
     plt.xlabel("Date")
     plt.ylabel(y_label if y_label else column)
     plt.legend()
     plt.tight_layout()
-    save_path = os.path.join(REPORTS_DIR, 'figures', filename)
+    save_path = save_path or _figure_path(filename)
     plt.savefig(save_path)
     plt.show()
     plt.close()
     print(f"Saved plot: {save_path}")
 
-def plot_rolling_means(df):
-    """Plots the time series with rolling mean overlays."""
-    save_path = os.path.join(REPORTS_DIR, 'figures', "rolling_means.png")
+def plot_rolling_means(df, save_path=None, aggregate=False):
+    """Plots the time series with rolling mean overlays (pixel-aggregated if aggregate=True)."""
+    plt = _pyplot()
+    save_path = save_path or _figure_path("rolling_means.png")
     plt.figure(figsize=(14, 6))
-    plt.plot(df['Price'], label='Original Price', alpha=0.6)
-    df['Price'].rolling(window=30).mean().plot(label='30-day MA', linestyle='--')
-    df['Price'].rolling(window=90).mean().plot(label='90-day MA', linestyle='--')
+    if aggregate:
+        ax = plt.gca()
+        plot_aggregated(ax, df.index, df['Price'], label='Original Price', alpha=0.6)
+        for window in (30, 90):
+            plot_aggregated(ax, df.index, df['Price'].rolling(window=window).mean(),
+                            label=f'{window}-day MA', linestyle='--')
+    else:
+        plt.plot(df['Price'], label='Original Price', alpha=0.6)
+        df['Price'].rolling(window=30).mean().plot(label='30-day MA', linestyle='--')
+        df['Price'].rolling(window=90).mean().plot(label='90-day MA', linestyle='--')
     plt.title("Brent Oil Price with Rolling Means", fontsize=16)
     plt.xlabel("Date")
     plt.ylabel("Price (USD)")
@@ -106,9 +142,11 @@ def plot_rolling_means(df):
     plt.close()
     print(f"Plot saved to {save_path}")
 
-def decompose_seasonality(df):
+def decompose_seasonality(df, save_path=None):
     """Decomposes the time series into trend, seasonal, and residual components."""
-    save_path = os.path.join(REPORTS_DIR, 'figures', "seasonal_decomposition.png")
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    plt = _pyplot()
+    save_path = save_path or _figure_path("seasonal_decomposition.png")
     df_monthly = df['Price'].resample('M').mean()
     if len(df_monthly.dropna()) < 24:
         print("Not enough data to perform seasonal decomposition.")
@@ -123,9 +161,11 @@ def decompose_seasonality(df):
     plt.close()
     print(f"Plot saved to {save_path}")
 
-def plot_distribution_of_returns(df):
+def plot_distribution_of_returns(df, save_path=None):
     """Plots a histogram of daily returns to analyze their distribution."""
-    save_path = os.path.join(REPORTS_DIR, 'figures', "daily_return_distribution.png")
+    import seaborn as sns
+    plt = _pyplot()
+    save_path = save_path or _figure_path("daily_return_distribution.png")
     plt.figure(figsize=(10, 5))
     sns.histplot(df['daily_return'].dropna() * 100, bins=100, kde=True, color='orange')
     plt.title("Distribution of Daily Returns", fontsize=16)
@@ -137,32 +177,41 @@ def plot_distribution_of_returns(df):
     plt.close()
     print(f"Plot saved to {save_path}")
 
-def plot_acf_pacf(df):
+def plot_acf_pacf(df, save_path=None):
     """Plots the Autocorrelation Function (ACF) and Partial Autocorrelation Function (PACF)."""
-    save_path = os.path.join(REPORTS_DIR, 'figures', "acf_pacf.png")
+    plt = _pyplot()
+    save_path = save_path or _figure_path("acf_pacf.png")
+    returns = df['daily_return'].dropna()
+    acf_values = acf(returns.values, nlags=50)
     fig, axes = plt.subplots(1, 2, figsize=(16, 6))
-    plot_acf(df['daily_return'].dropna(), ax=axes[0], lags=50)
-    plot_pacf(df['daily_return'].dropna(), ax=axes[1], lags=50)
-    axes[0].set_title("Autocorrelation (ACF)")
-    axes[1].set_title("Partial Autocorrelation (PACF)")
+    plot_correlogram(axes[0], acf_values, len(returns), "Autocorrelation (ACF)")
+    plot_correlogram(axes[1], durbin_levinson(acf_values), len(returns),
+                     "Partial Autocorrelation (PACF)", partial=True)
     plt.tight_layout()
     plt.savefig(save_path)
     plt.show()
     plt.close()
     print(f"Plot saved to {save_path}")
 
-def plot_price_with_events(df, df_events):
-    """Plots the Brent oil price time series with key events as vertical lines."""
-    save_path = os.path.join(REPORTS_DIR, 'figures', 'price_with_events.png')
+def plot_price_with_events(df, df_events, save_path=None, aggregate=False):
+    """
+    Plots the Brent oil price time series with key events as vertical lines
+    (labelled when there are at most MAX_EVENT_LABELS events).
+    With aggregate=True only the price points visible at the figure's resolution are drawn.
+    """
+    import matplotlib.dates as mdates
+    plt = _pyplot()
+    save_path = save_path or _figure_path('price_with_events.png')
     print(f"Generating plot with events: {save_path}")
     plt.style.use('seaborn-v0_8-whitegrid')
     fig, ax = plt.subplots(figsize=(16, 8))
-    ax.plot(df.index, df['Price'], label='Brent Oil Price', color='cornflowerblue')
-    for _, event in df_events.iterrows():
-        ax.axvline(event['Date'], color='red', linestyle='--', alpha=0.7, linewidth=1)
-        ax.text(event['Date'], df['Price'].max() * 0.95, event['Description'], 
-                rotation=90, va='bottom', ha='left', color='red', fontsize=8,
-                bbox=dict(boxstyle='round,pad=0.2', fc='yellow', alpha=0.5, ec='black', lw=0.5))
+    if aggregate:
+        plot_aggregated(ax, df.index, df['Price'], label='Brent Oil Price', color='cornflowerblue')
+    else:
+        ax.plot(df.index, df['Price'], label='Brent Oil Price', color='cornflowerblue')
+    draw_event_lines(ax, df_events['Date'], df_events['Description'], label_y=df['Price'].max() * 0.95,
+                     max_labels=MAX_EVENT_LABELS, color='red', linestyle='--', alpha=0.7,
+                     linewidth=1)
     ax.set_title('Brent Oil Price with Key Historical Events', fontsize=18, pad=20)
     ax.set_xlabel('Date')
     ax.set_ylabel('Price (USD)')
@@ -178,6 +227,8 @@ def plot_price_with_events(df, df_events):
 
 def stationarity_tests(series):
     """Perform ADF and KPSS stationarity tests on a series."""
+    from statsmodels.tsa.stattools import adfuller, kpss
+
     print("\n--- Running Stationarity Tests ---")
     print("Augmented Dickey-Fuller (ADF) Test:")
     adf_result = adfuller(series.dropna())
@@ -192,37 +243,70 @@ def stationarity_tests(series):
         "kpss_pvalue": kpss_result[1]
     }
 
+def report_figures(df_events):
+    """
+    Figure specifications of the EDA and change detection report for ``render_report``.
+
+    Args:
+        df_events (pd.DataFrame): Events drawn on the price chart.
+
+    Returns:
+        list of dict: One specification per figure.
+    """
+    figures_dir = os.path.join(REPORTS_DIR, 'figures')
+    series = [("Price", "Brent Oil Price (USD)", "price_plot.png", "Price (USD)"),
+              ("daily_return", "Daily Returns", "daily_return_plot.png", "Daily Return"),
+              ("volatility", "Rolling Volatility (30-day Annualized)", "volatility_plot.png", "Volatility")]
+    figures = [{'name': filename[:-4], 'function': plot_and_save, 'columns': [column],
+                'args': (column, title, filename, y_label),
+                'kwargs': {'save_path': os.path.join(figures_dir, filename), 'aggregate': True},
+                'output': os.path.join(figures_dir, filename)}
+               for column, title, filename, y_label in series]
+    for name, function, column in [('rolling_means', plot_rolling_means, 'Price'),
+                                   ('seasonal_decomposition', decompose_seasonality, 'Price'),
+                                   ('daily_return_distribution', plot_distribution_of_returns, 'daily_return'),
+                                   ('acf_pacf', plot_acf_pacf, 'daily_return')]:
+        output = os.path.join(figures_dir, f"{name}.png")
+        kwargs = {'save_path': output}
+        if function is plot_rolling_means:
+            kwargs['aggregate'] = True
+        figures.append({'name': name, 'function': function, 'columns': [column],
+                        'kwargs': kwargs, 'output': output})
+    output = os.path.join(figures_dir, 'price_with_events.png')
+    figures.append({'name': 'price_with_events', 'function': plot_price_with_events,
+                    'columns': ['Price'], 'args': (df_events,),
+                    'kwargs': {'save_path': output, 'aggregate': True}, 'output': output})
+    return figures
+
 def main():
     """
     Main function to run the full EDA and change detection pipeline.
     """
     print("=== Starting Analysis Pipeline ===")
+    # Suppress all warnings for a cleaner output
+    warnings.filterwarnings('ignore')
     
-    df = load_cleaned_data()
+    with stage('eda_and_change_detection', 'load'):
+        df = load_cleaned_data()
     if df is None:
         print("Failed to load data. Exiting.")
         return
 
-    df['daily_return'] = df['Price'].pct_change()
-    df['volatility'] = df['daily_return'].rolling(window=30).std() * (252**0.5)
+    with stage('eda_and_change_detection', 'features'):
+        df['daily_return'] = df['Price'].pct_change()
+        df['volatility'] = df['daily_return'].rolling(window=30).std() * (252**0.5)
 
     print("\nMissing values summary:\n", df.isna().sum())
     print("\nGenerating all EDA and change detection plots...")
-    
-    plot_and_save(df, "Price", "Brent Oil Price (USD)", "price_plot.png", "Price (USD)")
-    plot_and_save(df, "daily_return", "Daily Returns", "daily_return_plot.png", "Daily Return")
-    plot_and_save(df, "volatility", "Rolling Volatility (30-day Annualized)", "volatility_plot.png", "Volatility")
-    
-    plot_rolling_means(df)
-    decompose_seasonality(df)
-    plot_distribution_of_returns(df)
-    plot_acf_pacf(df)
-
-    df_events = compile_event_metadata()
-    plot_price_with_events(df, df_events)
+    with stage('eda_and_change_detection', 'event_metadata'):
+        df_events = compile_event_metadata()
+    with stage('eda_and_change_detection', 'render_report'):
+        render_report(df, report_figures(df_events), os.path.join(REPORTS_DIR, 'figures'))
 
-    stationarity_tests(df["Price"])
+    with stage('eda_and_change_detection', 'stationarity_tests'):
+        stationarity_tests(df["Price"])
     
+    report_stages('eda_and_change_detection')
     print("\n=== Analysis Complete ===")
     print(f"All plots are saved in the '{REPORTS_DIR}/figures' directory.")
 
@@ -1,41 +1,68 @@
 # eda_utils.py
 
+import functools
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from statsmodels.tsa.stattools import adfuller, kpss
-from statsmodels.tsa.seasonal import seasonal_decompose
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 
-# Set a consistent style for plots
-sns.set(style="whitegrid")
-
-# Define directories for data and reports, ensuring they exist
+try:
+    from .autocorrelation import acf, durbin_levinson, plot_correlogram
+    from .columnar_store import load_columnar
+    from .instrumentation import report_stages, stage
+    from .plot_aggregation import plot_aggregated
+    from .report_rendering import render_report
+except ImportError:
+    from autocorrelation import acf, durbin_levinson, plot_correlogram
+    from columnar_store import load_columnar
+    from instrumentation import report_stages, stage
+    from plot_aggregation import plot_aggregated
+    from report_rendering import render_report
+
+# Directory for reports, created when the first figure is saved there
 REPORTS_DIR = "../reports"
-os.makedirs(os.path.join(REPORTS_DIR, 'figures'), exist_ok=True)
-os.makedirs("../data", exist_ok=True)
+
+@functools.lru_cache(maxsize=None)
+def _pyplot():
+    """
+    matplotlib's pyplot, imported on first use with the seaborn style of the
+    report applied. Plotting and statistics libraries take seconds to load, so
+    they are imported by the functions that need them rather than with this module.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set(style="whitegrid")
+    return plt
+
+def _figure_path(filename):
+    """Path of a figure in ``REPORTS_DIR/figures``, creating the directory if needed."""
+    figures_dir = os.path.join(REPORTS_DIR, 'figures')
+    os.makedirs(figures_dir, exist_ok=True)
+    return os.path.join(figures_dir, filename)
 
 def load_cleaned_data(filepath):
     """
     Load the cleaned Brent oil price data with a datetime index.
 
     Args:
-        filepath (str): Path to cleaned CSV data.
+        filepath (str): Path to cleaned CSV data, or to a columnar store
+            directory (memory-mapped instead of parsed).
 
     Returns:
         pd.DataFrame: DataFrame indexed by datetime.
     """
     print(f"Loading cleaned data from: {filepath}")
     try:
-        df = pd.read_csv(filepath, index_col=0, parse_dates=True)
+        if os.path.isdir(filepath):
+            df = load_columnar(filepath)
+        else:
+            df = pd.read_csv(filepath, index_col=0, parse_dates=True)
         print(f"Data loaded: {df.shape} from {df.index.min()} to {df.index.max()}")
         return df
     except FileNotFoundError:
         print(f"Error: The file {filepath} was not found.")
         return None
 
-def plot_and_save(df, column, title, filename, y_label=None):
+def plot_and_save(df, column, title, filename, y_label=None, aggregate=False):
     """
     Plot a time series and save the figure.
 
@@ -45,29 +72,44 @@ def plot_and_save(df, column, title, filename, y_label=None):
         title (str): Plot title.
         filename (str): Path to save the figure.
         y_label (str, optional): Y-axis label. Defaults to column name.
+        aggregate (bool): Draw only the points visible at the figure's resolution
+            (first/last/min/max per pixel column), for long series.
     """
+    plt = _pyplot()
     plt.figure(figsize=(14, 6))
-    plt.plot(df.index, df[column], label=column)
+    if aggregate:
+        plot_aggregated(plt.gca(), df.index, df[column], label=column)
+    else:
+        plt.plot(df.index, df[column], label=column)
     plt.title(title, fontsize=16)
     plt.xlabel("Date")
     plt.ylabel(y_label if y_label else column)
     plt.legend()
     plt.tight_layout()
-    plt.savefig(os.path.join(REPORTS_DIR, 'figures', filename))
+    plt.savefig(_figure_path(filename))
     plt.show()
     plt.close()
     print(f"Saved plot: {filename}")
 
-def plot_rolling_means(df, save_path):
+def plot_rolling_means(df, save_path, aggregate=False):
     """
-    Plots the time series with rolling mean overlays.
+    Plots the time series with rolling mean overlays. With aggregate=True the
+    rolling means are computed on the full series and then pixel-aggregated.
     """
+    plt = _pyplot()
     plt.figure(figsize=(14, 6))
-    plt.plot(df['Price'], label='Original Price', alpha=0.6)
-    
-    # Calculate and plot rolling means
-    df['Price'].rolling(window=30).mean().plot(label='30-day MA', linestyle='--')
-    df['Price'].rolling(window=90).mean().plot(label='90-day MA', linestyle='--')
+    if aggregate:
+        ax = plt.gca()
+        plot_aggregated(ax, df.index, df['Price'], label='Original Price', alpha=0.6)
+        for window in (30, 90):
+            plot_aggregated(ax, df.index, df['Price'].rolling(window=window).mean(),
+                            label=f'{window}-day MA', linestyle='--')
+    else:
+        plt.plot(df['Price'], label='Original Price', alpha=0.6)
+
+        # Calculate and plot rolling means
+        df['Price'].rolling(window=30).mean().plot(label='30-day MA', linestyle='--')
+        df['Price'].rolling(window=90).mean().plot(label='90-day MA', linestyle='--')
         
     plt.title("Brent Oil Price with Rolling Means", fontsize=16)
     plt.xlabel("Date")
@@ -83,6 +125,8 @@ def decompose_seasonality(df, save_path):
     """
     Decomposes the time series into trend, seasonal, and residual components.
     """
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    plt = _pyplot()
     df_monthly = df['Price'].resample('M').mean()
     # Need at least two full cycles for seasonal decomposition, usually 24 months
     if len(df_monthly.dropna()) < 24:
@@ -103,6 +147,8 @@ def plot_distribution_of_returns(df, save_path):
     """
     Plots a histogram of daily returns to analyze their distribution.
     """
+    import seaborn as sns
+    plt = _pyplot()
     plt.figure(figsize=(10, 5))
     sns.histplot(df['daily_return'].dropna() * 100, bins=100, kde=True, color='orange')
     plt.title("Distribution of Daily Returns", fontsize=16)
@@ -118,11 +164,13 @@ def plot_acf_pacf(df, save_path):
     """
     Plots the Autocorrelation Function (ACF) and Partial Autocorrelation Function (PACF).
     """
+    plt = _pyplot()
+    returns = df['daily_return'].dropna()
+    acf_values = acf(returns.values, nlags=50)
     fig, axes = plt.subplots(1, 2, figsize=(16, 6))
-    plot_acf(df['daily_return'].dropna(), ax=axes[0], lags=50)
-    plot_pacf(df['daily_return'].dropna(), ax=axes[1], lags=50)
-    axes[0].set_title("Autocorrelation (ACF)")
-    axes[1].set_title("Partial Autocorrelation (PACF)")
+    plot_correlogram(axes[0], acf_values, len(returns), "Autocorrelation (ACF)")
+    plot_correlogram(axes[1], durbin_levinson(acf_values), len(returns),
+                     "Partial Autocorrelation (PACF)", partial=True)
     plt.tight_layout()
     plt.savefig(save_path)
     plt.show()
@@ -139,6 +187,8 @@ def stationarity_tests(series):
     Returns:
         dict: Dictionary with ADF and KPSS results.
     """
+    from statsmodels.tsa.stattools import adfuller, kpss
+
     print("\n--- Running Stationarity Tests ---")
     
     # ADF Test
@@ -209,6 +259,32 @@ def load_event_metadata(filepath="../data/event_data.csv"):
     print(f"Loaded {len(df_events)} events.")
     return df_events
 
+def report_figures():
+    """
+    Figure specifications of the EDA report for ``render_report``.
+
+    Returns:
+        list of dict: One specification per figure.
+    """
+    figures_dir = os.path.join(REPORTS_DIR, 'figures')
+    figures = []
+    for column, title, filename, y_label in [
+            ("Price", "Brent Oil Price (USD)", "price_plot.png", "Price (USD)"),
+            ("daily_return", "Daily Returns", "daily_return_plot.png", "Daily Return"),
+            ("volatility", "Rolling Volatility (30-day Annualized)", "volatility_plot.png", "Volatility")]:
+        figures.append({'name': filename[:-4], 'function': plot_and_save, 'columns': [column],
+                        'args': (column, title, filename, y_label), 'kwargs': {'aggregate': True},
+                        'output': os.path.join(figures_dir, filename)})
+    for name, function, column in [('rolling_means', plot_rolling_means, 'Price'),
+                                   ('seasonal_decomposition', decompose_seasonality, 'Price'),
+                                   ('daily_return_distribution', plot_distribution_of_returns, 'daily_return'),
+                                   ('acf_pacf', plot_acf_pacf, 'daily_return')]:
+        output = os.path.join(figures_dir, f"{name}.png")
+        figures.append({'name': name, 'function': function, 'columns': [column],
+                        'args': (output,), 'output': output,
+                        'kwargs': {'aggregate': True} if function is plot_rolling_means else {}})
+    return figures
+
 def main(cleaned_data_path="../data/processed/brent_clean.csv"):
     """
     Main function to run the full EDA analysis pipeline.
@@ -216,37 +292,36 @@ def main(cleaned_data_path="../data/processed/brent_clean.csv"):
     print("=== Starting EDA Analysis ===")
     
     # Load cleaned data
-    df = load_cleaned_data(cleaned_data_path)
+    with stage('eda', 'load'):
+        df = load_cleaned_data(cleaned_data_path)
     if df is None:
         print("Failed to load data. Please check the file path.")
         return
 
     # Calculate key features for analysis
-    df['daily_return'] = df['Price'].pct_change()
-    df['volatility'] = df['daily_return'].rolling(window=30).std() * (252**0.5)
+    with stage('eda', 'features'):
+        df['daily_return'] = df['Price'].pct_change()
+        df['volatility'] = df['daily_return'].rolling(window=30).std() * (252**0.5)
 
     # Check missing data summary
     print("\nMissing values summary:\n", df.isna().sum())
 
-    # Generate and save all plots to the 'reports/figures' directory
+    # Generate and save all plots to the 'reports/figures' directory, in parallel,
+    # redrawing only figures whose data or code changed since the last run
     print("\nGenerating plots...")
-    plot_and_save(df, "Price", "Brent Oil Price (USD)", "price_plot.png", "Price (USD)")
-    plot_and_save(df, "daily_return", "Daily Returns", "daily_return_plot.png", "Daily Return")
-    plot_and_save(df, "volatility", "Rolling Volatility (30-day Annualized)", "volatility_plot.png", "Volatility")
-    
-    # These functions already handle their own file saving logic
-    plot_rolling_means(df, os.path.join(REPORTS_DIR, 'figures', "rolling_means.png"))
-    decompose_seasonality(df, os.path.join(REPORTS_DIR, 'figures', "seasonal_decomposition.png"))
-    plot_distribution_of_returns(df, os.path.join(REPORTS_DIR, 'figures', "daily_return_distribution.png"))
-    plot_acf_pacf(df, os.path.join(REPORTS_DIR, 'figures', "acf_pacf.png"))
+    with stage('eda', 'render_report'):
+        render_report(df, report_figures(), os.path.join(REPORTS_DIR, 'figures'))
 
     # Perform stationarity tests
-    stationarity_tests(df["Price"])
+    with stage('eda', 'stationarity_tests'):
+        stationarity_tests(df["Price"])
 
     # Compile event metadata and save it
-    events = compile_event_metadata()
-    save_event_metadata(events)
+    with stage('eda', 'event_metadata'):
+        events = compile_event_metadata()
+        save_event_metadata(events)
 
+    report_stages('eda')
     print("\n=== EDA Complete ===")
     print("Please check the '../reports/figures' and '../data' directories for all outputs.")
 
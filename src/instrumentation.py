@@ -0,0 +1,282 @@
+# src/instrumentation.py
+
+import bisect
+import contextlib
+import copy
+import math
+import os
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond API stages to long sampler runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0, 30.0, 60.0, 300.0, 1800.0)
+
+# Where the pipeline entry points write their metrics (Prometheus text format)
+# when set, e.g. for the node_exporter textfile collector
+METRICS_FILE_ENV = 'PIPELINE_METRICS_FILE'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process counters, gauges and latency histograms, rendered
+    in the Prometheus text exposition format.
+
+    Metrics are declared once by name (declaring an existing name again
+    returns it unchanged) and recorded with arbitrary label sets. Snapshots
+    are plain picklable dicts, so that worker processes can send what they
+    recorded back to the process that exposes the metrics.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        self._declare(name, 'counter', help_text)
+
+    def gauge(self, name, help_text):
+        self._declare(name, 'gauge', help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._declare(name, 'histogram', help_text, tuple(sorted(buckets)))
+
+    def _declare(self, name, kind, help_text, buckets=None):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                self._metrics[name] = {'kind': kind, 'help': help_text, 'buckets': buckets,
+                                       'values': {}}
+            elif metric['kind'] != kind:
+                raise ValueError(f"Metric '{name}' is already declared as a {metric['kind']}")
+
+    def inc(self, name, amount=1.0, **labels):
+        """Add ``amount`` to a counter."""
+        with self._lock:
+            values = self._values(name, 'counter')
+            key = _label_key(labels)
+            values[key] = values.get(key, 0.0) + amount
+
+    def set(self, name, value, **labels):
+        """Set a gauge."""
+        with self._lock:
+            self._values(name, 'gauge')[_label_key(labels)] = float(value)
+
+    def observe(self, name, value, **labels):
+        """Record one observation (e.g. a duration in seconds) in a histogram."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            values = self._values(name, 'histogram')
+            key = _label_key(labels)
+            state = values.get(key)
+            if state is None:
+                state = values[key] = {'buckets': [0] * len(metric['buckets']), 'sum': 0.0,
+                                       'count': 0}
+            index = bisect.bisect_left(metric['buckets'], value)
+            if index < len(metric['buckets']):
+                state['buckets'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def _values(self, name, kind):
+        metric = self._metrics.get(name)
+        if metric is None:
+            raise KeyError(f"Metric '{name}' is not declared")
+        if metric['kind'] != kind:
+            raise ValueError(f"Metric '{name}' is a {metric['kind']}, not a {kind}")
+        return metric['values']
+
+    def snapshot(self, reset=False):
+        """
+        Copy of every metric and its recorded values.
+
+        Args:
+            reset (bool): Clear the recorded values afterwards, so that the
+                next snapshot only holds what was recorded since.
+
+        Returns:
+            dict: Picklable snapshot for ``merge``.
+        """
+        with self._lock:
+            snapshot = copy.deepcopy(self._metrics)
+            if reset:
+                for metric in self._metrics.values():
+                    metric['values'] = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add a snapshot (e.g. from a worker process) to this registry; gauges are overwritten."""
+        for name, metric in snapshot.items():
+            self._declare(name, metric['kind'], metric['help'], metric['buckets'])
+            with self._lock:
+                values = self._metrics[name]['values']
+                for key, value in metric['values'].items():
+                    if metric['kind'] == 'counter':
+                        values[key] = values.get(key, 0.0) + value
+                    elif metric['kind'] == 'gauge':
+                        values[key] = value
+                    elif key not in values:
+                        values[key] = copy.deepcopy(value)
+                    else:
+                        state = values[key]
+                        state['buckets'] = [a + b for a, b in
+                                            zip(state['buckets'], value['buckets'])]
+                        state['sum'] += value['sum']
+                        state['count'] += value['count']
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, metric in sorted(self.snapshot().items()):
+            lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            for key, value in sorted(metric['values'].items()):
+                if metric['kind'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric['buckets'], value['buckets']):
+                    cumulative += count
+                    bucket_key = key + (('le', _format_value(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_key)} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} "
+                             f"{value['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """Drop every recorded value, keeping the declarations."""
+        self.snapshot(reset=True)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    pairs = ','.join(f'{name}="{_escape_label(value)}"' for name, value in key)
+    return f"{{{pairs}}}"
+
+
+def _escape_label(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _escape_help(text):
+    return text.replace('\\', r'\\').replace('\n', r'\n')
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+# Process-wide registry, exposed by the backend at /api/metrics
+REGISTRY = MetricsRegistry()
+REGISTRY.histogram('pipeline_stage_seconds', "Duration of pipeline stages.")
+REGISTRY.counter('change_point_draws_total', "Posterior draws produced by the change point engines.")
+REGISTRY.gauge('change_point_draws_per_second',
+               "Posterior draws per second of sampling in the latest change point run.")
+
+
+class StageTiming:
+    """Duration of a finished ``stage`` block, in seconds (None while it runs)."""
+
+    def __init__(self):
+        self.seconds = None
+
+
+@contextlib.contextmanager
+def stage(pipeline, name, registry=None):
+    """
+    Time a block (or, used as a decorator, every call of a function) as stage
+    ``name`` of ``pipeline`` in the ``pipeline_stage_seconds`` histogram.
+    The duration is recorded whether or not the block raises.
+
+    Args:
+        pipeline (str): Pipeline label, e.g. ``'data_processing'``.
+        name (str): Stage label.
+        registry (MetricsRegistry, optional): Defaults to ``REGISTRY``.
+
+    Yields:
+        StageTiming: Holds the duration once the block exits.
+    """
+    timing = StageTiming()
+    started = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - started
+        observe_stage(pipeline, name, timing.seconds, registry)
+
+
+def observe_stage(pipeline, name, seconds, registry=None):
+    """Record a stage duration measured elsewhere, e.g. one phase of a loop."""
+    (registry or REGISTRY).observe('pipeline_stage_seconds', seconds, pipeline=pipeline,
+                                   stage=name)
+
+
+def record_draws(engine, mode, draws, seconds, registry=None):
+    """
+    Count posterior draws of a change point engine and set its draws per
+    second of sampling.
+
+    Returns:
+        float: Draws per second (NaN if ``seconds`` is not positive).
+    """
+    registry = registry or REGISTRY
+    rate = draws / seconds if seconds > 0 else math.nan
+    registry.inc('change_point_draws_total', draws, engine=engine, mode=mode)
+    if seconds > 0:
+        registry.set('change_point_draws_per_second', rate, engine=engine, mode=mode)
+    return rate
+
+
+def stage_summary(pipeline, registry=None):
+    """
+    Total seconds and number of runs of every recorded stage of ``pipeline``.
+
+    Returns:
+        dict: ``{stage: (seconds, count)}`` in the order the stages were first recorded.
+    """
+    metric = (registry or REGISTRY).snapshot().get('pipeline_stage_seconds', {'values': {}})
+    summary = {}
+    for key, state in metric['values'].items():
+        labels = dict(key)
+        if labels.get('pipeline') == pipeline:
+            summary[labels['stage']] = (state['sum'], state['count'])
+    return summary
+
+
+def report_stages(pipeline, registry=None):
+    """
+    Print the stage timings of a pipeline run and, if the ``PIPELINE_METRICS_FILE``
+    environment variable is set, write all metrics to that file.
+    """
+    registry = registry or REGISTRY
+    summary = stage_summary(pipeline, registry)
+    if summary:
+        total = sum(seconds for seconds, _ in summary.values())
+        print(f"\nStage timings ({pipeline}):")
+        for name, (seconds, count) in summary.items():
+            runs = f" ({count} runs)" if count > 1 else ''
+            print(f"  {name:<28} {seconds:9.3f} s  {seconds / total if total else 0:6.1%}{runs}")
+    path = os.environ.get(METRICS_FILE_ENV)
+    if path:
+        write_metrics(path, registry)
+
+
+def write_metrics(path, registry=None):
+    """Write all metrics to ``path`` in the Prometheus text format, atomically."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write((registry or REGISTRY).render())
+    os.replace(tmp_path, path)
+
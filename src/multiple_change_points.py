@@ -0,0 +1,259 @@
+# src/multiple_change_points.py
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .segment_stats import CumulativeStats
+except ImportError:
+    from segment_stats import CumulativeStats
+
+COSTS = ('mean', 'var', 'meanvar')
+
+# Floor on segment variances so that log-costs stay finite on flat stretches.
+_MIN_VARIANCE = 1e-12
+
+
+class SegmentCost:
+    """
+    O(1) segment costs for Gaussian change models, backed by prefix sums.
+
+    - ``'mean'``: sum of squared deviations from the segment mean (the ``l2``
+      cost of ``ruptures``); detects changes in mean.
+    - ``'var'``: ``k * log(variance)`` around the global mean; detects changes
+      in variance.
+    - ``'meanvar'``: ``k * log(variance)`` around the segment mean; detects
+      changes in mean and/or variance.
+
+    ``cost(start, end)`` accepts scalars or arrays, so many candidate segments
+    can be scored in one call.
+    """
+
+    def __init__(self, data, cost='mean'):
+        if cost not in COSTS:
+            raise ValueError(f"Unknown cost '{cost}'. Choose from {COSTS}.")
+        self.kind = cost
+        self.stats = CumulativeStats(data)
+        self.n = self.stats.n
+        if self.kind != 'mean':
+            scale = self.stats.s2[-1] / max(self.n, 1)
+            self._floor = _MIN_VARIANCE * max(scale, 1.0)
+
+    def __call__(self, start, end):
+        if self.kind == 'mean':
+            return self.stats.sse(start, end)
+        if self.kind == 'var':
+            k, _, q = self.stats.segment(start, end)
+        else:
+            k = np.asarray(end) - np.asarray(start)
+            q = self.stats.sse(start, end)
+        k = np.maximum(k, 1)
+        return k * np.log(np.maximum(q / k, self._floor))
+
+
+def pelt(data, pen, cost='mean', min_size=2):
+    """
+    Optimal segmentation under a linear penalty with PELT (Killick et al., 2012).
+
+    Args:
+        data (array-like): One-dimensional series.
+        pen (float): Penalty added per segment.
+        cost (str or SegmentCost): Cost name (see ``SegmentCost``) or a prebuilt cost.
+        min_size (int): Minimum segment length.
+
+    Returns:
+        list: Segment end indices in increasing order, the last one being
+        ``len(data)`` (the same convention as ``ruptures``).
+    """
+    return _pelt(_as_cost(data, cost), pen, min_size)
+
+
+def binary_segmentation(data, pen=None, n_bkps=None, cost='mean', min_size=2):
+    """
+    Greedy binary segmentation.
+
+    Exactly one of ``pen`` (stop when the best split gains less than ``pen``) or
+    ``n_bkps`` (stop after that many change points) must be given.
+
+    Returns:
+        list: Segment end indices, the last one being ``len(data)``.
+    """
+    if (pen is None) == (n_bkps is None):
+        raise ValueError("Specify exactly one of pen or n_bkps")
+    seg_cost = _as_cost(data, cost)
+    path = _binseg_path(seg_cost, min_size, max_bkps=n_bkps)
+    if pen is not None:
+        path = _truncate_path(path, pen)
+    return sorted(split for split, _ in path) + [seg_cost.n]
+
+
+def penalty_path(data, penalties, cost='mean', min_size=2, method='binseg'):
+    """
+    Segmentations for a whole range of penalties without re-running from scratch.
+
+    - ``method='binseg'``: a single binary segmentation run records the greedy
+      split order and gains; the segmentation for each penalty is the prefix of
+      splits made before the first gain below it.
+    - ``method='pelt'``: exact PELT solutions. The optimal number of change
+      points is non-increasing in the penalty, so PELT is only run at the ends
+      of the penalty grid and at bisection points; whenever two penalties yield
+      the same number of change points, every penalty between them shares that
+      segmentation and is filled in without another run.
+
+    Args:
+        data (array-like): One-dimensional series.
+        penalties (iterable of float): Penalty values to evaluate.
+        cost (str): Cost name, see ``SegmentCost``.
+        min_size (int): Minimum segment length.
+        method (str): ``'binseg'`` or ``'pelt'``.
+
+    Returns:
+        dict: Maps each penalty to its list of segment end indices.
+    """
+    penalties = sorted(set(float(p) for p in penalties))
+    if not penalties:
+        return {}
+    seg_cost = _as_cost(data, cost)
+
+    if method == 'binseg':
+        path = _binseg_path(seg_cost, min_size)
+        return {pen: sorted(split for split, _ in _truncate_path(path, pen)) + [seg_cost.n]
+                for pen in penalties}
+    if method != 'pelt':
+        raise ValueError(f"Unknown method '{method}'. Use 'binseg' or 'pelt'.")
+
+    return dict(zip(penalties, _pelt_path(seg_cost, penalties, min_size)))
+
+
+def segment_summary(df, column, bkps):
+    """
+    Describe the segments delimited by ``bkps`` (as returned by ``pelt``).
+
+    Args:
+        df (pd.DataFrame): Time-indexed data the breakpoints were computed on.
+        column (str): Column that was segmented.
+        bkps (list): Segment end indices.
+
+    Returns:
+        pd.DataFrame: Start/end dates, length, mean and standard deviation per segment.
+    """
+    series = df[column].dropna()
+    rows = []
+    start = 0
+    for end in bkps:
+        segment = series.iloc[start:end]
+        rows.append({
+            'start': segment.index[0], 'end': segment.index[-1], 'n': len(segment),
+            'mean': segment.mean(), 'std': segment.std(),
+        })
+        start = end
+    return pd.DataFrame(rows)
+
+
+def _as_cost(data, cost):
+    if isinstance(cost, SegmentCost):
+        return cost
+    values = data.dropna().values if isinstance(data, pd.Series) else np.asarray(data, dtype=float)
+    return SegmentCost(values, cost)
+
+
+def _pelt(seg_cost, pen, min_size):
+    """PELT core on a prebuilt cost; returns the breakpoints."""
+    n = seg_cost.n
+    min_size = max(int(min_size), 1)
+    if n < 2 * min_size:
+        return [n]
+
+    best = np.full(n + 1, np.inf)
+    best[0] = -pen
+    last = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+    for t in range(min_size, n + 1):
+        s_new = t - min_size
+        if s_new >= min_size:
+            candidates = np.append(candidates, s_new)
+        if len(candidates) == 0:
+            continue
+        totals = best[candidates] + seg_cost(candidates, t)
+        i = np.argmin(totals)
+        best[t] = totals[i] + pen
+        last[t] = candidates[i]
+        candidates = candidates[totals <= best[t]]
+
+    bkps = []
+    t = n
+    while t > 0:
+        bkps.append(int(t))
+        t = last[t]
+    bkps.reverse()
+    return bkps
+
+
+def _best_split(seg_cost, start, end, min_size):
+    """Best single split of [start, end) and its cost reduction, or None."""
+    splits = np.arange(start + min_size, end - min_size + 1)
+    if len(splits) == 0:
+        return None
+    gains = seg_cost(start, end) - seg_cost(start, splits) - seg_cost(splits, end)
+    i = np.argmax(gains)
+    return int(splits[i]), float(gains[i])
+
+
+def _binseg_path(seg_cost, min_size, max_bkps=None):
+    """
+    Run binary segmentation to exhaustion (or ``max_bkps`` splits) and return the
+    greedy sequence of (split, gain).
+    """
+    min_size = max(int(min_size), 1)
+    heap = []
+
+    def push(start, end):
+        found = _best_split(seg_cost, start, end, min_size)
+        if found is not None:
+            heapq.heappush(heap, (-found[1], found[0], start, end))
+
+    push(0, seg_cost.n)
+    path = []
+    while heap and (max_bkps is None or len(path) < max_bkps):
+        neg_gain, split, start, end = heapq.heappop(heap)
+        path.append((split, -neg_gain))
+        push(start, split)
+        push(split, end)
+    return path
+
+
+def _truncate_path(path, pen):
+    for i, (_, gain) in enumerate(path):
+        if gain < pen:
+            return path[:i]
+    return path
+
+
+def _pelt_path(seg_cost, penalties, min_size):
+    """PELT breakpoints for each of the sorted ``penalties``, bisecting the grid."""
+    solved = [None] * len(penalties)
+
+    def solve(i):
+        if solved[i] is None:
+            solved[i] = _pelt(seg_cost, penalties[i], min_size)
+        return len(solved[i])
+
+    last = len(penalties) - 1
+    solve(0)
+    solve(last)
+    pending = [(0, last)]
+    while pending:
+        lo, hi = pending.pop()
+        if hi - lo <= 1:
+            continue
+        if len(solved[lo]) == len(solved[hi]):
+            for i in range(lo + 1, hi):
+                solved[i] = solved[lo]
+            continue
+        mid = (lo + hi) // 2
+        solve(mid)
+        pending.append((lo, mid))
+        pending.append((mid, hi))
+    return solved
@@ -0,0 +1,217 @@
+# src/online_change_point.py
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln
+
+
+class BayesianOnlineChangePointDetector:
+    """
+    Bayesian online change point detection (Adams & MacKay, 2007) with a
+    conjugate Normal-Gamma observation model.
+
+    The detector keeps the posterior over the current run length (the number
+    of observations since the last change point) and updates it one
+    observation at a time. Run-length hypotheses whose probability falls below
+    ``prune_threshold`` are dropped and at most ``max_run_lengths`` of the most
+    probable ones are kept, so each update costs O(max_run_lengths) regardless
+    of how much history has been seen.
+
+    Args:
+        hazard (float or callable): Constant probability of a change at each step
+            (e.g. ``1/250`` for one regime per trading year on average), or a
+            function mapping an array of run lengths to change probabilities.
+        mu0, kappa0, alpha0, beta0 (float): Normal-Gamma prior of a new segment's
+            mean and precision.
+        max_run_lengths (int): Maximum number of run-length hypotheses retained.
+        prune_threshold (float): Hypotheses with a smaller posterior probability are dropped.
+        recent_window (int): A change is reported as the posterior probability
+            that the current run is at most this many observations long.
+    """
+
+    def __init__(self, hazard=1 / 250, mu0=0.0, kappa0=1.0, alpha0=1.0, beta0=1.0,
+                 max_run_lengths=500, prune_threshold=1e-10, recent_window=5):
+        if not callable(hazard) and not 0 < hazard < 1:
+            raise ValueError("hazard must be a probability in (0, 1) or a callable")
+        self.hazard = hazard
+        self.prior = np.array([mu0, kappa0, alpha0, beta0], dtype=float)
+        self.max_run_lengths = int(max_run_lengths)
+        self.prune_threshold = float(prune_threshold)
+        self.recent_window = int(recent_window)
+        self.reset()
+
+    def reset(self):
+        """Forget all observations and start from an empty run."""
+        self.t = 0
+        self.run_lengths = np.zeros(1, dtype=np.int64)
+        self.log_probs = np.zeros(1)
+        self.mu, self.kappa, self.alpha, self.beta = (np.array([p]) for p in self.prior)
+
+    def _hazard(self, run_lengths):
+        if callable(self.hazard):
+            return np.clip(np.asarray(self.hazard(run_lengths), dtype=float), 1e-300, 1.0)
+        return np.full(len(run_lengths), self.hazard)
+
+    @staticmethod
+    def _predictive_logpdf(x, mu, kappa, alpha, beta):
+        """Student-t posterior predictive of the Normal-Gamma model."""
+        df = 2.0 * alpha
+        scale2 = beta * (kappa + 1.0) / (alpha * kappa)
+        z = (x - mu) ** 2 / (df * scale2)
+        return (gammaln((df + 1.0) / 2.0) - gammaln(df / 2.0)
+                - 0.5 * np.log(np.pi * df * scale2) - (df + 1.0) / 2.0 * np.log1p(z))
+
+    def update(self, x):
+        """
+        Incorporate one observation and update the run-length posterior.
+
+        Args:
+            x (float): The new observation, e.g. the latest ``daily_return``.
+
+        Returns:
+            dict: ``t`` (observations seen), ``changepoint_probability`` (posterior
+            probability that a change occurred within the last ``recent_window``
+            observations), ``map_run_length`` and ``log_predictive`` (log
+            probability of ``x`` given the past).
+        """
+        x = float(x)
+        if not np.isfinite(x):
+            raise ValueError("Observations must be finite")
+        mu0, kappa0, alpha0, beta0 = self.prior
+
+        log_h = np.log(self._hazard(self.run_lengths))
+        log_1mh = np.log1p(-np.exp(log_h))
+        log_pred = self._predictive_logpdf(x, self.mu, self.kappa, self.alpha, self.beta)
+        log_prior_pred = self._predictive_logpdf(x, mu0, kappa0, alpha0, beta0)
+
+        growth = self.log_probs + log_pred + log_1mh
+        change = np.logaddexp.reduce(self.log_probs + log_h) + log_prior_pred
+        if self.run_lengths[0] == 0:
+            # An empty run and a fresh change point both describe a run of length one.
+            growth[0] = np.logaddexp(growth[0], change)
+            run_lengths = self.run_lengths + 1
+            log_joint, mu, kappa, alpha, beta = growth, self.mu, self.kappa, self.alpha, self.beta
+        else:
+            run_lengths = np.concatenate(([1], self.run_lengths + 1))
+            log_joint = np.concatenate(([change], growth))
+            mu = np.concatenate(([mu0], self.mu))
+            kappa = np.concatenate(([kappa0], self.kappa))
+            alpha = np.concatenate(([alpha0], self.alpha))
+            beta = np.concatenate(([beta0], self.beta))
+
+        log_evidence = np.logaddexp.reduce(log_joint)
+        log_probs = log_joint - log_evidence
+
+        # Conjugate Normal-Gamma update of every hypothesis with x
+        beta = beta + kappa * (x - mu) ** 2 / (2.0 * (kappa + 1.0))
+        mu = (kappa * mu + x) / (kappa + 1.0)
+        kappa = kappa + 1.0
+        alpha = alpha + 0.5
+
+        keep = np.flatnonzero(log_probs >= np.log(self.prune_threshold))
+        if len(keep) == 0:
+            keep = np.array([np.argmax(log_probs)])
+        if len(keep) > self.max_run_lengths:
+            top = np.argpartition(log_probs[keep], -self.max_run_lengths)[-self.max_run_lengths:]
+            keep = np.sort(keep[top])
+        log_probs = log_probs[keep]
+        log_probs -= np.logaddexp.reduce(log_probs)
+
+        self.t += 1
+        self.run_lengths = run_lengths[keep]
+        self.log_probs = log_probs
+        self.mu, self.kappa, self.alpha, self.beta = mu[keep], kappa[keep], alpha[keep], beta[keep]
+
+        probs = np.exp(log_probs)
+        return {
+            't': self.t,
+            'changepoint_probability': float(probs[self.run_lengths <= self.recent_window].sum()),
+            'map_run_length': int(self.run_lengths[np.argmax(log_probs)]),
+            'log_predictive': float(log_evidence),
+        }
+
+    def run_length_posterior(self):
+        """
+        Current run-length posterior.
+
+        Returns:
+            pd.Series: Probability of each retained run length.
+        """
+        return pd.Series(np.exp(self.log_probs), index=pd.Index(self.run_lengths, name='run_length'))
+
+    def state_dict(self):
+        """
+        Snapshot of the detector, suitable for ``np.savez`` or pickling.
+        A callable hazard is not included and must be passed again on restore.
+        """
+        return {
+            't': np.int64(self.t),
+            'run_lengths': self.run_lengths.copy(),
+            'log_probs': self.log_probs.copy(),
+            'params': np.vstack([self.mu, self.kappa, self.alpha, self.beta]),
+            'prior': self.prior.copy(),
+            'hazard': np.float64(np.nan if callable(self.hazard) else self.hazard),
+            'limits': np.array([self.max_run_lengths, self.recent_window], dtype=np.int64),
+            'prune_threshold': np.float64(self.prune_threshold),
+        }
+
+    @classmethod
+    def from_state(cls, state, hazard=None):
+        """
+        Rebuild a detector from ``state_dict()`` output.
+
+        Args:
+            state (dict): Snapshot produced by ``state_dict`` (or loaded from ``save``).
+            hazard (float or callable, optional): Required if the snapshot was
+                taken from a detector with a callable hazard.
+        """
+        if hazard is None:
+            hazard = float(state['hazard'])
+            if np.isnan(hazard):
+                raise ValueError("Snapshot was taken with a callable hazard; pass it via hazard=")
+        mu0, kappa0, alpha0, beta0 = np.asarray(state['prior'], dtype=float)
+        max_run_lengths, recent_window = (int(v) for v in state['limits'])
+        detector = cls(hazard=hazard, mu0=mu0, kappa0=kappa0, alpha0=alpha0, beta0=beta0,
+                       max_run_lengths=max_run_lengths,
+                       prune_threshold=float(state['prune_threshold']),
+                       recent_window=recent_window)
+        detector.t = int(state['t'])
+        detector.run_lengths = np.asarray(state['run_lengths'], dtype=np.int64).copy()
+        detector.log_probs = np.asarray(state['log_probs'], dtype=float).copy()
+        detector.mu, detector.kappa, detector.alpha, detector.beta = (
+            row.copy() for row in np.asarray(state['params'], dtype=float))
+        return detector
+
+    def save(self, path):
+        """Checkpoint the detector to a ``.npz`` file."""
+        np.savez(path, **self.state_dict())
+
+    @classmethod
+    def load(cls, path, hazard=None):
+        """Resume a detector checkpointed with ``save``."""
+        with np.load(path) as state:
+            return cls.from_state(dict(state), hazard=hazard)
+
+
+def detect_online(series, detector=None, **detector_kwargs):
+    """
+    Feed a series through an online detector and collect its outputs.
+
+    Missing values are skipped. Passing a previously checkpointed ``detector``
+    continues from where it left off, so a nightly job only needs to feed the
+    newly arrived observations.
+
+    Args:
+        series (pd.Series): Observations in time order, e.g. ``df['daily_return']``.
+        detector (BayesianOnlineChangePointDetector, optional): Detector to update.
+        **detector_kwargs: Passed to a new detector when ``detector`` is None.
+
+    Returns:
+        pd.DataFrame: One row per observation with change probability, MAP run
+        length and log predictive, indexed like ``series``.
+    """
+    if detector is None:
+        detector = BayesianOnlineChangePointDetector(**detector_kwargs)
+    series = series.dropna()
+    rows = [detector.update(x) for x in series.values]
+    return pd.DataFrame(rows, index=series.index)
@@ -0,0 +1,173 @@
+# src/plot_aggregation.py
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+# Columns per display pixel of lines aggregated at draw time. Antialiased
+# lines blend the coverage of every segment, so half-pixel columns keep the
+# rendering closer to the full series than whole pixels, for twice the points.
+COLUMNS_PER_PIXEL = 2
+
+def pixel_aggregate(x, y, n_pixels):
+    """
+    Reduce a sorted series to the points that determine its line plot at a
+    given horizontal resolution.
+
+    The x range is split into ``n_pixels`` equal columns and, per column, the
+    first, last, minimum and maximum points are kept (M4 aggregation, Jugel et
+    al. 2014). A line through these points rasterizes to the same pixels as the
+    full series, while at most four points per pixel column are drawn. NaNs
+    next to finite values are kept so that gaps in the line stay visible.
+
+    Args:
+        x (array-like): Sorted x values (numbers or datetimes).
+        y (array-like): Values.
+        n_pixels (int): Horizontal resolution of the plot area.
+
+    Returns:
+        np.ndarray: Sorted positions of the points to draw.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 4 * n_pixels:
+        return np.arange(n)
+    if isinstance(x, (pd.DatetimeIndex, pd.Series)) or np.asarray(x).dtype.kind == 'M':
+        x = np.asarray(x, dtype='datetime64[ns]').view(np.int64)
+    x = np.asarray(x, dtype=float)
+    span = x[-1] - x[0]
+    if span <= 0:
+        return np.array([0, n - 1])
+    column = np.minimum(((x - x[0]) * (n_pixels / span)).astype(np.int64), n_pixels - 1)
+    return _column_extremes(column, y)
+
+
+def _column_extremes(column, y):
+    """First, last, minimum and maximum point of each run of equal ``column`` values."""
+    n = len(y)
+    starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    counts = ends - starts + 1
+    keep = [starts, ends]
+    finite = np.isfinite(y)
+    if finite.any():
+        with np.errstate(invalid='ignore'):
+            for reduce in (np.fmin, np.fmax):
+                extreme = np.repeat(reduce.reduceat(y, starts), counts)
+                hits = np.flatnonzero(y == extreme)
+                first_hit = np.r_[True, column[hits[1:]] != column[hits[:-1]]]
+                keep.append(hits[first_hit])
+    # Gap boundaries: NaNs next to finite values
+    gaps = ~finite & (np.r_[False, finite[:-1]] | np.r_[finite[1:], False])
+    keep.append(np.flatnonzero(gaps))
+    return np.unique(np.concatenate(keep))
+
+
+def plot_aggregated(ax, x, y, n_pixels=None, **plot_kwargs):
+    """
+    ``ax.plot(x, y)`` drawing only the points visible at the figure's resolution.
+
+    By default the points are selected again every time the line is drawn,
+    per actual pixel column of the axes (``COLUMNS_PER_PIXEL`` columns each,
+    from its final extent, limits and the output resolution), so margins,
+    ``tight_layout`` and later limit changes keep the columns aligned with the
+    pixels. Until then the line holds a coarser selection that keeps
+    the first, last and extreme points, so autoscaling is unaffected.
+
+    Args:
+        ax (matplotlib.axes.Axes): Target axes.
+        x, y (array-like): Sorted x values and values (Series are accepted).
+        n_pixels (int, optional): Aggregate once into this many equal columns
+            over the x range instead of per pixel at draw time.
+        **plot_kwargs: Passed to ``ax.plot``.
+
+    Returns:
+        list: The Line2D objects returned by ``ax.plot``.
+    """
+    x = x if isinstance(x, (pd.Index, np.ndarray)) else np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = pixel_aggregate(x, y, n_pixels or figure_width_pixels(ax.figure))
+    lines = ax.plot(x[keep], y[keep], **plot_kwargs)
+    if n_pixels is None and len(keep) < len(y):
+        line = lines[0]
+        # Same artist with a draw that re-aggregates first (only ``draw`` is overridden)
+        line.__class__ = _pixel_aligned_line_class()
+        line.full_data = (x, y)
+    return lines
+
+
+def figure_width_pixels(fig):
+    """Width of ``fig`` in pixels at the larger of its display and save resolutions."""
+    import matplotlib as mpl
+
+    dpi = mpl.rcParams['savefig.dpi']
+    dpi = fig.dpi if dpi == 'figure' else max(float(dpi), fig.dpi)
+    return int(np.ceil(fig.get_figwidth() * dpi))
+
+
+@functools.lru_cache(maxsize=None)
+def _pixel_aligned_line_class():
+    """Line2D subclass defined on first use, so that matplotlib is imported lazily."""
+    from matplotlib.lines import Line2D
+
+    class PixelAlignedLine(Line2D):
+        """Line2D drawing, per pixel column of its axes, the points of ``full_data`` that show."""
+
+        def draw(self, renderer):
+            x, y = self.full_data
+            x_values = np.asarray(self.convert_xunits(x), dtype=float)
+            # x in display pixels; a fixed in-range y keeps non-finite values out of it
+            y_ref = np.full(len(x_values), self.axes.get_ylim()[0], dtype=float)
+            pixels = self.axes.transData.transform(np.column_stack((x_values, y_ref)))[:, 0]
+            column = np.floor(pixels * COLUMNS_PER_PIXEL).astype(np.int64)
+            keep = _column_extremes(column, y)
+            self.set_data(x[keep], y[keep])
+            return super().draw(renderer)
+
+    return PixelAlignedLine
+
+
+# Most event labels the report figures draw; above it only the lines are drawn,
+# since each boxed label costs far more than the line collection
+MAX_EVENT_LABELS = 40
+
+# Style of event labels in the report figures
+EVENT_LABEL_STYLE = dict(rotation=90, va='bottom', ha='left', color='red', fontsize=8,
+                         bbox=dict(boxstyle='round,pad=0.2', fc='yellow', alpha=0.5, ec='black', lw=0.5))
+
+
+def draw_event_lines(ax, dates, labels=None, label_y=None, max_labels=None, label_style=None,
+                     **line_kwargs):
+    """
+    Draw vertical event markers as one LineCollection spanning the full height
+    of the axes (like ``axvline``, without affecting autoscaling), plus
+    optional rotated labels.
+
+    Args:
+        ax (matplotlib.axes.Axes): Target axes.
+        dates (array-like): Event dates.
+        labels (array-like, optional): Text drawn next to each line.
+        label_y (float, optional): Data y coordinate of the labels.
+        max_labels (int, optional): Draw labels only when there are at most
+            this many events; boxed text is by far the most expensive part.
+        label_style (dict, optional): ``ax.text`` keyword arguments. Defaults to
+            ``EVENT_LABEL_STYLE``.
+        **line_kwargs: Line style (color, linestyle, alpha, linewidth, ...).
+
+    Returns:
+        matplotlib.collections.LineCollection
+    """
+    import matplotlib.dates as mdates
+    from matplotlib.collections import LineCollection
+
+    x = mdates.date2num(pd.to_datetime(pd.Series(dates)).to_numpy())
+    segments = np.stack([np.column_stack((x, np.zeros_like(x))),
+                         np.column_stack((x, np.ones_like(x)))], axis=1)
+    lines = LineCollection(segments, transform=ax.get_xaxis_transform(), **line_kwargs)
+    ax.add_collection(lines, autolim=False)
+    if labels is not None and (max_labels is None or len(x) <= max_labels):
+        style = EVENT_LABEL_STYLE if label_style is None else label_style
+        for date, label in zip(pd.to_datetime(pd.Series(dates)), labels):
+            ax.text(date, label_y, label, **style)
+    return lines
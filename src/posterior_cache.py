@@ -0,0 +1,118 @@
+# src/posterior_cache.py
+
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+# Bump when the change point models change so that stale posteriors are not reused.
+MODEL_VERSION = 1
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'posteriors')
+
+
+class PosteriorCache:
+    """
+    Content-addressed on-disk cache of posterior InferenceData.
+
+    Entries are keyed by a SHA-256 of the input array and every setting that
+    affects the posterior, and stored as compressed netCDF files. Reads refresh
+    an entry's modification time and writes evict the least recently used
+    entries until the cache fits in ``max_bytes``.
+
+    Args:
+        directory (str, optional): Cache directory. Defaults to the
+            ``CHANGE_POINT_CACHE_DIR`` environment variable or ``.cache/posteriors``
+            under the project root. It is created on first write.
+        max_bytes (int): Size cap for all cached files together.
+    """
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 ** 2):
+        self.directory = directory or os.environ.get('CHANGE_POINT_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = int(max_bytes)
+
+    @staticmethod
+    def key(data, **settings):
+        """
+        Cache key for a data array and the model/sampler settings applied to it.
+
+        Args:
+            data (array-like): The exact values the model is fitted on.
+            **settings: Column name, engine, priors, sampler settings, ...
+
+        Returns:
+            str: Hex digest identifying the posterior.
+        """
+        digest = hashlib.sha256()
+        values = np.ascontiguousarray(np.asarray(data, dtype=np.float64))
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+        settings = dict(settings, model_version=MODEL_VERSION)
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.nc")
+
+    def get(self, key):
+        """Return the cached InferenceData for ``key``, or None on a miss."""
+        import arviz as az
+
+        path = self._path(key)
+        try:
+            trace = az.from_netcdf(path)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        os.utime(path)
+        return trace
+
+    def put(self, key, trace):
+        """Store ``trace`` under ``key`` atomically, then enforce the size cap."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            trace.to_netcdf(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            if name.endswith('.nc'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove every cached posterior."""
+        max_bytes, self.max_bytes = self.max_bytes, -1
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
+
+
+def default_cache():
+    """PosteriorCache at the default location with the default size cap."""
+    return PosteriorCache()
@@ -0,0 +1,160 @@
+# src/report_rendering.py
+
+import hashlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import time
+import uuid
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILE = 'manifest.json'
+
+# Bump to force every figure to be redrawn (e.g. after a style change).
+RENDERER_VERSION = 1
+
+
+def render_report(df: pd.DataFrame, figures, output_dir, max_workers=None, force=False):
+    """
+    Render independent report figures in parallel, skipping unchanged ones.
+
+    Each figure is a dict with:
+
+    - ``name``: unique figure name,
+    - ``function``: module-level plotting function, called as
+      ``function(data, *args, **kwargs)``,
+    - ``output``: path of the file the function writes,
+    - ``columns`` (optional): the columns of ``df`` the figure uses (all by default),
+    - ``args``/``kwargs`` (optional): further arguments, including the output path
+      in whatever form the function expects.
+
+    A figure is redrawn only when its fingerprint changed: a hash of the data it
+    uses, its arguments and the source code of its function. Figures are drawn
+    in spawned worker processes on the non-interactive Agg backend, so
+    ``plt.show()`` calls inside plotting functions never block. Fingerprints,
+    timings and errors are recorded in ``manifest.json`` in ``output_dir``.
+
+    Args:
+        df (pd.DataFrame): Data shared by the figures.
+        figures (list of dict): Figure specifications as described above.
+        output_dir (str): Directory holding the manifest.
+        max_workers (int, optional): Worker processes. Defaults to the CPU count.
+        force (bool): Redraw every figure.
+
+    Returns:
+        dict: The manifest, keyed by figure name.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    previous = _read_manifest(manifest_path)
+    manifest = {}
+    todo = []
+    for figure in figures:
+        data = df if figure.get('columns') is None else df[list(figure['columns'])]
+        fingerprint = _fingerprint(figure, data)
+        entry = previous.get(figure['name'])
+        if (not force and entry is not None and entry.get('fingerprint') == fingerprint
+                and entry.get('error') is None and os.path.exists(figure['output'])):
+            manifest[figure['name']] = dict(entry, skipped=True)
+            continue
+        todo.append((figure, data, fingerprint))
+
+    print(f"Rendering {len(todo)} of {len(figures)} figures "
+          f"({len(figures) - len(todo)} unchanged)...")
+    started = time.perf_counter()
+    if todo:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(todo))
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context('spawn'),
+                                 initializer=_init_worker) as pool:
+            futures = {pool.submit(_render, figure['function'], data, figure.get('args', ()),
+                                   figure.get('kwargs', {})): (figure, fingerprint)
+                       for figure, data, fingerprint in todo}
+            for future in as_completed(futures):
+                figure, fingerprint = futures[future]
+                seconds, error = future.result()
+                manifest[figure['name']] = {
+                    'output': figure['output'],
+                    'fingerprint': fingerprint,
+                    'seconds': seconds,
+                    'rendered_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'skipped': False,
+                    'error': error,
+                }
+                status = f"failed: {error}" if error else f"{seconds:.2f}s"
+                print(f"  {figure['name']}: {status}")
+
+    manifest = {figure['name']: manifest[figure['name']] for figure in figures}
+    # Keep entries of figures rendered into the same directory by other reports
+    _write_manifest(manifest_path, dict(previous, **manifest))
+    print(f"Report rendered in {time.perf_counter() - started:.2f}s; manifest: {manifest_path}")
+    return manifest
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    # plt.show() is a no-op on Agg; silence its "non-interactive" warning
+    warnings.filterwarnings('ignore', message='.*non-interactive.*')
+
+
+def _render(function, data, args, kwargs):
+    import matplotlib.pyplot as plt
+
+    started = time.perf_counter()
+    try:
+        function(data, *args, **kwargs)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        plt.close('all')
+    return time.perf_counter() - started, error
+
+
+def _fingerprint(figure, data):
+    digest = hashlib.sha256()
+    digest.update(str(RENDERER_VERSION).encode())
+    function = figure['function']
+    digest.update(f"{function.__module__}.{function.__qualname__}".encode())
+    try:
+        digest.update(inspect.getsource(function).encode())
+    except (OSError, TypeError):
+        pass
+    _update_digest(digest, data)
+    for arg in figure.get('args', ()):
+        _update_digest(digest, arg)
+    for key in sorted(figure.get('kwargs', {})):
+        digest.update(key.encode())
+        _update_digest(digest, figure['kwargs'][key])
+    return digest.hexdigest()
+
+
+def _update_digest(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        columns = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(json.dumps([str(c) for c in columns]).encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(path, manifest):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
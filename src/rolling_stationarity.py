@@ -0,0 +1,255 @@
+# src/rolling_stationarity.py
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+REGRESSIONS = ('c', 'ct')
+AUTOLAGS = ('aic', 'bic')
+
+# KPSS critical values (10%, 5%, 2.5%, 1%), as in statsmodels.tsa.stattools.kpss
+_KPSS_CRITICAL = {'c': [0.347, 0.463, 0.574, 0.739], 'ct': [0.119, 0.146, 0.176, 0.216]}
+_KPSS_PVALUES = [0.10, 0.05, 0.025, 0.01]
+
+# Windows evaluated at once; bounds the (windows x rows x columns) working arrays.
+_BLOCK_WINDOWS = 256
+
+STATISTICS = ('window_start', 'n', 'adf_statistic', 'adf_pvalue', 'adf_lags', 'adf_nobs',
+              'kpss_statistic', 'kpss_pvalue', 'kpss_lags')
+
+
+def rolling_stationarity(df: pd.DataFrame, columns=('Price', 'daily_return', 'volatility'),
+                         window=252, step=5, regression='c', maxlag=None, autolag='AIC',
+                         kpss_nlags='auto', max_workers=None):
+    """
+    ADF and KPSS tests over sliding windows of one or more columns.
+
+    Each window gets the results of ``statsmodels`` ``adfuller(x, maxlag,
+    regression, autolag)`` and ``kpss(x, regression, nlags=kpss_nlags)`` on its
+    observations, without calling them window by window:
+
+    - The ADF lag matrix (differences, their lags and the lagged level) is
+      built once per column; every window's regressions use a slice of it.
+    - All candidate lag lengths of a window are fitted at once: one Cholesky
+      factorization of the window's cross-product matrix gives the residual
+      sum of squares of every nested model, hence every information criterion.
+    - KPSS long-run variances come from batched FFT autocovariances.
+
+    Blocks of windows are spread over a process pool.
+
+    Parameters:
+        df (pd.DataFrame): Date-indexed DataFrame.
+        columns (str or sequence of str): Column(s) to test. NaNs are dropped
+            per column, as ``stationarity_tests`` does.
+        window (int): Window length in observations (252 is about a trading year).
+        step (int): Observations between consecutive windows (5 is about a week).
+        regression (str): ``'c'`` (constant) or ``'ct'`` (constant and trend),
+            used by both tests.
+        maxlag (int, optional): Largest ADF lag; defaults to statsmodels'
+            ``12 * (window / 100) ** (1 / 4)`` rule.
+        autolag (str, optional): ``'AIC'``, ``'BIC'`` or None (use ``maxlag``).
+        kpss_nlags (str or int): ``'auto'`` (Hobijn et al.), ``'legacy'`` or a
+            fixed number of lags for the KPSS long-run variance.
+        max_workers (int, optional): Worker processes. Defaults to the CPU
+            count; 1 runs in the calling process.
+
+    Returns:
+        pd.DataFrame: One row per window, indexed by the window's last date,
+        with the window start, its length and each test's statistic, p-value
+        and lags (plus the ADF regression's observations). With several
+        columns, the frame has (column, statistic) MultiIndex columns.
+    """
+    if regression not in REGRESSIONS:
+        raise ValueError(f"regression must be one of {REGRESSIONS}")
+    autolag = autolag.lower() if autolag is not None else None
+    if autolag is not None and autolag not in AUTOLAGS:
+        raise ValueError(f"autolag must be one of {AUTOLAGS} or None")
+    window = int(window)
+    ntrend = len(regression)
+    if maxlag is None:
+        maxlag = min(int(np.ceil(12.0 * (window / 100.0) ** 0.25)), window // 2 - ntrend - 1)
+    if not 0 <= maxlag <= window // 2 - ntrend - 1:
+        raise ValueError(f"maxlag must be between 0 and {window // 2 - ntrend - 1} "
+                         f"for windows of {window} observations")
+    if kpss_nlags == 'legacy':
+        kpss_nlags = min(int(np.ceil(12.0 * (window / 100.0) ** 0.25)), window - 1)
+    elif kpss_nlags != 'auto' and not 0 <= int(kpss_nlags) < window:
+        raise ValueError(f"kpss_nlags must be 'auto', 'legacy' or below {window}")
+    options = {'window': window, 'regression': regression, 'maxlag': int(maxlag),
+               'autolag': autolag, 'kpss_nlags': kpss_nlags}
+
+    single = isinstance(columns, str)
+    columns = [columns] if single else list(columns)
+    tasks = []
+    series = {}
+    for column in columns:
+        values = df[column].dropna()
+        if len(values) < window:
+            raise ValueError(f"Column '{column}' has {len(values)} observations, "
+                             f"fewer than the window of {window}")
+        series[column] = values
+        starts = np.arange(0, len(values) - window + 1, max(int(step), 1))
+        x = values.to_numpy(dtype=np.float64)
+        for first in range(0, len(starts), _BLOCK_WINDOWS):
+            block = starts[first:first + _BLOCK_WINDOWS]
+            tasks.append((column, first, x[block[0]:block[-1] + window], block - block[0]))
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    print(f"Running rolling ADF/KPSS on {sum(len(t[3]) for t in tasks)} windows "
+          f"of {len(columns)} column(s) on {max_workers} worker(s)...")
+    if max_workers == 1:
+        blocks = [_window_block(x, starts, options) for _, _, x, starts in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=mp.get_context('spawn')) as pool:
+            blocks = list(pool.map(_window_block, [t[2] for t in tasks], [t[3] for t in tasks],
+                                   [options] * len(tasks)))
+
+    tables = {}
+    for column in columns:
+        parts = [(task[1], block) for task, block in zip(tasks, blocks) if task[0] == column]
+        results = {name: np.concatenate([block[name] for _, block in parts])
+                   for name in parts[0][1]}
+        starts = np.arange(0, len(series[column]) - window + 1, max(int(step), 1))
+        dates = series[column].index
+        table = pd.DataFrame({'window_start': dates[starts], 'n': window, **results},
+                             index=pd.Index(dates[starts + window - 1], name=dates.name or 'Date'))
+        tables[column] = table[list(STATISTICS)]
+    if single:
+        return tables[columns[0]]
+    return pd.concat(tables, axis=1, names=[None, 'statistic'])
+
+
+def _window_block(x, starts, options):
+    """ADF and KPSS results for the windows of ``x`` starting at ``starts``."""
+    window = options['window']
+    windows = np.lib.stride_tricks.sliding_window_view(x, window)[starts]
+    results = _adf_block(x, starts, window, options['regression'], options['maxlag'],
+                         options['autolag'])
+    results.update(_kpss_block(windows, options['regression'], options['kpss_nlags']))
+    return results
+
+
+def _adf_block(x, starts, window, regression, maxlag, autolag):
+    """
+    Batched ``adfuller``. Row ``g`` of the lag matrix holds, for the difference
+    ``d[g] = x[g + 1] - x[g]``: the trend ``g`` (for 'ct'), the level ``x[g]``,
+    the lagged differences ``d[g - 1] .. d[g - maxlag]`` and ``d[g]`` itself.
+    The regressions of the window starting at ``s`` with ``p`` lags use rows
+    ``s + p .. s + window - 2``. The constant is absorbed by centering each
+    window's rows, which leaves the other coefficients and t-values unchanged.
+    """
+    ntrend = len(regression)
+    d = np.diff(x)
+    rows = len(d)
+    columns = [x[:-1]] + [np.r_[np.full(j, np.nan), d[:rows - j]] for j in range(1, maxlag + 1)]
+    if regression == 'ct':
+        columns.insert(0, np.arange(rows, dtype=np.float64))
+    lagmat = np.column_stack(columns + [d])
+    n_windows = len(starts)
+    stats = np.full(n_windows, np.nan)
+    used = np.full(n_windows, maxlag)
+
+    if autolag is not None:
+        # All lag lengths on the common sample: rows s + maxlag .. s + window - 2
+        nobs = window - 1 - maxlag
+        gram = _centered_gram(lagmat, starts + maxlag, nobs)
+        chol, ok = _cholesky(gram)
+        # SSR with the first j regressors is the squared norm of the tail of the y row
+        tail = np.cumsum(chol[:, -1, ::-1] ** 2, axis=1)[:, ::-1]
+        ssr = tail[:, ntrend:]  # trend (if any) and level come before the lags
+        k = ntrend + 1 + np.arange(maxlag + 1)
+        penalty = 2.0 * k if autolag == 'aic' else k * np.log(nobs)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            criterion = nobs * np.log(ssr / nobs) + penalty
+        used = np.where(ok, np.argmin(np.where(np.isfinite(criterion), criterion, np.inf), axis=1),
+                        maxlag)
+
+    nobs_used = window - 1 - used
+    for lag in np.unique(used):
+        idx = np.flatnonzero(used == lag)
+        # Lags first and the level last, so that its t-value reads off the factor
+        level = ntrend - 1
+        order = (list(range(ntrend - 1)) + list(range(ntrend, ntrend + lag))
+                 + [level, lagmat.shape[1] - 1])
+        nobs = window - 1 - lag
+        gram = _centered_gram(lagmat[:, order], starts[idx] + lag, nobs)
+        chol, ok = _cholesky(gram)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma = np.abs(chol[:, -1, -1]) / np.sqrt(nobs - (ntrend + 1 + lag))
+            stats[idx] = np.where(ok, chol[:, -1, -2] / sigma, np.nan)
+
+    from statsmodels.tsa.adfvalues import mackinnonp
+
+    pvalues = np.array([mackinnonp(s, regression=regression, N=1) if np.isfinite(s) else np.nan
+                        for s in stats])
+    return {'adf_statistic': stats, 'adf_pvalue': pvalues, 'adf_lags': used,
+            'adf_nobs': nobs_used}
+
+
+def _centered_gram(lagmat, first_rows, nobs):
+    """Cross-product matrices of rows ``r .. r + nobs - 1`` for each r, centered per window."""
+    view = np.lib.stride_tricks.sliding_window_view(lagmat, nobs, axis=0)[first_rows]
+    view = view - view.mean(axis=2, keepdims=True)
+    return view @ view.transpose(0, 2, 1)
+
+
+def _cholesky(gram):
+    """Batched lower Cholesky factors, with NaN factors (and ok=False) for singular windows."""
+    try:
+        return np.linalg.cholesky(gram), np.ones(len(gram), dtype=bool)
+    except np.linalg.LinAlgError:
+        chol = np.full_like(gram, np.nan)
+        ok = np.zeros(len(gram), dtype=bool)
+        for i, g in enumerate(gram):
+            try:
+                chol[i] = np.linalg.cholesky(g)
+                ok[i] = True
+            except np.linalg.LinAlgError:
+                pass
+        return chol, ok
+
+
+def _kpss_block(windows, regression, nlags):
+    """Batched ``kpss``."""
+    n_windows, nobs = windows.shape
+    resids = windows - windows.mean(axis=1, keepdims=True)
+    if regression == 'ct':
+        t = np.arange(nobs) - (nobs - 1) / 2.0
+        resids = resids - np.outer(resids @ t / (t @ t), t)
+
+    # Autocovariance sums r[i] = sum(e[i:] * e[:-i]) of every window
+    size = 1 << int(np.ceil(np.log2(2 * nobs - 1)))
+    spectrum = np.fft.rfft(resids, n=size, axis=1)
+    acov = np.fft.irfft(spectrum * spectrum.conj(), n=size, axis=1)[:, :nobs]
+
+    if nlags == 'auto':
+        # Hobijn et al. (1998); the few covariances are summed directly, as
+        # statsmodels does, so that truncation to an integer agrees exactly
+        covlags = int(np.power(nobs, 2.0 / 9.0))
+        s0 = np.sum(resids ** 2, axis=1) / nobs
+        s1 = np.zeros(n_windows)
+        for i in range(1, covlags + 1):
+            product = np.einsum('wr,wr->w', resids[:, i:], resids[:, :nobs - i]) / (nobs / 2.0)
+            s0 += product
+            s1 += i * product
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gamma = 1.1447 * np.power((s1 / s0) ** 2, 1.0 / 3.0)
+            lags = np.nan_to_num(gamma * np.power(nobs, 1.0 / 3.0)).astype(np.int64)
+        lags = np.minimum(lags, nobs - 1)
+    else:
+        lags = np.full(n_windows, int(nlags))
+
+    # Bartlett weights 1 - i / (lags + 1), zero beyond each window's lag count
+    i = np.arange(1, nobs)
+    weights = np.clip(1.0 - i / (lags[:, None] + 1.0), 0.0, None)
+    s_hat = (np.sum(resids ** 2, axis=1) + 2.0 * np.sum(acov[:, 1:] * weights, axis=1)) / nobs
+    eta = np.sum(np.cumsum(resids, axis=1) ** 2, axis=1) / nobs ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats = eta / s_hat
+    pvalues = np.interp(stats, _KPSS_CRITICAL[regression], _KPSS_PVALUES)
+    pvalues[~np.isfinite(stats)] = np.nan
+    return {'kpss_statistic': stats, 'kpss_pvalue': pvalues, 'kpss_lags': lags}
@@ -0,0 +1,78 @@
+# src/segment_stats.py
+
+import numpy as np
+from scipy.special import gammaln
+
+
+class CumulativeStats:
+    """
+    Prefix sums of a series and of its squares.
+
+    Once built (O(n)), the count, sum and sum of squares of any contiguous
+    segment ``x[start:end]`` can be read off in O(1), and whole arrays of
+    segments can be evaluated in one vectorized call.
+
+    The series is centred on ``shift`` (its mean by default) before the sums
+    are accumulated, which keeps the sums of squares small and avoids
+    cancellation when segment variances are derived from them. All sums
+    returned by this class are sums of ``x - shift``.
+    """
+
+    def __init__(self, data, shift=None):
+        x = np.asarray(data, dtype=float)
+        if x.ndim != 1:
+            raise ValueError("CumulativeStats expects a one-dimensional series")
+        self.n = len(x)
+        self.shift = float(np.mean(x)) if shift is None and self.n else float(shift or 0.0)
+        y = x - self.shift
+        self.s1 = np.concatenate(([0.0], np.cumsum(y)))
+        self.s2 = np.concatenate(([0.0], np.cumsum(y * y)))
+
+    def segment(self, start, end):
+        """
+        Sufficient statistics of the segment(s) ``x[start:end]``.
+
+        Args:
+            start (int or np.ndarray): Inclusive segment start(s).
+            end (int or np.ndarray): Exclusive segment end(s).
+
+        Returns:
+            tuple: (count, sum, sum of squares) of ``x - shift`` over each segment.
+        """
+        start = np.asarray(start)
+        end = np.asarray(end)
+        return end - start, self.s1[end] - self.s1[start], self.s2[end] - self.s2[start]
+
+    def sse(self, start, end):
+        """
+        Sum of squared deviations from the segment mean for ``x[start:end]``.
+        Empty segments have an SSE of zero.
+        """
+        k, s, q = self.segment(start, end)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sse = q - np.where(k > 0, s * s / np.maximum(k, 1), 0.0)
+        return np.maximum(sse, 0.0)
+
+    def normal_gamma_log_marginal(self, start, end, mu0, kappa0, alpha0, beta0):
+        """
+        Log marginal likelihood of the segment(s) ``x[start:end]`` under a
+        Normal-Gamma prior on the segment mean and precision:
+        ``precision ~ Gamma(alpha0, beta0)``, ``mean ~ Normal(mu0, 1/(kappa0*precision))``.
+
+        Args:
+            start (int or np.ndarray): Inclusive segment start(s).
+            end (int or np.ndarray): Exclusive segment end(s).
+            mu0, kappa0, alpha0, beta0 (float): Prior parameters (``mu0`` in data units).
+
+        Returns:
+            np.ndarray: Log evidence of each segment.
+        """
+        k, s, q = self.segment(start, end)
+        m0 = mu0 - self.shift
+        kappa_n = kappa0 + k
+        mu_n = (kappa0 * m0 + s) / kappa_n
+        alpha_n = alpha0 + 0.5 * k
+        beta_n = beta0 + 0.5 * (q + kappa0 * m0 * m0 - kappa_n * mu_n * mu_n)
+        return (gammaln(alpha_n) - gammaln(alpha0) + alpha0 * np.log(beta0)
+                - alpha_n * np.log(beta_n) + 0.5 * (np.log(kappa0) - np.log(kappa_n))
+                - 0.5 * k * np.log(2.0 * np.pi))
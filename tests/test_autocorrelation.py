@@ -0,0 +1,63 @@
+# tests/test_autocorrelation.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.autocorrelation import acf, pacf, rolling_acf, segment_acf
+
+stattools = pytest.importorskip('statsmodels.tsa.stattools')
+
+NLAGS = 10
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    noise = rng.normal(size=(3, 60))
+    ar = np.zeros_like(noise)
+    for t in range(1, noise.shape[1]):
+        ar[:, t] = np.array([0.7, -0.4, 0.0]) * ar[:, t - 1] + noise[:, t]
+    return ar
+
+
+def test_batched_acf_pacf_match_statsmodels(series):
+    expected_acf = [stattools.acf(row, nlags=NLAGS, fft=False) for row in series]
+    expected_pacf = [stattools.pacf(row, nlags=NLAGS, method='ywm') for row in series]
+    np.testing.assert_allclose(acf(series, NLAGS), expected_acf, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(pacf(series, NLAGS), expected_pacf, rtol=0, atol=1e-12)
+
+
+def test_ragged_rows_match_statsmodels(series):
+    lengths = np.array([60, 35, 12])
+    result_acf = acf(series, NLAGS, lengths)
+    result_pacf = pacf(series, NLAGS, lengths)
+    for i, n in enumerate(lengths):
+        row = series[i, :n]
+        np.testing.assert_allclose(result_acf[i], stattools.acf(row, nlags=NLAGS, fft=False),
+                                   rtol=0, atol=1e-12)
+        # statsmodels' pacf needs fewer lags than half the observations
+        nlags = min(NLAGS, n // 2 - 1)
+        np.testing.assert_allclose(result_pacf[i, :nlags + 1],
+                                   stattools.pacf(row, nlags=nlags, method='ywm'),
+                                   rtol=0, atol=1e-12)
+
+
+def test_rolling_and_segment_acf_match_direct(series):
+    df = pd.DataFrame({'x': series[0]}, index=pd.date_range('2020-01-01', periods=60))
+    rolling = rolling_acf(df, 'x', nlags=5, window=20, step=7)
+    for end, row in rolling.iterrows():
+        window = df.loc[:end, 'x'].values[-20:]
+        np.testing.assert_allclose(row.values, stattools.acf(window, nlags=5, fft=False)[1:],
+                                   rtol=0, atol=1e-12)
+
+    segments = segment_acf(df, 'x', [25, 45, 60], nlags=5, partial=True)
+    assert segments['n'].tolist() == [25, 20, 15]
+    for (_, row), (start, end) in zip(segments.iterrows(), [(0, 25), (25, 45), (45, 60)]):
+        expected = stattools.pacf(series[0, start:end], nlags=5, method='ywm')[1:]
+        np.testing.assert_allclose(row[list(range(1, 6))].values.astype(float), expected,
+                                   rtol=0, atol=1e-12)
+
+
+def test_constant_rows_are_nan():
+    result = acf(np.ones((2, 10)), nlags=3)
+    assert np.isnan(result).all()
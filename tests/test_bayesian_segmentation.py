@@ -0,0 +1,88 @@
+# tests/test_bayesian_segmentation.py
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from scipy.special import logsumexp
+
+from src.bayesian_segmentation import default_prior, run_segmentation_posterior
+
+
+def _segment_log_marginal(segment, mu0, kappa0, alpha0, beta0):
+    """Normal-Gamma evidence of a segment as a multivariate Student-t density."""
+    k = len(segment)
+    shape = beta0 / alpha0 * (np.eye(k) + np.ones((k, k)) / kappa0)
+    return stats.multivariate_t.logpdf(segment, loc=np.full(k, mu0), shape=shape, df=2 * alpha0)
+
+
+def _brute_force_partitions(data, hazard, prior):
+    """
+    Enumerate every partition of ``data`` into segments, weighting each by its
+    geometric length prior and segment evidences.
+    """
+    n = len(data)
+    log_weights, starts, levels = [], [], []
+    for mask in itertools.product((False, True), repeat=n - 1):
+        bounds = [0] + [t + 1 for t in range(n - 1) if mask[t]] + [n]
+        m = len(bounds) - 1
+        log_w = (m - 1) * np.log(hazard) + (n - m) * np.log1p(-hazard)
+        level = np.empty(n)
+        for a, b in zip(bounds, bounds[1:]):
+            segment = data[a:b]
+            log_w += _segment_log_marginal(segment, **prior)
+            level[a:b] = ((prior['kappa0'] * prior['mu0'] + segment.sum())
+                          / (prior['kappa0'] + len(segment)))
+        log_weights.append(log_w)
+        starts.append(bounds[1:-1])
+        levels.append(level)
+    log_weights = np.array(log_weights)
+    log_evidence = logsumexp(log_weights)
+    probs = np.exp(log_weights - log_evidence)
+
+    changepoint = np.zeros(n)
+    n_segments = np.zeros(n)
+    for p, cps in zip(probs, starts):
+        changepoint[cps] += p
+        n_segments[len(cps)] += p
+    return changepoint, probs @ np.array(levels), n_segments, log_evidence
+
+
+@pytest.fixture
+def regimes():
+    rng = np.random.default_rng(5)
+    data = np.r_[rng.normal(0.0, 1.0, 5), rng.normal(4.0, 1.0, 5)]
+    return pd.DataFrame({'x': data}, index=pd.date_range('2021-01-01', periods=len(data)))
+
+
+@pytest.mark.parametrize('hazard', [0.05, 0.3])
+def test_posterior_matches_enumeration(regimes, hazard):
+    data = regimes['x'].values
+    prior = default_prior(data)
+    changepoint, level, n_segments, log_evidence = _brute_force_partitions(data, hazard, prior)
+    result = run_segmentation_posterior(regimes, 'x', hazard=hazard, prune_threshold=1e-300)
+
+    np.testing.assert_allclose(result['changepoint_probability'].values, changepoint,
+                               rtol=1e-9, atol=1e-14)
+    np.testing.assert_allclose(result['posterior_mean'].values, level, rtol=1e-9)
+    np.testing.assert_allclose(result['n_segments'].values[:len(data)], n_segments,
+                               rtol=1e-9, atol=1e-14)
+    assert result['log_evidence'] == pytest.approx(log_evidence, abs=1e-9)
+    assert result['n_segments_truncated'] == pytest.approx(0.0, abs=1e-12)
+
+
+def test_max_segments_reports_truncated_mass(regimes):
+    full = run_segmentation_posterior(regimes, 'x', hazard=0.3)
+    capped = run_segmentation_posterior(regimes, 'x', hazard=0.3, max_segments=2)
+    np.testing.assert_allclose(capped['n_segments'].values, full['n_segments'].values[:2])
+    assert capped['n_segments_truncated'] == pytest.approx(full['n_segments'].values[2:].sum())
+    pd.testing.assert_series_equal(capped['changepoint_probability'],
+                                   full['changepoint_probability'])
+
+
+def test_rejects_invalid_settings(regimes):
+    with pytest.raises(ValueError):
+        run_segmentation_posterior(regimes, 'x', hazard=1.0)
+    with pytest.raises(ValueError):
+        run_segmentation_posterior(regimes, 'x', max_candidates=1)
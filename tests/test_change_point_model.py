@@ -0,0 +1,61 @@
+# tests/test_change_point_model.py
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import integrate, stats
+from scipy.special import logsumexp
+
+from src.change_point_model import _exact_switch_point_posterior, run_change_point_analysis
+
+
+def _brute_force_switch_point(data):
+    """
+    Posterior of tau, log evidence and posterior mean of sigma for the PyMC3
+    switch-point model, integrating mu1/mu2 out as a multivariate normal and
+    sigma by adaptive quadrature, one tau at a time.
+    """
+    n = len(data)
+    m0, v0 = np.mean(data), np.var(data)
+    log_weight, sigma_mean = np.empty(n), np.empty(n)
+    for tau in range(n):
+        before = (np.arange(n) <= tau).astype(float)
+        shared = v0 * (np.outer(before, before) + np.outer(1 - before, 1 - before))
+
+        def density(sigma, power=0):
+            cov = sigma ** 2 * np.eye(n) + shared
+            return (sigma ** power * stats.halfnorm.pdf(sigma)
+                    * stats.multivariate_normal.pdf(data, np.full(n, m0), cov))
+
+        mass = integrate.quad(density, 0, np.inf, epsabs=0, epsrel=1e-12, limit=200)[0]
+        first = integrate.quad(density, 0, np.inf, args=(1,), epsabs=0, epsrel=1e-12,
+                               limit=200)[0]
+        log_weight[tau] = np.log(mass)
+        sigma_mean[tau] = first / mass
+    log_evidence = logsumexp(log_weight) - np.log(n)
+    tau_probs = np.exp(log_weight - logsumexp(log_weight))
+    return tau_probs, log_evidence, tau_probs @ sigma_mean
+
+
+@pytest.fixture
+def switch_data():
+    rng = np.random.default_rng(1)
+    return np.r_[rng.normal(0.0, 0.8, 7), rng.normal(1.5, 0.8, 5)]
+
+
+def test_exact_posterior_matches_quadrature(switch_data):
+    tau_probs, log_evidence, sigma_mean = _brute_force_switch_point(switch_data)
+    post = _exact_switch_point_posterior(switch_data)
+    np.testing.assert_allclose(post['tau_probs'], tau_probs, rtol=1e-10, atol=1e-14)
+    assert post['log_evidence'] == pytest.approx(log_evidence, abs=1e-10)
+
+    df = pd.DataFrame({'x': switch_data})
+    trace, result = run_change_point_analysis(df, 'x', engine='exact', draws=50, chains=2,
+                                              random_seed=0)
+    np.testing.assert_allclose(result['tau_probs'], tau_probs, rtol=1e-10, atol=1e-14)
+    assert result['moments'].loc['sigma', 'mean'] == pytest.approx(sigma_mean, rel=1e-6)
+    assert trace.posterior['tau'].shape == (2, 50)
+
+
+def test_exact_engine_rejects_constant_series():
+    with pytest.raises(ValueError):
+        run_change_point_analysis(pd.DataFrame({'x': np.ones(10)}), 'x', engine='exact')
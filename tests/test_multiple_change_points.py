@@ -0,0 +1,104 @@
+# tests/test_multiple_change_points.py
+import itertools
+
+import numpy as np
+import pytest
+
+from src.multiple_change_points import (COSTS, SegmentCost, binary_segmentation, pelt,
+                                        penalty_path)
+
+
+def _direct_cost(data, start, end, cost):
+    """Segment cost computed from the segment's values rather than prefix sums."""
+    segment = data[start:end]
+    if cost == 'mean':
+        return np.sum((segment - segment.mean()) ** 2)
+    if cost == 'var':
+        return len(segment) * np.log(np.mean((segment - data.mean()) ** 2))
+    return len(segment) * np.log(np.var(segment))
+
+
+def _brute_force_segmentation(data, pen, cost, min_size):
+    """Minimum penalized cost over every segmentation with segments of min_size or more."""
+    n = len(data)
+    best = (np.inf, None)
+    for k in range(n // min_size):
+        for splits in itertools.combinations(range(min_size, n - min_size + 1), k):
+            bounds = (0,) + splits + (n,)
+            if min(np.diff(bounds)) < min_size:
+                continue
+            total = sum(_direct_cost(data, a, b, cost) for a, b in zip(bounds, bounds[1:]))
+            best = min(best, (total + pen * k, list(bounds[1:])))
+    return best
+
+
+def _penalized_cost(data, bkps, pen, cost):
+    bounds = [0] + bkps
+    return (sum(_direct_cost(data, a, b, cost) for a, b in zip(bounds, bounds[1:]))
+            + pen * (len(bkps) - 1))
+
+
+def _greedy_splits(data, n_bkps, cost, min_size):
+    """Binary segmentation by rescanning every segment for the best split each round."""
+    bounds = [0, len(data)]
+    for _ in range(n_bkps):
+        candidates = []
+        for a, b in zip(bounds, bounds[1:]):
+            for split in range(a + min_size, b - min_size + 1):
+                gain = (_direct_cost(data, a, b, cost) - _direct_cost(data, a, split, cost)
+                        - _direct_cost(data, split, b, cost))
+                candidates.append((gain, split))
+        if not candidates:
+            break
+        bounds = sorted(bounds + [max(candidates)[1]])
+    return bounds[1:]
+
+
+@pytest.fixture(params=[3, 4])
+def steps(request):
+    rng = np.random.default_rng(request.param)
+    return np.r_[rng.normal(0, 1, 5), rng.normal(3, 0.3, 4), rng.normal(-1, 2, 5)]
+
+
+@pytest.mark.parametrize('cost', COSTS)
+def test_segment_cost_matches_direct(steps, cost):
+    seg_cost = SegmentCost(steps, cost)
+    for start, end in [(0, 14), (0, 2), (3, 9), (9, 14)]:
+        assert seg_cost(start, end) == pytest.approx(_direct_cost(steps, start, end, cost),
+                                                     rel=1e-10, abs=1e-10)
+
+
+# Single observations have no variance, so the log-variance costs need two or more
+@pytest.mark.parametrize('cost, min_size', [(cost, min_size) for cost in COSTS
+                                            for min_size in (1, 2, 3)
+                                            if cost == 'mean' or min_size > 1])
+@pytest.mark.parametrize('pen', [0.5, 3.0, 20.0])
+def test_pelt_matches_brute_force(steps, cost, min_size, pen):
+    expected_cost, expected = _brute_force_segmentation(steps, pen, cost, min_size)
+    bkps = pelt(steps, pen, cost=cost, min_size=min_size)
+    assert _penalized_cost(steps, bkps, pen, cost) == pytest.approx(expected_cost, abs=1e-9)
+    assert bkps == expected
+
+
+@pytest.mark.parametrize('cost', COSTS)
+def test_binary_segmentation_matches_greedy(steps, cost):
+    for n_bkps in range(1, 5):
+        expected = _greedy_splits(steps, n_bkps, cost, min_size=2)
+        assert binary_segmentation(steps, n_bkps=n_bkps, cost=cost) == expected
+
+
+@pytest.mark.parametrize('method', ['binseg', 'pelt'])
+def test_penalty_path_matches_single_runs(steps, method):
+    penalties = [0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 50.0, 200.0]
+    path = penalty_path(steps, penalties, method=method)
+    for pen in penalties:
+        single = (pelt(steps, pen) if method == 'pelt'
+                  else binary_segmentation(steps, pen=pen))
+        assert path[pen] == single
+
+
+def test_pelt_matches_ruptures(steps):
+    rpt = pytest.importorskip('ruptures')
+    for pen in (0.5, 3.0, 20.0):
+        expected = rpt.Pelt(model='l2', min_size=2, jump=1).fit(steps).predict(pen=pen)
+        assert pelt(steps, pen, cost='mean', min_size=2) == expected
@@ -0,0 +1,92 @@
+# tests/test_online_change_point.py
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from scipy.special import logsumexp
+
+from src.online_change_point import BayesianOnlineChangePointDetector, detect_online
+
+PRIOR = {'mu0': 0.1, 'kappa0': 0.5, 'alpha0': 2.0, 'beta0': 1.5}
+
+
+def _predictive(x, history, mu0, kappa0, alpha0, beta0):
+    """Student-t predictive of ``x`` after a Normal-Gamma update with ``history``."""
+    k = len(history)
+    mean = np.mean(history) if k else 0.0
+    kappa = kappa0 + k
+    mu = (kappa0 * mu0 + k * mean) / kappa
+    alpha = alpha0 + k / 2
+    beta = (beta0 + 0.5 * np.sum((np.asarray(history) - mean) ** 2)
+            + kappa0 * k * (mean - mu0) ** 2 / (2 * kappa))
+    scale = np.sqrt(beta * (kappa + 1) / (alpha * kappa))
+    return stats.t.logpdf(x, 2 * alpha, loc=mu, scale=scale)
+
+
+def _brute_force_run_lengths(data, hazard):
+    """
+    Adams & MacKay recursion without pruning, each run's predictive recomputed
+    from its observations. Returns per step the run-length posterior (index =
+    run length, counting the new observation) and the log predictive of the
+    new observation.
+    """
+    log_probs = np.zeros(1)  # run lengths 0..t before the new observation
+    posteriors, log_predictives = [], []
+    for t, x in enumerate(data):
+        log_pred = np.array([_predictive(x, data[t - r:t], **PRIOR) for r in range(t + 1)])
+        growth = log_probs + log_pred + np.log1p(-hazard)
+        change = logsumexp(log_probs + np.log(hazard) + _predictive(x, [], **PRIOR))
+        # A change and the growth of an empty run both start a run of length one
+        joint = np.r_[-np.inf, np.logaddexp(change, growth[0]), growth[1:]]
+        evidence = logsumexp(joint)
+        log_probs = joint - evidence
+        posteriors.append(np.exp(log_probs))
+        log_predictives.append(evidence)
+    return posteriors, np.array(log_predictives)
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(2)
+    return np.r_[rng.normal(0.0, 1.0, 15), rng.normal(2.0, 0.5, 10)]
+
+
+def test_update_matches_unpruned_recursion(returns):
+    posteriors, log_predictives = _brute_force_run_lengths(returns, hazard=0.1)
+    detector = BayesianOnlineChangePointDetector(hazard=0.1, prune_threshold=1e-300,
+                                                 max_run_lengths=len(returns), **PRIOR)
+    for x, expected, log_predictive in zip(returns, posteriors, log_predictives):
+        out = detector.update(x)
+        posterior = detector.run_length_posterior()
+        full = np.zeros(len(expected))
+        full[posterior.index] = posterior.values
+        np.testing.assert_allclose(full, expected, rtol=1e-10, atol=1e-14)
+        assert out['log_predictive'] == pytest.approx(log_predictive, abs=1e-10)
+        assert out['map_run_length'] == int(np.argmax(expected))
+
+
+def test_pruning_bounds_hypotheses(returns):
+    detector = BayesianOnlineChangePointDetector(hazard=0.1, max_run_lengths=5, **PRIOR)
+    for x in returns:
+        detector.update(x)
+        assert len(detector.run_lengths) <= 5
+        assert detector.run_length_posterior().sum() == pytest.approx(1.0)
+
+
+def test_checkpoint_resumes_identically(returns, tmp_path):
+    series = pd.Series(returns, index=pd.date_range('2020-01-01', periods=len(returns)))
+    full = detect_online(series, hazard=0.05, **PRIOR)
+
+    detector = BayesianOnlineChangePointDetector(hazard=0.05, **PRIOR)
+    head = detect_online(series.iloc[:10], detector)
+    detector.save(tmp_path / 'detector.npz')
+    resumed = BayesianOnlineChangePointDetector.load(tmp_path / 'detector.npz')
+    tail = detect_online(series.iloc[10:], resumed)
+    pd.testing.assert_frame_equal(pd.concat([head, tail]), full)
+
+
+def test_callable_hazard_must_be_passed_on_restore():
+    detector = BayesianOnlineChangePointDetector(hazard=lambda r: np.full(len(r), 0.1))
+    detector.update(0.5)
+    with pytest.raises(ValueError):
+        BayesianOnlineChangePointDetector.from_state(detector.state_dict())
@@ -0,0 +1,66 @@
+# tests/test_rolling_stationarity.py
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.rolling_stationarity import rolling_stationarity
+
+stattools = pytest.importorskip('statsmodels.tsa.stattools')
+
+WINDOW, STEP = 80, 9
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(6)
+    returns = np.r_[rng.normal(0.0, 1.0, 120), 0.6 * rng.normal(0.0, 1.0, 100)]
+    price = 50 + np.cumsum(returns)
+    return pd.DataFrame({'Price': price, 'daily_return': returns},
+                        index=pd.date_range('2015-01-01', periods=len(price), name='Date'))
+
+
+def _statsmodels_windows(x, regression, autolag, kpss_nlags):
+    rows = []
+    with warnings.catch_warnings():
+        # kpss warns when its statistic is outside the p-value table
+        warnings.simplefilter('ignore')
+        for start in range(0, len(x) - WINDOW + 1, STEP):
+            window = x[start:start + WINDOW]
+            adf = stattools.adfuller(window, regression=regression, autolag=autolag)
+            kpss = stattools.kpss(window, regression=regression, nlags=kpss_nlags)
+            rows.append({'adf_statistic': adf[0], 'adf_pvalue': adf[1], 'adf_lags': adf[2],
+                         'adf_nobs': adf[3], 'kpss_statistic': kpss[0], 'kpss_pvalue': kpss[1],
+                         'kpss_lags': kpss[2]})
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('regression, autolag, kpss_nlags',
+                         [('c', 'AIC', 'auto'), ('ct', 'BIC', 'legacy'), ('c', None, 4)])
+def test_windows_match_statsmodels(prices, regression, autolag, kpss_nlags):
+    result = rolling_stationarity(prices, 'Price', window=WINDOW, step=STEP,
+                                  regression=regression, autolag=autolag,
+                                  kpss_nlags=kpss_nlags, max_workers=1)
+    expected = _statsmodels_windows(prices['Price'].values, regression, autolag, kpss_nlags)
+    assert len(result) == len(expected)
+    for name in ('adf_lags', 'adf_nobs', 'kpss_lags'):
+        np.testing.assert_array_equal(result[name].values, expected[name].values)
+    for name in ('adf_statistic', 'adf_pvalue', 'kpss_statistic', 'kpss_pvalue'):
+        np.testing.assert_allclose(result[name].values, expected[name].values,
+                                   rtol=1e-9, atol=1e-12, err_msg=name)
+    assert result.index[0] == prices.index[WINDOW - 1]
+    assert result['window_start'].iloc[1] == prices.index[STEP]
+
+
+def test_process_pool_matches_serial(prices):
+    columns = ['Price', 'daily_return']
+    serial = rolling_stationarity(prices, columns, window=WINDOW, step=STEP, max_workers=1)
+    pooled = rolling_stationarity(prices, columns, window=WINDOW, step=STEP, max_workers=2)
+    pd.testing.assert_frame_equal(pooled, serial)
+    assert list(serial.columns.levels[0]) == columns
+
+
+def test_rejects_windows_longer_than_series(prices):
+    with pytest.raises(ValueError):
+        rolling_stationarity(prices, 'Price', window=len(prices) + 1)